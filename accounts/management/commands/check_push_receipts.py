@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from utils.push import check_push_receipts
+
+
+class Command(BaseCommand):
+    help = "Fetch Expo push receipts and remove tokens of unregistered devices."
+
+    def handle(self, *args, **kwargs):
+
+        result = check_push_receipts()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {result['checked']} receipts, pruned {result['pruned']} tokens."
+        ))
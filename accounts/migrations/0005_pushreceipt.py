@@ -0,0 +1,22 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_marketingpush_pushlog_pushtoken'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PushReceipt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('receipt_id', models.CharField(max_length=64, unique=True)),
+                ('token', models.CharField(max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+    ]
@@ -199,6 +199,19 @@ class PushLog(models.Model):
         unique_together = ("user", "event", "reminder_type")
 
 
+class PushReceipt(models.Model):
+    """
+    Expo push ticket id waiting for its delivery receipt
+    (see utils.push.check_push_receipts).
+    """
+    receipt_id = models.CharField(max_length=64, unique=True)
+    token = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.receipt_id} - {self.token}"
+
+
 class MarketingPush(models.Model):
     title = models.CharField(max_length=255)
     message = models.TextField()
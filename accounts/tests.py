@@ -0,0 +1,135 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from utils import push
+
+from .models import PushReceipt, PushToken
+
+
+def ok_tickets(messages):
+    return [{"status": "ok", "id": f"receipt-{m['to']}"} for m in messages]
+
+
+class SendExpoPushTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email="fan@example.com", password="pw")
+
+    def send(self, tokens, post_chunk=ok_tickets):
+        with mock.patch("utils.push._post_chunk", side_effect=post_chunk) as post:
+            result = push.send_expo_push(tokens, "Title", "Body", {"event_id": 1})
+        return result, [call.args[0] for call in post.call_args_list]
+
+    def test_messages_go_out_in_chunks_of_100(self):
+        tokens = [f"tok{i}" for i in range(250)]
+        result, chunks = self.send(tokens)
+
+        self.assertEqual(sorted(len(chunk) for chunk in chunks), [50, 100, 100])
+        self.assertEqual(result["sent"], 250)
+        self.assertEqual([t["id"] for t in result["data"]], [f"receipt-{t}" for t in tokens])
+        self.assertEqual(chunks[0][0]["data"], {"event_id": 1})
+
+    def test_tokens_are_deduped(self):
+        result, chunks = self.send(["a", "b", "a", "", None, "b"])
+
+        self.assertEqual([m["to"] for m in chunks[0]], ["a", "b"])
+        self.assertEqual(result["sent"], 2)
+
+    def test_no_tokens(self):
+        result, chunks = self.send(["", None])
+
+        self.assertEqual(result, {"error": "No tokens provided"})
+        self.assertEqual(chunks, [])
+
+    def test_receipts_are_stored_and_dead_tokens_pruned(self):
+        PushToken.objects.create(user=self.user, token="alive")
+        PushToken.objects.create(user=self.user, token="gone")
+
+        def post_chunk(messages):
+            return [
+                {"status": "ok", "id": "r-alive"},
+                {"status": "error", "details": {"error": "DeviceNotRegistered"}},
+                {"status": "error", "details": {"error": "MessageRateExceeded"}},
+            ]
+
+        result, _ = self.send(["alive", "gone", "busy"], post_chunk)
+
+        self.assertEqual((result["sent"], result["errors"], result["pruned"]), (1, 2, 1))
+        self.assertEqual(list(PushToken.objects.values_list("token", flat=True)), ["alive"])
+        self.assertEqual(
+            list(PushReceipt.objects.values_list("receipt_id", "token")), [("r-alive", "alive")]
+        )
+
+    def test_failed_request_fails_only_its_chunk(self):
+        session = mock.Mock()
+        session.post.side_effect = ConnectionError("boom")
+
+        with mock.patch("utils.push._get_session", return_value=session):
+            tickets = push._post_chunk([{"to": "a"}, {"to": "b"}])
+
+        self.assertEqual([t["status"] for t in tickets], ["error", "error"])
+
+    def test_short_answer_fails_the_chunk(self):
+        session = mock.Mock()
+        session.post.return_value.json.return_value = {"data": [{"status": "ok", "id": "x"}]}
+
+        with mock.patch("utils.push._get_session", return_value=session):
+            tickets = push._post_chunk([{"to": "a"}, {"to": "b"}])
+
+        self.assertEqual([t["status"] for t in tickets], ["error", "error"])
+
+
+class PushRetryTests(TestCase):
+
+    def setUp(self):
+        self.retry = push._get_session().adapters["https://"].max_retries
+
+    def test_rejections_with_retry_after_are_retried(self):
+        self.assertTrue(self.retry.is_retry("POST", 503, True))
+        self.assertTrue(self.retry.is_retry("POST", 429, True))
+
+    def test_answers_that_may_have_been_delivered_are_not(self):
+        self.assertFalse(self.retry.is_retry("POST", 503, False))
+        self.assertFalse(self.retry.is_retry("POST", 500, True))
+        self.assertFalse(self.retry.is_retry("POST", 413, True))
+
+    def test_read_errors_are_not_retried(self):
+        self.assertEqual(self.retry.read, 0)
+        self.assertEqual(self.retry.other, 0)
+        self.assertGreater(self.retry.connect, 0)
+
+
+class CheckPushReceiptsTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email="fan@example.com", password="pw")
+
+    def receipt(self, receipt_id, token, age):
+        receipt = PushReceipt.objects.create(receipt_id=receipt_id, token=token)
+        PushReceipt.objects.filter(pk=receipt.pk).update(created_at=timezone.now() - age)
+
+    def test_unregistered_devices_are_pruned(self):
+        PushToken.objects.create(user=self.user, token="alive")
+        PushToken.objects.create(user=self.user, token="gone")
+        self.receipt("r-alive", "alive", timedelta(minutes=20))
+        self.receipt("r-gone", "gone", timedelta(minutes=20))
+        self.receipt("r-fresh", "alive", timedelta(minutes=1))
+        self.receipt("r-stale", "alive", timedelta(hours=25))
+
+        session = mock.Mock()
+        session.post.return_value.json.return_value = {"data": {
+            "r-alive": {"status": "ok"},
+            "r-gone": {"status": "error", "details": {"error": "DeviceNotRegistered"}},
+        }}
+
+        with mock.patch("utils.push._get_session", return_value=session):
+            result = push.check_push_receipts()
+
+        self.assertEqual(result, {"checked": 2, "pruned": 1})
+        self.assertEqual(session.post.call_args.kwargs["json"], {"ids": ["r-alive", "r-gone"]})
+        self.assertEqual(list(PushToken.objects.values_list("token", flat=True)), ["alive"])
+        self.assertEqual(list(PushReceipt.objects.values_list("receipt_id", flat=True)), ["r-fresh"])
@@ -136,6 +136,33 @@ else:
 
 CRON_SECRET_KEY = os.environ.get("CRON_SECRET_KEY")
 
+
+# =========================
+# CACHE
+# =========================
+# Local memory by default (per process, fine for tests / one worker).
+# With several gunicorn workers point it at a shared backend, e.g.
+#   CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+#   CACHE_LOCATION=redis://127.0.0.1:6379/1
+# or django.core.cache.backends.db.DatabaseCache (run createcachetable)
+# or django.core.cache.backends.filebased.FileBasedCache (a directory).
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND",
+            "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", "sirheart-cache"),
+    }
+}
+
+# Public event list / ticket type responses (seconds). Writes through
+# Event / TicketType save + delete invalidate explicitly; the short
+# availability TTL bounds staleness of quantity_sold updates that
+# bypass signals.
+CATALOGUE_CACHE_TTL = int(os.environ.get("CATALOGUE_CACHE_TTL", 300))
+CATALOGUE_AVAILABILITY_TTL = int(os.environ.get("CATALOGUE_AVAILABILITY_TTL", 15))
+
 # =========================
 # PASSWORD VALIDATION
 # =========================
@@ -248,6 +275,29 @@ SECURE_SSL_REDIRECT = False
 # =========================
 AUTO_PAYOUT_ON_STARTUP = True
 
+# Minutes a pending order keeps its seats before the hold expires
+TICKET_HOLD_MINUTES = int(os.environ.get("TICKET_HOLD_MINUTES", 10))
+
+# Ticket QR images are rendered on demand (/api/tickets/qr/<code>.png).
+# Set STORE_TICKET_QR_IMAGES=True to also upload a PNG per ticket to
+# media storage at issuance. QR_CACHE_DIR adds a disk cache to the
+# in-memory one.
+STORE_TICKET_QR_IMAGES = os.environ.get("STORE_TICKET_QR_IMAGES", "False") == "True"
+QR_CACHE_DIR = os.environ.get("QR_CACHE_DIR")
+
+# Encode an HMAC signed payload (tickets.signing) in ticket QR codes
+# instead of the bare ticket_code, so gates can reject forgeries
+# offline. TICKET_SIGNING_KEY defaults to SECRET_KEY; changing it
+# invalidates every issued QR.
+SIGNED_TICKET_CODES = os.environ.get("SIGNED_TICKET_CODES", "False") == "True"
+TICKET_SIGNING_KEY = os.environ.get("TICKET_SIGNING_KEY") or SECRET_KEY
+
+# Processes used for batch QR rendering (0 = one per CPU)
+QR_RENDER_WORKERS = int(os.environ.get("QR_RENDER_WORKERS", 0))
+
+# Waiting room: how long an admitted queue token may be used to buy
+WAITING_ROOM_ADMISSION_MINUTES = int(os.environ.get("WAITING_ROOM_ADMISSION_MINUTES", 20))
+
 
 # =========================
 # MOMO SETTINGS
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Event
+from .models import Event, WaitingRoom
 
 @admin.register(Event)
 class EventAdmin(admin.ModelAdmin):
@@ -14,3 +14,11 @@ class EventAdmin(admin.ModelAdmin):
     list_filter = ("category",)
     search_fields = ("title", "location")
     ordering = ("start_date",)
+
+
+@admin.register(WaitingRoom)
+class WaitingRoomAdmin(admin.ModelAdmin):
+    list_display = ("event", "is_active", "opens_at", "admit_per_minute", "last_position")
+    list_filter = ("is_active",)
+    search_fields = ("event__title",)
+    readonly_fields = ("last_position",)
@@ -0,0 +1,71 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+# Generation-based response cache for the public catalogue.
+#
+# Every namespace has a generation counter that is part of each key.
+# Invalidating a namespace just bumps the counter; stale entries are
+# never read again and age out on their own TTL.
+EVENTS_NAMESPACE = "catalogue:events"
+
+
+def ticket_types_namespace(event_id):
+    return f"catalogue:ticket_types:{event_id}"
+
+
+def _generation_key(namespace):
+    return f"{namespace}:gen"
+
+
+def _generation(namespace):
+    key = _generation_key(namespace)
+    generation = cache.get(key)
+
+    if generation is None:
+        # time based so an evicted counter never reuses an old generation
+        cache.add(key, int(time.time() * 1000), None)
+        generation = cache.get(key)
+
+    return generation
+
+
+def invalidate(namespace):
+    key = _generation_key(namespace)
+
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, int(time.time() * 1000), None)
+
+
+def invalidate_on_commit(*namespaces):
+    """
+    Invalidate once the writer's transaction commits (right away outside
+    one). Bumping earlier lets a concurrent reader cache the old rows
+    under the new generation.
+    """
+    def bump():
+        for namespace in namespaces:
+            invalidate(namespace)
+
+    transaction.on_commit(bump)
+
+
+def _response_key(namespace, request):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f"{namespace}:{_generation(namespace)}:{path}"
+
+
+def get_cached_response(namespace, request):
+    return cache.get(_response_key(namespace, request))
+
+
+def set_cached_response(namespace, request, data, timeout=None):
+    if timeout is None:
+        timeout = settings.CATALOGUE_CACHE_TTL
+    cache.set(_response_key(namespace, request), data, timeout)
@@ -0,0 +1,93 @@
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Event
+
+
+class InvalidFilter(ValueError):
+    pass
+
+
+def _parse_bound(value, name, inclusive_day=False):
+    try:
+        parsed = parse_datetime(value)
+        day = parse_date(value) if parsed is None else None
+    except ValueError:
+        raise InvalidFilter(f"{name} must be an ISO date or datetime")
+
+    if parsed is None:
+        if day is None:
+            raise InvalidFilter(f"{name} must be an ISO date or datetime")
+        if inclusive_day:
+            day += timedelta(days=1)
+        parsed = datetime.combine(day, time.min)
+
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+
+    return parsed
+
+
+def weekend_window(now=None):
+    """
+    Saturday 00:00 -> Monday 00:00 (local time) of the current week.
+    On a Sunday this is still the ongoing weekend.
+    """
+    now = timezone.localtime(now or timezone.now())
+    today = now.date()
+
+    # Monday=0 ... Saturday=5, Sunday=6
+    if today.weekday() == 6:
+        saturday = today - timedelta(days=1)
+    else:
+        saturday = today + timedelta(days=5 - today.weekday())
+
+    start = timezone.make_aware(datetime.combine(saturday, time.min))
+    return start, start + timedelta(days=2)
+
+
+def filter_events(queryset, params):
+    """
+    Server side filters for the public feed.
+
+    ?category=music,comedy   one or more categories
+    ?when=upcoming           events that have not ended yet
+    ?when=weekend            events running this weekend
+    ?from=...&to=...         explicit date window (ISO date or datetime)
+    ?location=juba           case-insensitive match on location
+    """
+    categories = params.get("category")
+    if categories:
+        wanted = [c.strip() for c in categories.split(",") if c.strip()]
+        valid = {key for key, _ in Event.CATEGORY_CHOICES}
+        unknown = [c for c in wanted if c not in valid]
+
+        if unknown:
+            raise InvalidFilter(f"Unknown category: {', '.join(unknown)}")
+
+        queryset = queryset.filter(category__in=wanted)
+
+    when = params.get("when")
+    if when == "upcoming":
+        queryset = queryset.filter(end_date__gte=timezone.now())
+    elif when == "weekend":
+        start, end = weekend_window()
+        queryset = queryset.filter(start_date__lt=end, end_date__gte=start)
+    elif when:
+        raise InvalidFilter("when must be upcoming or weekend")
+
+    date_from = params.get("from")
+    if date_from:
+        queryset = queryset.filter(end_date__gte=_parse_bound(date_from, "from"))
+
+    date_to = params.get("to")
+    if date_to:
+        queryset = queryset.filter(start_date__lt=_parse_bound(date_to, "to", inclusive_day=True))
+
+    location = params.get("location")
+    if location:
+        queryset = queryset.filter(location__icontains=location.strip())
+
+    return queryset
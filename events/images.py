@@ -0,0 +1,42 @@
+# Sized Cloudinary variants stored on Event at save time, so list
+# endpoints only read columns instead of building URLs per row.
+IMAGE_VARIANTS = {
+    "thumbnail": {"width": 200, "height": 200, "crop": "fill"},
+    "card": {"width": 640, "height": 360, "crop": "fill"},
+    "hero": {"width": 1280, "height": 720, "crop": "fill"},
+}
+
+# Event field -> variant name ("original" = untransformed upload)
+IMAGE_URL_FIELDS = {
+    "image_url": "original",
+    "image_thumbnail_url": "thumbnail",
+    "image_card_url": "card",
+    "image_hero_url": "hero",
+}
+
+
+def build_image_urls(image):
+    """
+    Returns {field_name: https url} for every IMAGE_URL_FIELDS entry.
+    Empty strings when there is no image or the URL can't be built.
+    """
+    urls = {field: "" for field in IMAGE_URL_FIELDS}
+
+    if not image or not hasattr(image, "build_url"):
+        return urls
+
+    try:
+        for field, variant in IMAGE_URL_FIELDS.items():
+            if variant == "original":
+                urls[field] = image.build_url(secure=True)
+            else:
+                urls[field] = image.build_url(
+                    secure=True,
+                    quality="auto",
+                    fetch_format="auto",
+                    **IMAGE_VARIANTS[variant]
+                )
+    except Exception:
+        return {field: "" for field in IMAGE_URL_FIELDS}
+
+    return urls
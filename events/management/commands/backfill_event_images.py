@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from events.images import IMAGE_URL_FIELDS, build_image_urls
+from events.models import Event
+
+
+class Command(BaseCommand):
+    help = "Store resolved Cloudinary image URLs (and sized variants) on existing events."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Rebuild every event, not only those with no stored URL.",
+        )
+
+    def handle(self, *args, **options):
+
+        events = Event.objects.exclude(image__isnull=True).exclude(image="")
+
+        if not options["all"]:
+            events = events.filter(image_url="")
+
+        updated = []
+
+        for event in events.iterator(chunk_size=500):
+            urls = build_image_urls(event.image)
+
+            for field, url in urls.items():
+                setattr(event, field, url)
+
+            updated.append(event)
+
+        Event.objects.bulk_update(updated, list(IMAGE_URL_FIELDS), batch_size=500)
+
+        self.stdout.write(self.style.SUCCESS(f"Stored image URLs for {len(updated)} events."))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from events.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text event search index from scratch."
+
+    def handle(self, *args, **kwargs):
+
+        count = rebuild_index()
+
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} events."))
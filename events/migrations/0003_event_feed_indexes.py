@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0002_alter_event_category'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['-start_date', '-id'], name='event_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['category', '-start_date'], name='event_category_feed_idx'),
+        ),
+    ]
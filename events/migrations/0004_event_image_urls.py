@@ -0,0 +1,33 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0003_event_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='image_card_url',
+            field=models.URLField(blank=True, default='', max_length=500),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='image_hero_url',
+            field=models.URLField(blank=True, default='', max_length=500),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='image_thumbnail_url',
+            field=models.URLField(blank=True, default='', max_length=500),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='image_url',
+            field=models.URLField(blank=True, default='', max_length=500),
+        ),
+    ]
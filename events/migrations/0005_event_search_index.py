@@ -0,0 +1,108 @@
+from django.db import migrations
+
+
+# The SQL is frozen here on purpose: this migration must keep working
+# from scratch whatever events.search looks like later.
+SEARCH_TABLE = "events_event_search"
+
+POSTGRES_CREATE = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} (
+        event_id bigint PRIMARY KEY
+            REFERENCES events_event (id) ON DELETE CASCADE,
+        document tsvector NOT NULL
+    )
+    """,
+    f"CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_gin ON {SEARCH_TABLE} USING gin (document)",
+]
+
+SQLITE_CREATE = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        title, location, organizer, description,
+        tokenize = 'porter unicode61'
+    )
+    """,
+]
+
+POSTGRES_INSERT = f"""
+    INSERT INTO {SEARCH_TABLE} (event_id, document)
+    VALUES (
+        %s,
+        setweight(to_tsvector('english', %s), 'A')
+        || setweight(to_tsvector('english', %s), 'B')
+        || setweight(to_tsvector('simple', %s), 'B')
+        || setweight(to_tsvector('english', %s), 'D')
+    )
+    ON CONFLICT (event_id) DO UPDATE SET document = EXCLUDED.document
+"""
+
+SQLITE_INSERT = f"""
+    INSERT INTO {SEARCH_TABLE} (rowid, title, location, organizer, description)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+
+    if vendor == "postgresql":
+        statements = POSTGRES_CREATE
+    elif vendor == "sqlite":
+        statements = SQLITE_CREATE
+    else:
+        return
+
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ("postgresql", "sqlite"):
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+def backfill_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+
+    if connection.vendor == "postgresql":
+        insert = POSTGRES_INSERT
+    elif connection.vendor == "sqlite":
+        insert = SQLITE_INSERT
+    else:
+        return
+
+    Event = apps.get_model("events", "Event")
+    rows = (
+        Event.objects
+        .values_list(
+            "id",
+            "title",
+            "location",
+            "organizer__full_name",
+            "organizer__email",
+            "description",
+        )
+        .iterator(chunk_size=500)
+    )
+
+    with connection.cursor() as cursor:
+        for event_id, title, location, full_name, email, description in rows:
+            organizer = f"{full_name or ''} {email}".strip()
+            cursor.execute(
+                insert,
+                [event_id, title or "", location or "", organizer, description or ""],
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0004_event_image_urls'),
+        ('accounts', '0004_marketingpush_pushlog_pushtoken'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(backfill_search_index, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,11 @@
+import uuid
+
 from django.db import models
 from django.conf import settings
 from cloudinary.models import CloudinaryField
 
+from .images import IMAGE_URL_FIELDS, build_image_urls
+
 class Event(models.Model):
     CATEGORY_CHOICES = [
         ("music", "Music"),
@@ -21,6 +25,12 @@ class Event(models.Model):
     end_date = models.DateTimeField()
     image = CloudinaryField("image", null=True, blank=True)
 
+    # Resolved at save time (see events.images)
+    image_url = models.URLField(max_length=500, blank=True, default="")
+    image_thumbnail_url = models.URLField(max_length=500, blank=True, default="")
+    image_card_url = models.URLField(max_length=500, blank=True, default="")
+    image_hero_url = models.URLField(max_length=500, blank=True, default="")
+
     payout_done = models.BooleanField(default=False)
 
     category = models.CharField(
@@ -35,5 +45,97 @@ class Event(models.Model):
         related_name="events",
     )
 
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # public feed keyset pagination
+            models.Index(fields=["-start_date", "-id"], name="event_feed_idx"),
+            models.Index(fields=["category", "-start_date"], name="event_category_feed_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+
+        super().save(*args, **kwargs)
+
+        if update_fields is not None and "image" not in update_fields:
+            return
+
+        # The image is only a CloudinaryResource after the upload in
+        # super().save(), so the URLs are written in a second statement,
+        # and only when they actually changed.
+        image = self._meta.get_field("image").to_python(self.image)
+        urls = build_image_urls(image)
+        changed = {
+            field: url for field, url in urls.items()
+            if getattr(self, field) != url
+        }
+
+        if changed:
+            for field, url in changed.items():
+                setattr(self, field, url)
+            Event.objects.filter(pk=self.pk).update(**changed)
+
+    def image_variants(self):
+        return {
+            variant: getattr(self, field) or None
+            for field, variant in IMAGE_URL_FIELDS.items()
+            if variant != "original"
+        }
+
+    def __str__(self):
+        return self.title
+
+
+class WaitingRoom(models.Model):
+    """
+    Admission queue for a high demand on-sale. While active, buyers
+    join the queue and may only call the purchase endpoints once their
+    position has been admitted (see events.waiting_room).
+    """
+    event = models.OneToOneField(
+        Event,
+        on_delete=models.CASCADE,
+        related_name="waiting_room",
+    )
+
+    is_active = models.BooleanField(default=True)
+
+    # admission starts here; the first batch goes in right away
+    opens_at = models.DateTimeField()
+    admit_per_minute = models.PositiveIntegerField(default=100)
+
+    # last position handed out
+    last_position = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Waiting room for {self.event}"
+
+
+class QueueEntry(models.Model):
+    room = models.ForeignKey(
+        WaitingRoom,
+        on_delete=models.CASCADE,
+        related_name="entries",
+    )
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="queue_entries",
+    )
+
+    token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    position = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["room", "user"], name="unique_queue_entry_per_user"),
+        ]
+
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return f"#{self.position} in {self.room}"
@@ -0,0 +1,219 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+
+# Separate index table, maintained by events.signals:
+#   postgresql -> tsvector column + GIN index
+#   sqlite     -> FTS5 virtual table (rowid = event id)
+# Any other backend falls back to icontains lookups.
+SEARCH_TABLE = "events_event_search"
+
+MAX_TERMS = 8
+
+POSTGRES_CREATE = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} (
+        event_id bigint PRIMARY KEY
+            REFERENCES events_event (id) ON DELETE CASCADE,
+        document tsvector NOT NULL
+    )
+    """,
+    f"CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_gin ON {SEARCH_TABLE} USING gin (document)",
+]
+
+SQLITE_CREATE = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        title, location, organizer, description,
+        tokenize = 'porter unicode61'
+    )
+    """,
+]
+
+
+def _vendor(conn=None):
+    return (conn or connection).vendor
+
+
+def create_index_table(schema_editor):
+    vendor = schema_editor.connection.vendor
+
+    if vendor == "postgresql":
+        statements = POSTGRES_CREATE
+    elif vendor == "sqlite":
+        statements = SQLITE_CREATE
+    else:
+        return
+
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def drop_index_table(schema_editor):
+    if schema_editor.connection.vendor in ("postgresql", "sqlite"):
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+def search_terms(query):
+    return re.findall(r"\w+", (query or "").lower())[:MAX_TERMS]
+
+
+def organizer_label(organizer):
+    return f"{organizer.full_name or ''} {organizer.email}".strip()
+
+
+# ==========================================
+# INDEX MAINTENANCE
+# ==========================================
+def write_document(cursor, vendor, event_id, title, location, organizer, description):
+    values = [title or "", location or "", organizer or "", description or ""]
+
+    if vendor == "postgresql":
+        cursor.execute(
+            f"""
+            INSERT INTO {SEARCH_TABLE} (event_id, document)
+            VALUES (
+                %s,
+                setweight(to_tsvector('english', %s), 'A')
+                || setweight(to_tsvector('english', %s), 'B')
+                || setweight(to_tsvector('simple', %s), 'B')
+                || setweight(to_tsvector('english', %s), 'D')
+            )
+            ON CONFLICT (event_id) DO UPDATE SET document = EXCLUDED.document
+            """,
+            [event_id, *values],
+        )
+
+    elif vendor == "sqlite":
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [event_id])
+        cursor.execute(
+            f"""
+            INSERT INTO {SEARCH_TABLE} (rowid, title, location, organizer, description)
+            VALUES (%s, %s, %s, %s, %s)
+            """,
+            [event_id, *values],
+        )
+
+
+def index_event(event):
+    with connection.cursor() as cursor:
+        write_document(
+            cursor,
+            _vendor(),
+            event.pk,
+            event.title,
+            event.location,
+            organizer_label(event.organizer),
+            event.description,
+        )
+
+
+def index_organizer_events(organizer):
+    """
+    Re-index an organizer's events (their name / email is part of every
+    document). Returns the number of events.
+    """
+    from .models import Event
+
+    count = 0
+    for event in Event.objects.filter(organizer=organizer).iterator(chunk_size=500):
+        event.organizer = organizer
+        index_event(event)
+        count += 1
+
+    return count
+
+
+def remove_event(event_id):
+    vendor = _vendor()
+
+    with connection.cursor() as cursor:
+        if vendor == "postgresql":
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE event_id = %s", [event_id])
+        elif vendor == "sqlite":
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [event_id])
+
+
+def rebuild_index():
+    from .models import Event
+
+    vendor = _vendor()
+
+    with connection.cursor() as cursor:
+        if vendor in ("postgresql", "sqlite"):
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+
+    count = 0
+    for event in Event.objects.select_related("organizer").iterator(chunk_size=500):
+        index_event(event)
+        count += 1
+
+    return count
+
+
+# ==========================================
+# QUERY
+# ==========================================
+def search_event_ids(query, limit, offset=0):
+    """
+    Ranked event ids for `query`, best match first. Every term must
+    match, as a prefix, so partially typed words still hit.
+    """
+    terms = search_terms(query)
+
+    if not terms:
+        return []
+
+    vendor = _vendor()
+
+    if vendor == "postgresql":
+        tsquery = " & ".join(f"{t}:*" for t in terms)
+        sql = f"""
+            SELECT event_id
+            FROM {SEARCH_TABLE}, to_tsquery('english', %s) query
+            WHERE document @@ query
+            ORDER BY ts_rank_cd(document, query) DESC, event_id DESC
+            LIMIT %s OFFSET %s
+        """
+        params = [tsquery, limit, offset]
+
+    elif vendor == "sqlite":
+        match = " ".join(f'"{t}"*' for t in terms)
+        # bm25: lower is better; weights follow the column order
+        sql = f"""
+            SELECT rowid
+            FROM {SEARCH_TABLE}
+            WHERE {SEARCH_TABLE} MATCH %s
+            ORDER BY bm25({SEARCH_TABLE}, 10.0, 4.0, 4.0, 1.0), rowid DESC
+            LIMIT %s OFFSET %s
+        """
+        params = [match, limit, offset]
+
+    else:
+        return _fallback_ids(terms, limit, offset)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _fallback_ids(terms, limit, offset):
+    from .models import Event
+
+    qs = Event.objects.all()
+
+    for term in terms:
+        qs = qs.filter(
+            Q(title__icontains=term)
+            | Q(description__icontains=term)
+            | Q(location__icontains=term)
+            | Q(organizer__full_name__icontains=term)
+            | Q(organizer__email__icontains=term)
+        )
+
+    return list(
+        qs.order_by("-start_date", "-id")
+        .values_list("id", flat=True)[offset:offset + limit]
+    )
@@ -14,9 +14,18 @@ def fix_cloudinary_url(field):
         return None
 
 
+def event_image_url(event):
+    # Stored at save time; rows saved before the columns existed fall
+    # back to building the URL (run backfill_event_images to fix them).
+    if event.image_url:
+        return event.image_url
+    return fix_cloudinary_url(event.image)
+
+
 class EventListSerializer(serializers.ModelSerializer):
     organizer_name = serializers.CharField(source="organizer.email", read_only=True)
     image = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Event
@@ -29,15 +38,49 @@ class EventListSerializer(serializers.ModelSerializer):
             "start_date",
             "end_date",
             "image",
+            "image_variants",
+            "organizer_name",
+        ]
+
+    def get_image(self, obj):
+        return event_image_url(obj)
+
+    def get_image_variants(self, obj):
+        return obj.image_variants()
+
+
+class EventFeedSerializer(serializers.ModelSerializer):
+    """
+    Compact feed row: same as EventListSerializer without description.
+    """
+    organizer_name = serializers.CharField(source="organizer.email", read_only=True)
+    image = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Event
+        fields = [
+            "id",
+            "title",
+            "location",
+            "category",
+            "start_date",
+            "end_date",
+            "image",
+            "image_variants",
             "organizer_name",
         ]
 
     def get_image(self, obj):
-        return fix_cloudinary_url(obj.image)
+        return event_image_url(obj)
+
+    def get_image_variants(self, obj):
+        return obj.image_variants()
 
 
 class OrganizerEventSerializer(serializers.ModelSerializer):
     image = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Event
@@ -50,10 +93,14 @@ class OrganizerEventSerializer(serializers.ModelSerializer):
             "start_date",
             "end_date",
             "image",
+            "image_variants",
         ]
 
     def get_image(self, obj):
-        return fix_cloudinary_url(obj.image)
+        return event_image_url(obj)
+
+    def get_image_variants(self, obj):
+        return obj.image_variants()
 
 
 class EventCreateSerializer(serializers.ModelSerializer):
@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .cache import EVENTS_NAMESPACE, invalidate_on_commit
+from .models import Event
+from .search import index_event, index_organizer_events, remove_event
+
+# user fields that end up in the search documents (organizer_label)
+INDEXED_USER_FIELDS = {"full_name", "email"}
+
+
+@receiver(post_save, sender=Event)
+def index_event_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    index_event(instance)
+    invalidate_on_commit(EVENTS_NAMESPACE)
+
+
+@receiver(post_delete, sender=Event)
+def remove_event_from_index(sender, instance, **kwargs):
+    remove_event(instance.pk)
+    invalidate_on_commit(EVENTS_NAMESPACE)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def reindex_organizer_events(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    # last_login and friends save with update_fields; skip those
+    if raw or created:
+        return
+    if update_fields is not None and not INDEXED_USER_FIELDS & set(update_fields):
+        return
+    index_organizer_events(instance)
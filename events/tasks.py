@@ -0,0 +1,48 @@
+from accounts.models import PushToken
+from utils.push import send_expo_push
+
+from .models import Event
+
+
+PUSH_FANOUT_CHUNK = 500
+
+
+def announce_new_event(event_id):
+    """
+    Push "new event" to every device except the organizer's.
+
+    Tokens are streamed from the DB in chunks so memory stays flat no
+    matter how many devices are registered.
+    """
+    event = Event.objects.filter(pk=event_id).only("id", "title", "organizer_id").first()
+
+    if not event:
+        return 0
+
+    title = "🎉 New Event"
+    body = f"{event.title} is now live. Get your tickets!"
+    data = {"event_id": event.id}
+
+    tokens = (
+        PushToken.objects
+        .exclude(user_id=event.organizer_id)
+        .order_by("id")
+        .values_list("token", flat=True)
+    )
+
+    sent = 0
+    chunk = []
+
+    for token in tokens.iterator(chunk_size=PUSH_FANOUT_CHUNK):
+        chunk.append(token)
+
+        if len(chunk) >= PUSH_FANOUT_CHUNK:
+            send_expo_push(chunk, title, body, data)
+            sent += len(chunk)
+            chunk = []
+
+    if chunk:
+        send_expo_push(chunk, title, body, data)
+        sent += len(chunk)
+
+    return sent
@@ -1,3 +1,387 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import PushToken
+from tickets.models import TicketType
+
+from .images import IMAGE_URL_FIELDS, build_image_urls
+from .models import Event, WaitingRoom
+from .search import search_event_ids
+from .tasks import announce_new_event
+from .waiting_room import join_queue, queue_status
+
+
+@override_settings(WAITING_ROOM_ADMISSION_MINUTES=20)
+class WaitingRoomWindowTests(TestCase):
+
+    def setUp(self):
+        User = get_user_model()
+        self.organizer = User.objects.create_user(email="org@example.com", password="pw")
+        self.users = [
+            User.objects.create_user(email=f"fan{i}@example.com", password="pw")
+            for i in range(3)
+        ]
+
+        start = timezone.now() + timedelta(days=7)
+        self.event = Event.objects.create(
+            title="Concert",
+            description="-",
+            location="Juba",
+            start_date=start,
+            end_date=start,
+            organizer=self.organizer,
+        )
+
+    def room(self, opened_minutes_ago, admit_per_minute=100):
+        return WaitingRoom.objects.create(
+            event=self.event,
+            opens_at=timezone.now() - timedelta(minutes=opened_minutes_ago),
+            admit_per_minute=admit_per_minute,
+        )
+
+    def test_late_joiner_to_a_short_queue_gets_a_full_window(self):
+        room = self.room(opened_minutes_ago=120)
+
+        entry = join_queue(room, self.users[0])
+        state = queue_status(entry, room)
+
+        self.assertTrue(state["admitted"])
+        self.assertFalse(state["expired"])
+
+        later = timezone.now() + timedelta(minutes=19)
+        self.assertTrue(queue_status(entry, room, now=later)["admitted"])
+
+    def test_window_expires_and_rejoining_starts_a_new_one(self):
+        room = self.room(opened_minutes_ago=120)
+        entry = join_queue(room, self.users[0])
+        token = entry.token
+
+        # pretend the user joined long ago and let the window run out
+        entry.created_at = timezone.now() - timedelta(minutes=30)
+        entry.save(update_fields=["created_at"])
+
+        state = queue_status(entry, room)
+        self.assertTrue(state["expired"])
+        self.assertFalse(state["admitted"])
+
+        entry = join_queue(room, self.users[0])
+        state = queue_status(entry, room)
+
+        self.assertNotEqual(entry.token, token)
+        self.assertTrue(state["admitted"])
+        self.assertFalse(state["expired"])
+
+    def test_queue_positions_wait_their_turn(self):
+        room = self.room(opened_minutes_ago=0, admit_per_minute=1)
+
+        entries = [join_queue(room, user) for user in self.users]
+        states = [queue_status(entry, room) for entry in entries]
+
+        self.assertTrue(states[0]["admitted"])
+        self.assertFalse(states[2]["admitted"])
+        self.assertGreater(states[2]["eta_seconds"], 0)
+
+        # the third fan's window starts at their turn, two minutes in
+        their_turn = room.opens_at + timedelta(minutes=2, seconds=1)
+        self.assertTrue(queue_status(entries[2], room, now=their_turn)["admitted"])
+        self.assertFalse(queue_status(entries[2], room, now=their_turn)["expired"])
+
+
+def make_event(organizer, days=7, **fields):
+    start = timezone.now() + timedelta(days=days)
+    defaults = {
+        "title": "Concert",
+        "description": "-",
+        "location": "Juba",
+        "start_date": start,
+        "end_date": start,
+    }
+    defaults.update(fields)
+    return Event.objects.create(organizer=organizer, **defaults)
+
+
+class CatalogueTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.organizer = get_user_model().objects.create_user(email="org@example.com", password="pw")
+        self.client = APIClient()
+
+
+class EventFeedTests(CatalogueTestCase):
+
+    def setUp(self):
+        super().setUp()
+        start = timezone.now() + timedelta(days=3)
+        # two events share a start date: the id breaks the tie
+        self.events = [
+            make_event(self.organizer, title=f"E{i}", start_date=start + timedelta(hours=min(i, 3)), category="music")
+            for i in range(5)
+        ]
+
+    def walk(self, **params):
+        ids, cursor = [], None
+        while True:
+            query = dict(params, limit=2)
+            if cursor:
+                query["cursor"] = cursor
+            response = self.client.get("/api/events/", query)
+            self.assertEqual(response.status_code, 200)
+            page = response.json()
+            ids += [row["id"] for row in page["results"]]
+            cursor = page["next_cursor"]
+            self.assertEqual(page["has_more"], cursor is not None)
+            if not cursor:
+                return ids
+
+    def test_cursor_round_trip(self):
+        expected = list(
+            Event.objects.order_by("-start_date", "-id").values_list("id", flat=True)
+        )
+
+        self.assertEqual(self.walk(), expected)
+        self.assertEqual(self.walk(order="asc"), expected[::-1])
+
+    def test_invalid_cursor(self):
+        for cursor in ("garbage", "WyJ4Il0"):  # not base64 json / wrong shape
+            response = self.client.get("/api/events/", {"cursor": cursor})
+            self.assertEqual(response.status_code, 400)
+
+    def test_filters(self):
+        make_event(self.organizer, title="Past", days=-3, category="comedy")
+
+        titles = [e["title"] for e in self.client.get("/api/events/", {"when": "upcoming"}).json()]
+        self.assertNotIn("Past", titles)
+
+        comedy = self.client.get("/api/events/", {"category": "comedy"}).json()
+        self.assertEqual([e["title"] for e in comedy], ["Past"])
+
+        self.assertEqual(self.client.get("/api/events/", {"category": "opera"}).status_code, 400)
+
+    def test_without_limit_or_cursor_the_feed_is_a_plain_list(self):
+        self.assertEqual(len(self.client.get("/api/events/").json()), 5)
+
+
+class FakeImage:
+
+    def build_url(self, **options):
+        size = f"{options['width']}x{options['height']}" if "width" in options else "full"
+        return f"https://img.example.com/{size}.jpg"
+
+
+class StoredImageUrlTests(CatalogueTestCase):
+
+    def test_build_image_urls(self):
+        urls = build_image_urls(FakeImage())
+
+        self.assertEqual(urls["image_url"], "https://img.example.com/full.jpg")
+        self.assertEqual(urls["image_card_url"], "https://img.example.com/640x360.jpg")
+        self.assertEqual(build_image_urls(None), {field: "" for field in IMAGE_URL_FIELDS})
+
+    def test_urls_are_stored_on_save_and_served_from_the_columns(self):
+        stored = build_image_urls(FakeImage())
+
+        with mock.patch("events.models.build_image_urls", return_value=stored):
+            event = make_event(self.organizer, image="v1/poster.jpg")
+
+        event.refresh_from_db()
+        self.assertEqual(event.image_hero_url, "https://img.example.com/1280x720.jpg")
+
+        # reading the feed never builds a URL
+        with mock.patch("events.serializers.fix_cloudinary_url") as build:
+            row = self.client.get("/api/events/").json()[0]
+
+        build.assert_not_called()
+        self.assertEqual(row["image"], "https://img.example.com/full.jpg")
+        self.assertEqual(row["image_variants"], {
+            "thumbnail": "https://img.example.com/200x200.jpg",
+            "card": "https://img.example.com/640x360.jpg",
+            "hero": "https://img.example.com/1280x720.jpg",
+        })
+
+    def test_saves_that_do_not_touch_the_image_keep_the_urls(self):
+        stored = build_image_urls(FakeImage())
+
+        with mock.patch("events.models.build_image_urls", return_value=stored):
+            event = make_event(self.organizer, image="v1/poster.jpg")
+
+        with mock.patch("events.models.build_image_urls") as build:
+            event.title = "Renamed"
+            event.save(update_fields=["title"])
+
+        build.assert_not_called()
+
+    def test_event_without_image(self):
+        make_event(self.organizer)
+
+        row = self.client.get("/api/events/").json()[0]
+
+        self.assertIsNone(row["image"])
+        self.assertEqual(row["image_variants"], {"thumbnail": None, "card": None, "hero": None})
+
+
+class AvailabilitySummaryTests(CatalogueTestCase):
+
+    def add_type(self, event, price, total, sold=0):
+        return TicketType.objects.create(
+            event=event, name=f"T{price}", price=price, quantity_total=total, quantity_sold=sold,
+        )
+
+    def feed(self):
+        response = self.client.get("/api/events/", {"availability": "1"})
+        self.assertEqual(response.status_code, 200)
+        return {row["title"]: row["availability"] for row in response.json()}
+
+    def test_summary_per_event(self):
+        open_event = make_event(self.organizer, title="Open")
+        self.add_type(open_event, 5, 10, sold=10)   # sold out: not the min price
+        self.add_type(open_event, 20, 10, sold=4)
+        sold_out = make_event(self.organizer, title="Sold out")
+        self.add_type(sold_out, 15, 3, sold=3)
+        make_event(self.organizer, title="No tickets")
+
+        feed = self.feed()
+
+        self.assertEqual(feed["Open"], {
+            "min_price": "20.00", "remaining": 6, "sold_out": False, "ticket_type_count": 2,
+        })
+        self.assertEqual(feed["Sold out"], {
+            "min_price": None, "remaining": 0, "sold_out": True, "ticket_type_count": 1,
+        })
+        self.assertEqual(feed["No tickets"], {
+            "min_price": None, "remaining": 0, "sold_out": False, "ticket_type_count": 0,
+        })
+
+    def test_query_count_does_not_grow_with_the_page(self):
+        event = make_event(self.organizer, title="First")
+        self.add_type(event, 10, 5)
+
+        cache.clear()
+        with CaptureQueriesContext(connection) as one:
+            self.feed()
+
+        for i in range(4):
+            self.add_type(make_event(self.organizer, title=f"More {i}"), 10, 5)
+
+        cache.clear()
+        with self.assertNumQueries(len(one.captured_queries)):
+            self.feed()
+
+    def test_without_the_flag_nothing_is_embedded(self):
+        make_event(self.organizer)
+        self.assertNotIn("availability", self.client.get("/api/events/").json()[0])
+
+
+class ConditionalGetTests(CatalogueTestCase):
+
+    def test_if_none_match_answers_304_until_something_changes(self):
+        event = make_event(self.organizer)
+
+        first = self.client.get("/api/events/")
+        self.assertEqual(first.status_code, 200)
+        self.assertNotIn("Last-Modified", first)
+
+        again = self.client.get("/api/events/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(again.status_code, 304)
+
+        # same second as the cached response: the ETag still changes
+        Event.objects.filter(pk=event.pk).update(
+            title="Moved",
+            updated_at=event.updated_at + timedelta(microseconds=1),
+        )
+        changed = self.client.get("/api/events/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(changed.status_code, 200)
+
+    def test_if_modified_since_alone_never_answers_304(self):
+        make_event(self.organizer)
+
+        response = self.client.get("/api/events/", HTTP_IF_MODIFIED_SINCE="Sun, 18 Oct 2099 00:00:00 GMT")
+        self.assertEqual(response.status_code, 200)
+
+
+class SearchTests(CatalogueTestCase):
+
+    def search(self, q):
+        response = self.client.get("/api/events/search/", {"q": q})
+        self.assertEqual(response.status_code, 200)
+        return [row["title"] for row in response.json()["results"]]
+
+    def test_title_matches_rank_first_and_prefixes_match(self):
+        make_event(self.organizer, title="Jazz brunch", description="Food and music")
+        make_event(self.organizer, title="Food market", description="Live jazz at noon")
+        make_event(self.organizer, title="Comedy night", description="Stand-up")
+
+        self.assertEqual(self.search("jazz"), ["Jazz brunch", "Food market"])
+        self.assertEqual(self.search("jaz"), ["Jazz brunch", "Food market"])
+        self.assertEqual(self.search("jazz noon"), ["Food market"])
+
+    def test_fallback_without_full_text_backend(self):
+        make_event(self.organizer, title="Jazz brunch", start_date=timezone.now() + timedelta(days=1))
+        make_event(self.organizer, title="Late jazz", start_date=timezone.now() + timedelta(days=9))
+
+        with mock.patch("events.search._vendor", return_value="mysql"):
+            self.assertEqual(search_event_ids("jazz", 10), list(
+                Event.objects.order_by("-start_date").values_list("id", flat=True)
+            ))
+            self.assertEqual(search_event_ids("brunch", 10), [Event.objects.get(title="Jazz brunch").pk])
+
+    def test_organizer_rename_is_reindexed(self):
+        make_event(self.organizer, title="Concert")
+        self.assertEqual(self.search("zandile"), [])
+
+        self.organizer.full_name = "Zandile Promotions"
+        self.organizer.save()
+
+        self.assertEqual(self.search("zandile"), ["Concert"])
+
+    def test_query_is_required(self):
+        self.assertEqual(self.client.get("/api/events/search/").status_code, 400)
+
+
+class AnnounceNewEventTests(CatalogueTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.event = make_event(self.organizer, title="Launch")
+        PushToken.objects.create(user=self.organizer, token="ExponentPushToken[organizer]")
+
+        User = get_user_model()
+        for i in range(5):
+            user = User.objects.create_user(email=f"fan{i}@example.com", password="pw")
+            PushToken.objects.create(user=user, token=f"ExponentPushToken[{i}]")
+
+    def announce(self):
+        with mock.patch("events.tasks.send_expo_push") as send:
+            sent = announce_new_event(self.event.pk)
+        return sent, [call.args[0] for call in send.call_args_list], send
+
+    def test_organizer_devices_are_skipped(self):
+        sent, chunks, send = self.announce()
+
+        self.assertEqual(sent, 5)
+        self.assertEqual(chunks, [[f"ExponentPushToken[{i}]" for i in range(5)]])
+        self.assertEqual(send.call_args.args[1:], (
+            "🎉 New Event", "Launch is now live. Get your tickets!", {"event_id": self.event.pk},
+        ))
+
+    def test_tokens_go_out_in_chunks(self):
+        with mock.patch("events.tasks.PUSH_FANOUT_CHUNK", 2):
+            sent, chunks, _ = self.announce()
+
+        self.assertEqual(sent, 5)
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+        self.assertEqual(sum(chunks, []), [f"ExponentPushToken[{i}]" for i in range(5)])
+
+    def test_missing_event(self):
+        self.event.delete()
+        sent, chunks, _ = self.announce()
+
+        self.assertEqual((sent, chunks), (0, []))
@@ -1,6 +1,9 @@
 from django.urls import path
 from .views import (
     EventListAPIView,
+    EventSearchAPIView,
+    EventQueueJoinAPIView,
+    EventQueueStatusAPIView,
     OrganizerEventListAPIView,
     OrganizerCreateEventAPIView,
     OrganizerEventDetailAPIView,
@@ -8,6 +11,9 @@ from .views import (
 
 urlpatterns = [
     path("", EventListAPIView.as_view(), name="events-list"),
+    path("search/", EventSearchAPIView.as_view(), name="events-search"),
+    path("queue/<uuid:token>/", EventQueueStatusAPIView.as_view(), name="events-queue-status"),
+    path("<int:event_id>/queue/", EventQueueJoinAPIView.as_view(), name="events-queue-join"),
 
     # 👇 THIS is what you want
     path("organizer/", OrganizerEventListAPIView.as_view(), name="organizer-events"),
@@ -4,38 +4,232 @@ from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework import status
 
-from accounts.models import PushToken
-from utils.push import send_expo_push
-
+from django.conf import settings
 from django.shortcuts import get_object_or_404
 from django.db import transaction
+from django.db.models import Count, Max
+from django.utils.decorators import method_decorator
+
+from tickets.availability import availability_summaries, ticket_types_version
+from tickets.models import TicketType
+from utils.background import run_in_background
+from utils.conditional import catalogue_condition
+from utils.pagination import (
+    InvalidCursor,
+    KeysetPaginator,
+    page_payload,
+    wants_pagination,
+)
 
+from .cache import EVENTS_NAMESPACE, get_cached_response, set_cached_response
+from .filters import InvalidFilter, filter_events
 from .models import Event
+from .search import search_event_ids
+from .tasks import announce_new_event
+from .waiting_room import active_room, find_entry, join_queue, queue_status
 from .serializers import (
     EventListSerializer,
+    EventFeedSerializer,
     OrganizerEventSerializer,
     EventCreateSerializer,
 )
 
-# 🔔 PUSH IMPORTS
-from accounts.models import PushToken
-from utils.push import send_expo_push
-
 
 # ==========================================
 # PUBLIC EVENTS LIST (GET)
 # ==========================================
+# ?limit=20&cursor=...  keyset pages on (start_date, id)
+# ?compact=1            leave out description
+# ?order=asc            soonest first (default: latest first)
+# ?availability=1       embed min price / remaining / sold out per event
+# filters: see events.filters.filter_events
+def _wants_availability(params):
+    return params.get("availability") in ("1", "true")
+
+
+def _event_list_version(request):
+    try:
+        events = filter_events(Event.objects.all(), request.GET)
+    except InvalidFilter:
+        return None, 0
+
+    version = events.aggregate(last=Max("updated_at"), count=Count("id"))
+    last, count = version["last"], version["count"]
+
+    if _wants_availability(request.GET):
+        types_last, types_count = ticket_types_version(
+            TicketType.objects.filter(event__in=events)
+        )
+        if types_last and (last is None or types_last > last):
+            last = types_last
+        count = f"{count}:{types_count}"
+
+    return last, count
+
+
+def _embed_availability(rows):
+    summaries = availability_summaries([row["id"] for row in rows])
+    for row in rows:
+        row["availability"] = summaries[row["id"]]
+
+
 class EventListAPIView(APIView):
     permission_classes = [AllowAny]
 
+    @method_decorator(catalogue_condition(_event_list_version))
     def get(self, request):
-        events = Event.objects.all().order_by("-start_date")
-        serializer = EventListSerializer(
-            events,
+        params = request.query_params
+
+        cached = get_cached_response(EVENTS_NAMESPACE, request)
+        if cached is not None:
+            return Response(cached, status=status.HTTP_200_OK)
+
+        try:
+            events = filter_events(
+                Event.objects.select_related("organizer"),
+                params
+            )
+        except InvalidFilter as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer_class = (
+            EventFeedSerializer
+            if params.get("compact") in ("1", "true")
+            else EventListSerializer
+        )
+
+        descending = params.get("order", "desc") != "asc"
+        with_availability = _wants_availability(params)
+        timeout = settings.CATALOGUE_AVAILABILITY_TTL if with_availability else None
+
+        if not wants_pagination(params):
+            ordering = "-start_date" if descending else "start_date"
+            serializer = serializer_class(
+                events.order_by(ordering),
+                many=True,
+                context={"request": request}
+            )
+            data = serializer.data
+            if with_availability:
+                _embed_availability(data)
+
+            set_cached_response(EVENTS_NAMESPACE, request, data, timeout)
+            return Response(data, status=status.HTTP_200_OK)
+
+        paginator = KeysetPaginator("start_date", descending=descending)
+
+        try:
+            page, next_cursor = paginator.paginate(events, params)
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = serializer_class(
+            page,
             many=True,
             context={"request": request}
         )
-        return Response(serializer.data, status=status.HTTP_200_OK)
+
+        if with_availability:
+            _embed_availability(serializer.data)
+
+        data = page_payload(serializer.data, next_cursor)
+        set_cached_response(EVENTS_NAMESPACE, request, data, timeout)
+
+        return Response(data, status=status.HTTP_200_OK)
+
+
+# ==========================================
+# EVENT SEARCH (GET)
+# ==========================================
+# ?q=afro night&limit=20&offset=0
+class EventSearchAPIView(APIView):
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        query = request.query_params.get("q", "").strip()
+
+        if not query:
+            return Response(
+                {"error": "q parameter is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            limit = max(1, min(int(request.query_params.get("limit", 20)), 50))
+            offset = max(0, int(request.query_params.get("offset", 0)))
+        except ValueError:
+            return Response(
+                {"error": "limit and offset must be numbers"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # one extra id tells us whether there is another page
+        ids = search_event_ids(query, limit + 1, offset)
+        has_more = len(ids) > limit
+        ids = ids[:limit]
+
+        events = Event.objects.select_related("organizer").in_bulk(ids)
+
+        serializer = EventFeedSerializer(
+            [events[i] for i in ids if i in events],
+            many=True,
+            context={"request": request}
+        )
+
+        return Response({
+            "results": serializer.data,
+            "next_offset": offset + limit if has_more else None,
+            "has_more": has_more,
+        }, status=status.HTTP_200_OK)
+
+
+# ==========================================
+# WAITING ROOM
+# ==========================================
+# POST /api/events/<event_id>/queue/   join (or re-read) your place
+# GET  /api/events/queue/<token>/      poll position / ETA
+# Purchase endpoints need the token in the X-Queue-Token header once
+# it is admitted.
+class EventQueueJoinAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, event_id):
+        event = get_object_or_404(Event, pk=event_id)
+        room = active_room(event.id)
+
+        if room is None:
+            return Response(
+                {"queue_required": False, "admitted": True, "event_id": event.id},
+                status=status.HTTP_200_OK
+            )
+
+        entry = join_queue(room, request.user)
+
+        return Response(
+            {"queue_required": True, **queue_status(entry, room)},
+            status=status.HTTP_200_OK
+        )
+
+
+class EventQueueStatusAPIView(APIView):
+    permission_classes = [AllowAny]
+
+    def get(self, request, token):
+        entry = find_entry(token)
+
+        if entry is None:
+            return Response(
+                {"error": "Queue token not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        state = queue_status(entry, entry.room)
+
+        return Response(
+            {"queue_required": entry.room.is_active, **state},
+            status=status.HTTP_200_OK,
+            headers={"Retry-After": str(state["poll_after"])},
+        )
 
 
 # ==========================================
@@ -82,18 +276,10 @@ class OrganizerCreateEventAPIView(APIView):
             # ==========================================
             # 🔔 PUSH NOTIFICATION FOR NEW EVENT
             # ==========================================
-            tokens = list(
-                PushToken.objects
-                .exclude(user=request.user)
-                .values_list("token", flat=True)
-                )
-
-            if tokens:
-                send_expo_push(
-                    tokens,
-                    "🎉 New Event",
-                    f"{event.title} is now live. Get your tickets!"
-                )
+            # fanned out in the background once the event is committed
+            transaction.on_commit(
+                lambda: run_in_background(announce_new_event, event.id)
+            )
 
             return Response(
                 OrganizerEventSerializer(
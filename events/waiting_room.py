@@ -0,0 +1,177 @@
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import QueueEntry, WaitingRoom
+
+
+# Waiting room for high demand on-sales.
+#
+# Arrivals get the next position in the room. Admission is a pure
+# function of time: `admit_per_minute` positions go in every minute from
+# opens_at (the first batch immediately), so polling needs no writes and
+# no coordination between web workers - one indexed lookup of the token.
+QUEUE_TOKEN_HEADER = "X-Queue-Token"
+
+MIN_POLL_SECONDS = 2
+MAX_POLL_SECONDS = 30
+
+
+def admitted_positions(room, now=None):
+    now = now or timezone.now()
+
+    if now < room.opens_at:
+        return 0
+
+    minutes = (now - room.opens_at).total_seconds() / 60
+    return int((minutes + 1) * room.admit_per_minute)
+
+
+def admitted_at(room, position):
+    minutes = max(position / max(room.admit_per_minute, 1) - 1, 0)
+    return room.opens_at + timedelta(minutes=minutes)
+
+
+def queue_status(entry, room, now=None):
+    now = now or timezone.now()
+
+    # the window opens at the user's turn, but never before they joined:
+    # late arrivals to a short queue get a full window too
+    admitted_from = max(admitted_at(room, entry.position), entry.created_at)
+    admitted_until = admitted_from + timedelta(minutes=settings.WAITING_ROOM_ADMISSION_MINUTES)
+
+    is_admitted = entry.position <= admitted_positions(room, now)
+    expired = is_admitted and now >= admitted_until
+
+    eta = max((admitted_from - now).total_seconds(), 0)
+
+    return {
+        "token": str(entry.token),
+        "event_id": room.event_id,
+        "position": entry.position,
+        "ahead": max(entry.position - admitted_positions(room, now), 0),
+        "admitted": is_admitted and not expired,
+        "expired": expired,
+        "eta_seconds": int(eta),
+        "admitted_until": admitted_until if is_admitted else None,
+        "poll_after": int(min(max(eta / 2, MIN_POLL_SECONDS), MAX_POLL_SECONDS)),
+    }
+
+
+def active_room(event_id):
+    return (
+        WaitingRoom.objects
+        .filter(event_id=event_id, is_active=True)
+        .first()
+    )
+
+
+def _next_position(room):
+    # one short UPDATE on the room row per arrival
+    WaitingRoom.objects.filter(pk=room.pk).update(last_position=F("last_position") + 1)
+    return WaitingRoom.objects.values_list("last_position", flat=True).get(pk=room.pk)
+
+
+def join_queue(room, user):
+    """
+    Queue entry for `user`, created on first join. Joining again keeps
+    the same place, unless the admission window has passed, in which
+    case the user goes to the back of the queue with a new token.
+    """
+    entry = QueueEntry.objects.filter(room=room, user=user).first()
+
+    if entry is not None:
+        if not queue_status(entry, room)["expired"]:
+            return entry
+
+        with transaction.atomic():
+            entry.position = _next_position(room)
+            entry.token = uuid.uuid4()
+            entry.created_at = timezone.now()
+            entry.save(update_fields=["position", "token", "created_at"])
+        return entry
+
+    try:
+        with transaction.atomic():
+            return QueueEntry.objects.create(
+                room=room,
+                user=user,
+                position=_next_position(room),
+            )
+    except IntegrityError:
+        # the same user joined twice at once
+        return QueueEntry.objects.get(room=room, user=user)
+
+
+def find_entry(token):
+    try:
+        token = uuid.UUID(str(token))
+    except ValueError:
+        return None
+
+    return (
+        QueueEntry.objects
+        .select_related("room")
+        .filter(token=token)
+        .first()
+    )
+
+
+def _request_token(request):
+    return (
+        request.headers.get(QUEUE_TOKEN_HEADER)
+        or request.data.get("queue_token")
+        or request.query_params.get("queue_token")
+    )
+
+
+def check_admission(request, event_id):
+    """
+    None if the user may buy tickets for `event_id` right now, otherwise
+    the error Response to return. Events without an active waiting room
+    cost one query and always pass.
+    """
+    room = active_room(event_id)
+
+    if room is None:
+        return None
+
+    token = _request_token(request)
+    entry = find_entry(token) if token else None
+
+    if entry is None or entry.room_id != room.id or entry.user_id != request.user.id:
+        return Response(
+            {
+                "error": "This sale uses a waiting room. Join the queue first.",
+                "queue_required": True,
+                "event_id": event_id,
+            },
+            status=status.HTTP_403_FORBIDDEN,
+        )
+
+    state = queue_status(entry, room)
+
+    if state["expired"]:
+        return Response(
+            {
+                "error": "Your turn has expired. Join the queue again.",
+                "queue_required": True,
+                **state,
+            },
+            status=status.HTTP_403_FORBIDDEN,
+        )
+
+    if not state["admitted"]:
+        return Response(
+            {"error": "Still waiting in the queue", "queue_required": True, **state},
+            status=status.HTTP_429_TOO_MANY_REQUESTS,
+            headers={"Retry-After": str(state["poll_after"])},
+        )
+
+    return None
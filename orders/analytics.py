@@ -0,0 +1,149 @@
+from datetime import timedelta
+
+from django.db.models import Q, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import DailyEventSales
+from .rollups import METRICS
+
+
+# Organizer analytics over the daily sales rollups.
+#
+# One grouped query per level: the time series carries every metric per
+# bucket (totals are its sum, no separate aggregate), and one more query
+# ranks events. Cost depends on the number of days and events in the
+# range, not on the number of orders.
+RANGE_PRESETS = {
+    "7d": timedelta(days=7),
+    "30d": timedelta(days=30),
+    "12m": timedelta(days=365),
+}
+
+GRANULARITIES = {
+    "day": TruncDay,
+    "week": TruncWeek,
+    "month": TruncMonth,
+}
+
+LABEL_FORMATS = {
+    "day": "%Y-%m-%d",
+    "week": "%Y-%m-%d",
+    "month": "%b %Y",
+}
+
+TOP_EVENTS = 5
+
+
+class InvalidPeriod(ValueError):
+    pass
+
+
+def parse_period(params):
+    """
+    (start, end, granularity) from ?range=, ?from=, ?to=, ?granularity=.
+    Dates are inclusive local dates; start is None for "all time".
+    """
+    granularity = params.get("granularity", "month")
+    if granularity not in GRANULARITIES:
+        raise InvalidPeriod("granularity must be day, week or month")
+
+    today = timezone.localdate()
+    start, end = None, today
+
+    # unknown presets mean "all", as they always did
+    preset = params.get("range", "all")
+    if preset in RANGE_PRESETS:
+        start = today - RANGE_PRESETS[preset]
+
+    for name in ("from", "to"):
+        value = params.get(name)
+        if not value:
+            continue
+
+        try:
+            parsed = parse_date(value) if isinstance(value, str) else None
+        except ValueError:
+            parsed = None
+
+        if parsed is None:
+            raise InvalidPeriod(f"{name} must be a date (YYYY-MM-DD)")
+
+        if name == "from":
+            start = parsed
+        else:
+            end = parsed
+
+    if start and start > end:
+        raise InvalidPeriod("from must not be after to")
+
+    return start, end, granularity
+
+
+def _days(organizer, start, end):
+    days = DailyEventSales.objects.filter(organizer=organizer, day__lte=end)
+    if start:
+        days = days.filter(day__gte=start)
+    return days
+
+
+def _metrics(row):
+    return {name: row[name] or 0 for name in METRICS}
+
+
+def _series(days, granularity):
+    label = LABEL_FORMATS[granularity]
+
+    buckets = (
+        days
+        .annotate(bucket=GRANULARITIES[granularity]("day"))
+        .values("bucket")
+        .annotate(**{name: Sum(name) for name in METRICS})
+        .filter(Q(orders__gt=0) | Q(refunded_orders__gt=0))
+        .order_by("bucket")
+    )
+
+    return [
+        {
+            "period": row["bucket"].strftime(label),
+            "start": row["bucket"],
+            **_metrics(row),
+        }
+        for row in buckets
+    ]
+
+
+def sales_report(organizer, start, end, granularity):
+    """
+    {"totals": {...}, "series": [...], "months": [...], "top_events": [...]},
+    two queries (three when granularity is not month). "months" is the
+    monthly series whatever the granularity, for the legacy keys.
+    """
+    days = _days(organizer, start, end)
+
+    series = _series(days, granularity)
+    months = series if granularity == "month" else _series(days, "month")
+
+    totals = {name: 0 for name in METRICS}
+    for bucket in series:
+        for name in METRICS:
+            totals[name] += bucket[name]
+
+    top_events = (
+        days
+        .values("event_id", "event__title")
+        .annotate(**{name: Sum(name) for name in METRICS})
+        .filter(orders__gt=0)
+        .order_by("-revenue", "event_id")[:TOP_EVENTS]
+    )
+
+    return {
+        "totals": totals,
+        "series": series,
+        "months": months,
+        "top_events": [
+            {"event_id": row["event_id"], "event": row["event__title"], **_metrics(row)}
+            for row in top_events
+        ],
+    }
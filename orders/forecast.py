@@ -0,0 +1,162 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from events.models import Event
+
+from .models import DailyEventSales, RevenueForecast
+
+
+# Revenue forecasts for every organizer and every event still on sale,
+# fitted together.
+#
+# Each series is the daily paid revenue of the last HISTORY_DAYS days
+# (from the daily sales rollups). All series share one design matrix X -
+# intercept, linear trend and a weekly cycle - and are fitted by least
+# squares in one batched solve:
+#
+#   B[s] = (X' W[s] X)^-1 X' W[s] Y[s]
+#
+# W masks out the days before a series' first sale, so a new event is
+# not fitted as "zero for months, then a sudden rise".
+# The next HORIZON_DAYS are extrapolated from B; the band is the
+# residual spread of each series scaled to the horizon (~95%).
+HISTORY_DAYS = 182
+HORIZON_DAYS = 30
+MIN_SALES_DAYS = 7
+Z = 1.96
+
+
+def design_matrix(t):
+    week = 2 * np.pi * t / 7
+    return np.column_stack([np.ones_like(t), t, np.sin(week), np.cos(week)])
+
+
+def load_series(today):
+    """
+    (keys, Y): keys are (organizer_id, event_id or None) per series,
+    Y is a (series x days) array of daily revenue ending yesterday.
+    """
+    first_day = today - timedelta(days=HISTORY_DAYS)
+
+    rows = (
+        DailyEventSales.objects
+        .filter(day__gte=first_day, day__lt=today, orders__gt=0)
+        .values_list("organizer_id", "event_id", "day", "revenue")
+        .iterator(chunk_size=5000)
+    )
+
+    organizer_ids, event_ids, days, revenue = [], [], [], []
+    for organizer_id, event_id, day, amount in rows:
+        organizer_ids.append(organizer_id)
+        event_ids.append(event_id)
+        days.append((day - first_day).days)
+        revenue.append(float(amount))
+
+    selling = set(
+        Event.objects
+        .filter(id__in=set(event_ids), end_date__gte=timezone.now())
+        .values_list("id", flat=True)
+    )
+
+    keys = sorted({(o, None) for o in organizer_ids}, key=lambda k: k[0])
+    keys += sorted({(o, e) for o, e in zip(organizer_ids, event_ids) if e in selling})
+    position = {key: i for i, key in enumerate(keys)}
+
+    days = np.asarray(days, dtype=np.intp)
+    revenue = np.asarray(revenue, dtype=float)
+
+    Y = np.zeros((len(keys), HISTORY_DAYS))
+
+    # organizer totals: every row adds to its organizer's series
+    organizer_rows = np.asarray([position[(o, None)] for o in organizer_ids], dtype=np.intp)
+    np.add.at(Y, (organizer_rows, days), revenue)
+
+    # events still on sale get their own series
+    mask = np.asarray([e in selling for e in event_ids], dtype=bool)
+    if mask.any():
+        event_rows = np.asarray(
+            [position[(o, e)] for o, e, m in zip(organizer_ids, event_ids, mask) if m],
+            dtype=np.intp,
+        )
+        np.add.at(Y, (event_rows, days[mask]), revenue[mask])
+
+    return keys, Y
+
+
+def active_days(Y):
+    """
+    (series x days) weights: 1 from each series' first sale on.
+    """
+    return (np.cumsum(Y > 0, axis=1) > 0).astype(float)
+
+
+def fit(Y, W=None, horizon=HORIZON_DAYS):
+    """
+    Vectorised fit of every row of Y (optionally weighted by W). Returns
+    (predicted, lower, upper, daily_trend) arrays, one value per series.
+    """
+    days = Y.shape[1]
+    W = np.ones_like(Y) if W is None else W
+    X = design_matrix(np.arange(days, dtype=float))
+
+    # per series normal equations, solved as one stack
+    G = np.einsum("sd,dk,dl->skl", W, X, X)
+    rhs = np.einsum("sd,dk->sk", W * Y, X)
+    B = np.einsum("skl,sl->sk", np.linalg.pinv(G), rhs)
+
+    residuals = (Y - B @ X.T) * W
+    observed = W.sum(axis=1)
+    sigma = np.sqrt((residuals ** 2).sum(axis=1) / np.maximum(observed - X.shape[1], 1))
+
+    future = design_matrix(np.arange(days, days + horizon, dtype=float))
+    predicted = np.clip(B @ future.T, 0, None).sum(axis=1)
+
+    band = Z * sigma * np.sqrt(horizon)
+    lower = np.clip(predicted - band, 0, None)
+    upper = predicted + band
+
+    return predicted, lower, upper, B[:, 1]
+
+
+def _money(value):
+    return Decimal(f"{value:.2f}")
+
+
+def run_forecasts(today=None):
+    """
+    Refit and replace every stored forecast. Returns the number stored.
+    """
+    today = today or timezone.localdate()
+    keys, Y = load_series(today)
+
+    forecasts = []
+
+    if keys:
+        predicted, lower, upper, trend = fit(Y, active_days(Y))
+        sales_days = (Y > 0).sum(axis=1)
+
+        for i, (organizer_id, event_id) in enumerate(keys):
+            if sales_days[i] < MIN_SALES_DAYS:
+                continue
+
+            forecasts.append(RevenueForecast(
+                organizer_id=organizer_id,
+                event_id=event_id,
+                starts_on=today,
+                horizon_days=HORIZON_DAYS,
+                predicted=_money(predicted[i]),
+                lower=_money(lower[i]),
+                upper=_money(upper[i]),
+                daily_trend=_money(trend[i]),
+                history_days=int(sales_days[i]),
+            ))
+
+    with transaction.atomic():
+        RevenueForecast.objects.all().delete()
+        RevenueForecast.objects.bulk_create(forecasts, batch_size=1000)
+
+    return len(forecasts)
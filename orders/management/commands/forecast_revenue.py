@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from orders.forecast import HORIZON_DAYS, run_forecasts
+
+
+class Command(BaseCommand):
+    help = f"Refit revenue forecasts (next {HORIZON_DAYS} days) for all organizers and events on sale. Run daily."
+
+    def handle(self, *args, **kwargs):
+
+        stored = run_forecasts()
+
+        self.stdout.write(self.style.SUCCESS(f"Stored {stored} revenue forecasts."))
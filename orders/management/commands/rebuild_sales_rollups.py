@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from orders.rollups import rebuild_sales_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute the organizer / event / daily sales rollups from the orders (backfill / repair)."
+
+    def handle(self, *args, **kwargs):
+
+        rows = rebuild_sales_rollups()
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt sales rollups ({rows} event-days)."))
@@ -0,0 +1,36 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0007_waiting_room'),
+        ('orders', '0005_sales_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevenueForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('starts_on', models.DateField()),
+                ('horizon_days', models.PositiveSmallIntegerField()),
+                ('predicted', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('lower', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('upper', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('daily_trend', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('history_days', models.PositiveSmallIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('event', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='revenue_forecasts', to='events.event')),
+                ('organizer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revenue_forecasts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('organizer', 'event'), name='unique_revenue_forecast'), models.UniqueConstraint(condition=models.Q(('event__isnull', True)), fields=('organizer',), name='unique_organizer_revenue_forecast')],
+            },
+        ),
+    ]
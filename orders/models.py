@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 
 
@@ -47,5 +47,149 @@ class Order(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # organizer lists keyset pagination (newest first)
+            models.Index(fields=["-created_at", "-id"], name="order_recent_idx"),
+            models.Index(fields=["status", "-created_at", "-id"], name="order_status_recent_idx"),
+            models.Index(fields=["ticket_type", "-created_at", "-id"], name="order_type_recent_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        # the sales rollup signals lock and read the stored row first
+        # (orders.signals); keep that lock until the rollups are updated
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"Order #{self.id}"
+
+
+# =====================================
+# SALES ROLLUPS
+# =====================================
+# Running totals of paid (and refunded) orders, kept up to date by
+# orders.rollups on every Order status change so dashboards read one
+# row instead of aggregating the organizer's whole order history.
+
+class SalesTotals(models.Model):
+    orders = models.PositiveIntegerField(default=0)
+    tickets = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    commission = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    organizer_earnings = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    refunded_orders = models.PositiveIntegerField(default=0)
+    refunded_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        abstract = True
+
+
+class OrganizerSales(SalesTotals):
+    organizer = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="sales_rollup"
+    )
+
+    def __str__(self):
+        return f"Sales of {self.organizer_id}"
+
+
+class EventSales(SalesTotals):
+    event = models.OneToOneField(
+        "events.Event",
+        on_delete=models.CASCADE,
+        related_name="sales_rollup"
+    )
+
+    organizer = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="event_sales_rollups"
+    )
+
+    def __str__(self):
+        return f"Sales of event {self.event_id}"
+
+
+class DailyEventSales(SalesTotals):
+    event = models.ForeignKey(
+        "events.Event",
+        on_delete=models.CASCADE,
+        related_name="daily_sales_rollups"
+    )
+
+    organizer = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="daily_sales_rollups"
+    )
+
+    # local (TIME_ZONE) date the order was placed
+    day = models.DateField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["event", "day"],
+                name="unique_daily_event_sales",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["organizer", "day"]),
+        ]
+
+    def __str__(self):
+        return f"Sales of event {self.event_id} on {self.day}"
+
+
+class RevenueForecast(models.Model):
+    """
+    Revenue expected over the next `horizon_days`, written by the
+    forecast_revenue job (orders.forecast). One row per organizer plus
+    one per event that is still selling.
+    """
+    organizer = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="revenue_forecasts"
+    )
+
+    event = models.ForeignKey(
+        "events.Event",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="revenue_forecasts"
+    )
+
+    starts_on = models.DateField()
+    horizon_days = models.PositiveSmallIntegerField()
+
+    predicted = models.DecimalField(max_digits=14, decimal_places=2)
+    lower = models.DecimalField(max_digits=14, decimal_places=2)
+    upper = models.DecimalField(max_digits=14, decimal_places=2)
+
+    # fitted revenue change per day, for "trending up / down"
+    daily_trend = models.DecimalField(max_digits=14, decimal_places=2)
+    history_days = models.PositiveSmallIntegerField()
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["organizer", "event"],
+                name="unique_revenue_forecast",
+            ),
+            models.UniqueConstraint(
+                fields=["organizer"],
+                condition=models.Q(event__isnull=True),
+                name="unique_organizer_revenue_forecast",
+            ),
+        ]
+
     def __str__(self):
-        return f"Order #{self.id}"
\ No newline at end of file
+        return f"Forecast {self.organizer_id}/{self.event_id or 'all'}: {self.predicted}"
@@ -0,0 +1,221 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from tickets.models import TicketType
+
+from .models import DailyEventSales, EventSales, Order, OrganizerSales
+
+
+# Sales rollups: every Order save compares the order's contribution
+# before and after (see orders.signals) and adds the difference to the
+# organizer, event and event-day rows, in the same transaction.
+# Only "paid" orders count as sales, like the dashboards always did;
+# "refunded" ones are tracked separately.
+METRICS = (
+    "orders",
+    "tickets",
+    "revenue",
+    "commission",
+    "organizer_earnings",
+    "refunded_orders",
+    "refunded_amount",
+)
+
+SNAPSHOT_FIELDS = (
+    "status",
+    "quantity",
+    "total_amount",
+    "commission_amount",
+    "organizer_amount",
+    "ticket_type_id",
+    "created_at",
+)
+
+ZERO = Decimal("0")
+
+
+def snapshot(order):
+    """
+    The fields rollups depend on, or None if some are not loaded.
+    """
+    values = order.__dict__
+    if any(field not in values for field in SNAPSHOT_FIELDS):
+        return None
+    return tuple(values[field] for field in SNAPSHOT_FIELDS)
+
+
+def _contribution(state):
+    """
+    {(ticket_type_id, day): {metric: amount}} for one order state.
+    """
+    if state is None:
+        return {}
+
+    status, quantity, total, commission, organizer_amount, ticket_type_id, created_at = state
+
+    if status == "paid":
+        metrics = {
+            "orders": 1,
+            "tickets": quantity,
+            "revenue": total,
+            "commission": commission,
+            "organizer_earnings": organizer_amount,
+        }
+    elif status == "refunded":
+        metrics = {
+            "refunded_orders": 1,
+            "refunded_amount": total,
+        }
+    else:
+        return {}
+
+    day = timezone.localdate(created_at or timezone.now())
+    return {(ticket_type_id, day): metrics}
+
+
+def _bump(model, lookup, deltas, defaults=None):
+    rows = model.objects.filter(**lookup)
+
+    if rows.update(**{name: F(name) + amount for name, amount in deltas.items()}):
+        return
+
+    # nothing to add: the row is gone (its event or organizer is being
+    # deleted) or the order predates the rollups (rebuild_sales_rollups
+    # fixes that). Never re-create a row for a parent being deleted.
+    if all(amount <= 0 for amount in deltas.values()):
+        return
+
+    initial = {name: max(amount, 0) for name, amount in deltas.items()}
+
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **(defaults or {}), **initial)
+    except IntegrityError:
+        rows.update(**{name: F(name) + amount for name, amount in deltas.items()})
+
+
+def apply_change(old_state, new_state):
+    """
+    Move the rollups from an order's old state to its new one. No-op
+    (and no queries) when the change does not affect sales.
+    """
+    changes = defaultdict(lambda: defaultdict(int))
+
+    for key, metrics in _contribution(old_state).items():
+        for name, amount in metrics.items():
+            changes[key][name] -= amount
+
+    for key, metrics in _contribution(new_state).items():
+        for name, amount in metrics.items():
+            changes[key][name] += amount
+
+    changes = {
+        key: {name: amount for name, amount in metrics.items() if amount}
+        for key, metrics in changes.items()
+    }
+    changes = {key: metrics for key, metrics in changes.items() if metrics}
+
+    if not changes:
+        return
+
+    owners = dict(
+        (pk, (event_id, organizer_id))
+        for pk, event_id, organizer_id in (
+            TicketType.objects
+            .filter(pk__in={ticket_type_id for ticket_type_id, _ in changes})
+            .values_list("id", "event_id", "event__organizer_id")
+        )
+    )
+
+    with transaction.atomic():
+        for (ticket_type_id, day), deltas in sorted(changes.items(), key=lambda c: (c[0][0], c[0][1])):
+            if ticket_type_id not in owners:
+                continue
+
+            event_id, organizer_id = owners[ticket_type_id]
+
+            _bump(OrganizerSales, {"organizer_id": organizer_id}, deltas)
+            _bump(EventSales, {"event_id": event_id}, deltas, {"organizer_id": organizer_id})
+            _bump(
+                DailyEventSales,
+                {"event_id": event_id, "day": day},
+                deltas,
+                {"organizer_id": organizer_id},
+            )
+
+
+def organizer_totals(organizer):
+    """
+    {metric: value} for an organizer, zeros when nothing was sold yet.
+    """
+    row = (
+        OrganizerSales.objects
+        .filter(organizer=organizer)
+        .values(*METRICS)
+        .first()
+    )
+    return row or {name: 0 for name in METRICS}
+
+
+# ==========================================
+# REBUILD
+# ==========================================
+def _sum(field, status):
+    return Coalesce(Sum(field, filter=Q(status=status)), Value(ZERO))
+
+
+def rebuild_sales_rollups():
+    """
+    Recompute every rollup row from the orders, with one grouped query.
+    Returns the number of event-day rows written.
+    """
+    rows = (
+        Order.objects
+        .filter(status__in=("paid", "refunded"))
+        .annotate(day=TruncDate("created_at"))
+        .values("ticket_type__event_id", "ticket_type__event__organizer_id", "day")
+        .annotate(
+            orders=Count("id", filter=Q(status="paid")),
+            tickets=Coalesce(Sum("quantity", filter=Q(status="paid")), Value(0)),
+            revenue=_sum("total_amount", "paid"),
+            commission=_sum("commission_amount", "paid"),
+            organizer_earnings=_sum("organizer_amount", "paid"),
+            refunded_orders=Count("id", filter=Q(status="refunded")),
+            refunded_amount=_sum("total_amount", "refunded"),
+        )
+        .order_by()
+    )
+
+    daily = []
+    events = {}
+    organizers = {}
+
+    for row in rows:
+        event_id = row["ticket_type__event_id"]
+        organizer_id = row["ticket_type__event__organizer_id"]
+        metrics = {name: row[name] for name in METRICS}
+
+        daily.append(DailyEventSales(event_id=event_id, organizer_id=organizer_id, day=row["day"], **metrics))
+
+        event = events.setdefault(event_id, EventSales(event_id=event_id, organizer_id=organizer_id))
+        organizer = organizers.setdefault(organizer_id, OrganizerSales(organizer_id=organizer_id))
+
+        for name, amount in metrics.items():
+            setattr(event, name, getattr(event, name) + amount)
+            setattr(organizer, name, getattr(organizer, name) + amount)
+
+    with transaction.atomic():
+        DailyEventSales.objects.all().delete()
+        EventSales.objects.all().delete()
+        OrganizerSales.objects.all().delete()
+
+        DailyEventSales.objects.bulk_create(daily, batch_size=1000)
+        EventSales.objects.bulk_create(events.values(), batch_size=1000)
+        OrganizerSales.objects.bulk_create(organizers.values(), batch_size=1000)
+
+    return len(daily)
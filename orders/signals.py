@@ -0,0 +1,53 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from events.models import Event
+from tickets.models import TicketType
+
+from .models import Order
+from .rollups import apply_change, snapshot
+
+
+# Saving an order moves the sales rollups by the difference between the
+# stored row (read under a row lock, see Order.save) and the new state,
+# so two requests saving the same order cannot count it twice.
+
+def _locked_state(pk):
+    stored = Order.objects.select_for_update().filter(pk=pk).first()
+    return snapshot(stored) if stored else None
+
+
+def _cascaded(origin):
+    # deleting an event or ticket type drops its rollup rows anyway
+    model = getattr(origin, "model", type(origin))
+    return model in (Event, TicketType)
+
+
+@receiver(pre_save, sender=Order)
+def load_order_state(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding or instance.pk is None:
+        instance._rollup_state = None
+        return
+
+    instance._rollup_state = _locked_state(instance.pk)
+
+
+@receiver(post_save, sender=Order)
+def update_sales_rollups(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+
+    old_state = None if created else instance._rollup_state
+    new_state = snapshot(instance) or _locked_state(instance.pk)
+
+    apply_change(old_state, new_state)
+
+
+@receiver(pre_delete, sender=Order)
+def load_deleted_order_state(sender, instance, origin=None, **kwargs):
+    instance._rollup_state = None if _cascaded(origin) else snapshot(instance)
+
+
+@receiver(post_delete, sender=Order)
+def remove_from_sales_rollups(sender, instance, **kwargs):
+    apply_change(getattr(instance, "_rollup_state", None), None)
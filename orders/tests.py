@@ -1,3 +1,426 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import numpy as np
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from events.models import Event
+from tickets.models import TicketType
+
+from .forecast import HISTORY_DAYS, HORIZON_DAYS, Z, active_days, design_matrix, fit, run_forecasts
+from .models import DailyEventSales, EventSales, Order, OrganizerSales, RevenueForecast
+from .rollups import rebuild_sales_rollups
+
+
+class SalesRollupTests(TestCase):
+
+    def setUp(self):
+        User = get_user_model()
+        self.organizer = User.objects.create_user(email="org@example.com", password="pw")
+        self.buyer = User.objects.create_user(email="buyer@example.com", password="pw")
+
+        start = timezone.now() + timedelta(days=7)
+        self.event = Event.objects.create(
+            title="Concert",
+            description="-",
+            location="Juba",
+            start_date=start,
+            end_date=start,
+            organizer=self.organizer,
+        )
+        self.ticket_type = TicketType.objects.create(
+            event=self.event,
+            name="VIP",
+            price=10,
+            quantity_total=100,
+        )
+
+    def order(self, quantity=1, status="pending"):
+        total = Decimal(10 * quantity)
+        return Order.objects.create(
+            user=self.buyer,
+            ticket_type=self.ticket_type,
+            quantity=quantity,
+            total_amount=total,
+            commission_amount=total / 10,
+            organizer_amount=total - total / 10,
+            status=status,
+        )
+
+    def totals(self):
+        return OrganizerSales.objects.filter(organizer=self.organizer).values(
+            "orders", "tickets", "revenue", "refunded_orders", "refunded_amount"
+        ).first()
+
+    def test_paid_and_refunded_transitions(self):
+        order = self.order(quantity=2)
+        self.assertIsNone(self.totals())
+
+        order.status = "paid"
+        order.save(update_fields=["status"])
+        order.save()  # saving again changes nothing
+
+        self.assertEqual(self.totals()["orders"], 1)
+        self.assertEqual(self.totals()["tickets"], 2)
+        self.assertEqual(self.totals()["revenue"], Decimal("20"))
+
+        order.status = "refunded"
+        order.save(update_fields=["status"])
+
+        totals = self.totals()
+        self.assertEqual(totals["orders"], 0)
+        self.assertEqual(totals["revenue"], Decimal("0"))
+        self.assertEqual(totals["refunded_orders"], 1)
+        self.assertEqual(totals["refunded_amount"], Decimal("20"))
+
+    def test_two_stale_copies_count_once(self):
+        self.order(status="paid")
+        pending = self.order()
+
+        first = Order.objects.get(pk=pending.pk)
+        second = Order.objects.get(pk=pending.pk)
+
+        first.status = "paid"
+        first.save(update_fields=["status"])
+        second.status = "paid"
+        second.save(update_fields=["status"])
+
+        self.assertEqual(self.totals()["orders"], 2)
+        self.assertEqual(EventSales.objects.get(event=self.event).orders, 2)
+
+    def test_deleting_an_order_removes_it(self):
+        self.order(status="paid")
+        doomed = self.order(status="paid")
+
+        doomed.delete()
+
+        self.assertEqual(self.totals()["orders"], 1)
+
+    def test_deleting_event_with_paid_orders(self):
+        self.order(status="paid")
+        self.order(status="paid")
+
+        self.event.delete()
+
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(EventSales.objects.exists())
+        self.assertFalse(DailyEventSales.objects.exists())
+
+    def test_deleting_buyer_and_organizer(self):
+        self.order(status="paid")
+
+        self.buyer.delete()
+        self.assertEqual(self.totals()["orders"], 0)
+
+        self.organizer.delete()
+        self.assertFalse(OrganizerSales.objects.exists())
+        self.assertFalse(EventSales.objects.exists())
+
+    def test_rebuild_matches_incremental(self):
+        self.order(quantity=3, status="paid")
+        refunded = self.order(status="paid")
+        refunded.status = "refunded"
+        refunded.save()
+
+        before = self.totals()
+        rebuild_sales_rollups()
+
+        self.assertEqual(self.totals(), before)
+
+
+class OrderExportTests(TestCase):
+
+    def setUp(self):
+        User = get_user_model()
+        self.organizer = User.objects.create_user(email="org@example.com", password="pw")
+        buyer = User.objects.create_user(email="buyer@example.com", password="pw")
+
+        start = timezone.now() + timedelta(days=7)
+        self.event = Event.objects.create(
+            title="=HYPERLINK(\"http://example.com\")",
+            description="-",
+            location="Juba",
+            start_date=start,
+            end_date=start,
+            organizer=self.organizer,
+        )
+        ticket_type = TicketType.objects.create(
+            event=self.event,
+            name="-VIP",
+            price=10,
+            quantity_total=100,
+        )
+        Order.objects.create(
+            user=buyer,
+            ticket_type=ticket_type,
+            quantity=1,
+            total_amount=Decimal("10"),
+            commission_amount=Decimal("1"),
+            organizer_amount=Decimal("9"),
+        )
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.organizer)
+
+    def export(self, **params):
+        return self.client.get("/api/orders/organizer/export/", params)
+
+    def test_event_must_be_a_number(self):
+        response = self.export(event="abc")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "event must be a number"})
+
+    def test_event_filter(self):
+        body = b"".join(self.export(event=self.event.pk, columns="id").streaming_content)
+        self.assertEqual(len(body.decode().splitlines()), 2)
+
+        body = b"".join(self.export(event=self.event.pk + 1, columns="id").streaming_content)
+        self.assertEqual(len(body.decode().splitlines()), 1)
+
+    def test_formula_cells_are_escaped(self):
+        response = self.export(columns="event_title,ticket_type_name,quantity")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+
+        self.assertEqual(lines[1], '"\'=HYPERLINK(""http://example.com"")",\'-VIP,1')
+
+
+class AnalyticsLegacyKeysTests(TestCase):
+
+    def setUp(self):
+        User = get_user_model()
+        self.organizer = User.objects.create_user(email="org@example.com", password="pw")
+
+        start = timezone.now() + timedelta(days=7)
+        event = Event.objects.create(
+            title="Concert",
+            description="-",
+            location="Juba",
+            start_date=start,
+            end_date=start,
+            organizer=self.organizer,
+        )
+
+        today = timezone.localdate()
+        self.sale_days = [today, today - timedelta(days=1)]
+        for day in self.sale_days:
+            DailyEventSales.objects.create(
+                event=event, organizer=self.organizer, day=day,
+                orders=1, tickets=1, revenue=10,
+            )
+
+        # a month with refunds only
+        DailyEventSales.objects.create(
+            event=event, organizer=self.organizer, day=today - timedelta(days=70),
+            refunded_orders=1, refunded_amount=10,
+        )
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.organizer)
+
+    def test_legacy_keys_are_paid_months_whatever_the_granularity(self):
+        response = self.client.get("/api/orders/organizer/advanced-analytics/", {"granularity": "day"})
+        data = response.json()
+
+        self.assertEqual(len(data["series"]), 3)
+
+        months = [m.strftime("%b %Y") for m in sorted({d.replace(day=1) for d in self.sale_days})]
+        self.assertEqual([m["month"] for m in data["monthly_revenue"]], months)
+        self.assertEqual(sum(m["total"] for m in data["monthly_revenue"]), 20.0)
+        self.assertEqual(sum(m["orders"] for m in data["orders_timeline"]), 2)
+
+
+class OrganizerOrderPagesTests(TestCase):
+
+    def setUp(self):
+        User = get_user_model()
+        self.organizer = User.objects.create_user(email="org@example.com", password="pw")
+        self.buyer = User.objects.create_user(email="buyer@example.com", password="pw")
+        other = User.objects.create_user(email="other@example.com", password="pw")
+
+        self.ticket_type = self.ticket_type_of(self.organizer)
+        other_type = self.ticket_type_of(other)
+
+        # two orders share a timestamp: the id breaks the tie
+        now = timezone.now()
+        self.orders = []
+        for minutes, status in [(0, "paid"), (5, "refund_requested"), (5, "paid"),
+                                (9, "refund_requested"), (12, "paid")]:
+            order = self.order(self.ticket_type, status)
+            Order.objects.filter(pk=order.pk).update(created_at=now - timedelta(minutes=minutes))
+            self.orders.append(order)
+
+        self.order(other_type, "refund_requested")
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.organizer)
+
+    def ticket_type_of(self, organizer):
+        start = timezone.now() + timedelta(days=7)
+        event = Event.objects.create(
+            title="Concert",
+            description="-",
+            location="Juba",
+            start_date=start,
+            end_date=start,
+            organizer=organizer,
+        )
+        return TicketType.objects.create(event=event, name="VIP", price=10, quantity_total=100)
+
+    def order(self, ticket_type, status):
+        return Order.objects.create(
+            user=self.buyer,
+            ticket_type=ticket_type,
+            quantity=1,
+            total_amount=Decimal("10"),
+            commission_amount=Decimal("1"),
+            organizer_amount=Decimal("9"),
+            status=status,
+        )
+
+    def walk(self, url, limit=2):
+        ids = []
+        params = {"limit": limit}
+
+        while True:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            page = response.json()
+            self.assertLessEqual(len(page["results"]), limit)
+            ids += [row["id"] for row in page["results"]]
+
+            if not page["has_more"]:
+                self.assertIsNone(page["next_cursor"])
+                return ids
+            params = {"limit": limit, "cursor": page["next_cursor"]}
+
+    def test_orders_walk_matches_the_plain_list(self):
+        plain = self.client.get("/api/orders/organizer/").json()
+        expected = [o.pk for o in [self.orders[0], self.orders[2], self.orders[1],
+                                   self.orders[3], self.orders[4]]]
+
+        self.assertEqual([row["id"] for row in plain], expected)
+        self.assertEqual(self.walk("/api/orders/organizer/"), expected)
+        self.assertEqual(self.walk("/api/orders/organizer/", limit=1), expected)
+
+    def test_refund_requests_walk(self):
+        expected = [self.orders[1].pk, self.orders[3].pk]
+
+        self.assertEqual(self.walk("/api/orders/organizer/refunds/", limit=1), expected)
+
+    def test_invalid_cursor(self):
+        for cursor in ("garbage", "WyJ4Il0"):
+            response = self.client.get("/api/orders/organizer/", {"cursor": cursor})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("error", response.json())
+
+        response = self.client.get("/api/orders/organizer/refunds/", {"cursor": "garbage"})
+        self.assertEqual(response.status_code, 400)
+
+
+class ForecastTests(TestCase):
+
+    def test_fit_recovers_trend_and_weekly_cycle(self):
+        t = np.arange(HISTORY_DAYS, dtype=float)
+        coefficients = np.array([
+            [100.0, 2.0, 15.0, -5.0],
+            [40.0, -0.1, 0.0, 8.0],
+        ])
+        Y = coefficients @ design_matrix(t).T
+
+        predicted, lower, upper, trend = fit(Y)
+
+        future = design_matrix(np.arange(HISTORY_DAYS, HISTORY_DAYS + HORIZON_DAYS, dtype=float))
+        expected = np.clip(coefficients @ future.T, 0, None).sum(axis=1)
+
+        np.testing.assert_allclose(predicted, expected, rtol=1e-6)
+        np.testing.assert_allclose(trend, [2.0, -0.1], atol=1e-6)
+        # a perfect fit leaves no band
+        np.testing.assert_allclose(upper - lower, 0, atol=1e-4)
+
+    def test_noise_widens_the_band_around_the_truth(self):
+        rng = np.random.default_rng(7)
+        t = np.arange(HISTORY_DAYS, dtype=float)
+        Y = 50 + 0.5 * t + rng.normal(0, 5, size=(20, HISTORY_DAYS))
+
+        predicted, lower, upper, trend = fit(Y)
+
+        truth = (50 + 0.5 * np.arange(HISTORY_DAYS, HISTORY_DAYS + HORIZON_DAYS)).sum()
+        np.testing.assert_allclose(trend, 0.5, atol=0.05)
+        # band: ~95% of the noise summed over the horizon
+        np.testing.assert_allclose(upper - lower, 2 * Z * 5 * np.sqrt(HORIZON_DAYS), rtol=0.2)
+        self.assertGreaterEqual(((lower < truth) & (truth < upper)).sum(), 18)
+
+    def test_days_before_the_first_sale_are_ignored(self):
+        t = np.arange(HISTORY_DAYS, dtype=float)
+        Y = np.where(t >= 150, 3 * t - 400, 0.0)[np.newaxis, :]
+
+        _, _, _, weighted = fit(Y, active_days(Y))
+        _, _, _, unweighted = fit(Y)
+
+        np.testing.assert_allclose(weighted, [3.0], atol=1e-6)
+        self.assertGreater(abs(unweighted[0] - 3.0), 0.5)
+
+    def test_run_forecasts_from_daily_rollups(self):
+        User = get_user_model()
+        organizer = User.objects.create_user(email="org@example.com", password="pw")
+        newcomer = User.objects.create_user(email="new@example.com", password="pw")
+
+        now = timezone.now()
+        on_sale = self.event(organizer, now + timedelta(days=7))
+        finished = self.event(organizer, now - timedelta(days=1))
+        brand_new = self.event(newcomer, now + timedelta(days=7))
+
+        today = timezone.localdate()
+        first_day = today - timedelta(days=HISTORY_DAYS)
+
+        # the last 30 days: revenue = 2t - 250 on day t of the history
+        for t in range(HISTORY_DAYS - 30, HISTORY_DAYS):
+            self.sale(on_sale, first_day + timedelta(days=t), 2 * t - 250)
+
+        # an older event: adds to the organizer, gets no series of its own
+        self.sale(finished, first_day + timedelta(days=10), 500)
+
+        # too few sales days to forecast
+        for t in range(HISTORY_DAYS - 3, HISTORY_DAYS):
+            self.sale(brand_new, first_day + timedelta(days=t), 20)
+
+        self.assertEqual(run_forecasts(today), 2)
+
+        future = range(HISTORY_DAYS, HISTORY_DAYS + HORIZON_DAYS)
+        expected = Decimal(sum(2 * t - 250 for t in future))
+
+        event_forecast = RevenueForecast.objects.get(event=on_sale)
+        self.assertEqual(event_forecast.organizer, organizer)
+        self.assertEqual(event_forecast.starts_on, today)
+        self.assertEqual(event_forecast.predicted, expected)
+        self.assertEqual(event_forecast.daily_trend, Decimal("2.00"))
+        self.assertEqual(event_forecast.history_days, 30)
+
+        total = RevenueForecast.objects.get(organizer=organizer, event__isnull=True)
+        self.assertEqual(total.history_days, 31)
+
+        self.assertFalse(RevenueForecast.objects.filter(organizer=newcomer).exists())
+
+        # a rerun replaces the stored forecasts
+        self.assertEqual(run_forecasts(today), 2)
+        self.assertEqual(RevenueForecast.objects.count(), 2)
+
+    def event(self, organizer, end):
+        return Event.objects.create(
+            title="Concert",
+            description="-",
+            location="Juba",
+            start_date=end,
+            end_date=end,
+            organizer=organizer,
+        )
 
-# Create your tests here.
+    def sale(self, event, day, revenue):
+        DailyEventSales.objects.create(
+            event=event, organizer=event.organizer, day=day,
+            orders=1, tickets=1, revenue=revenue,
+        )
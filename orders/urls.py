@@ -4,6 +4,7 @@ from .views import (
     my_orders,
     request_refund,
     organizer_orders,
+    export_organizer_orders,
     organizer_refund_requests,
     organizer_approve_refund,
     organizer_dashboard_stats,
@@ -24,6 +25,7 @@ urlpatterns = [
     path("organizer/refunds/", organizer_refund_requests),
     path("organizer/refunds/<int:order_id>/approve/", organizer_approve_refund),
     path("organizer/orders/", organizer_orders),
+    path("organizer/export/", export_organizer_orders),
     path("organizer/dashboard/", organizer_dashboard_stats),
     path("organizer/advanced-analytics/", organizer_advanced_analytics),
     path("upcoming/", UpcomingEventsView.as_view()),
@@ -1,10 +1,8 @@
 from decimal import Decimal
-from datetime import timedelta
+from operator import attrgetter
 
 from django.utils import timezone
 from django.db import transaction
-from django.db.models import Sum, Count
-from django.db.models.functions import TruncMonth
 
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
@@ -14,11 +12,23 @@ from django.conf import settings
 from rest_framework import status
 from .tasks import send_event_reminders
 
-from .models import Order
+from .analytics import InvalidPeriod, parse_period, sales_report
+from .models import Order, RevenueForecast
+from .rollups import organizer_totals
+from tickets.checkin_stats import remove_check_ins
 from tickets.models import TicketType, Ticket
+from tickets.inventory import (
+    hold_tickets,
+    release_expired_holds,
+    release_tickets,
+    remaining_tickets,
+)
 from payments.models import Payment
 from events.models import Event
+from events.waiting_room import check_admission
 from rest_framework.views import APIView
+from utils.pagination import InvalidCursor, KeysetPaginator, page_payload, wants_pagination
+from utils.export import InvalidExport, filter_export, parse_export, stream_export
 
 
 # =====================================
@@ -34,6 +44,8 @@ def create_order(request):
 
     try:
         quantity = int(quantity)
+        if quantity < 1:
+            raise ValueError
     except Exception:
         return Response({"error": "Invalid quantity"}, status=400)
 
@@ -45,32 +57,46 @@ def create_order(request):
     except TicketType.DoesNotExist:
         return Response({"error": "Ticket type not found"}, status=404)
 
-    available = ticket.quantity_total - ticket.quantity_sold
-
-    if quantity > available:
-        return Response(
-            {"error": f"Only {available} tickets remaining"},
-            status=400
-        )
+    # 🚦 High demand sales only let admitted queue tokens through
+    denied = check_admission(request, ticket.event_id)
+    if denied:
+        return denied
 
     total = ticket.price * Decimal(quantity)
     commission = total * Decimal("0.10")
     organizer_amount = total - commission
 
-    order = Order.objects.create(
-        user=request.user,
-        ticket_type=ticket,
-        quantity=quantity,
-        total_amount=total,
-        commission_amount=commission,
-        organizer_amount=organizer_amount,
-        status="pending"
-    )
+    # 🔒 Hold the seats now so checkout fails here, not at payment
+    with transaction.atomic():
+        order = Order.objects.create(
+            user=request.user,
+            ticket_type=ticket,
+            quantity=quantity,
+            total_amount=total,
+            commission_amount=commission,
+            organizer_amount=organizer_amount,
+            status="pending"
+        )
+
+        hold = hold_tickets(order)
+
+        if hold is None and release_expired_holds(ticket_type_id=ticket.id):
+            # stale holds were blocking stock; try once more
+            hold = hold_tickets(order)
+
+        if hold is None:
+            available = remaining_tickets(ticket.id)
+            transaction.set_rollback(True)
+            return Response(
+                {"error": f"Only {available} tickets remaining"},
+                status=400
+            )
 
     return Response({
         "id": order.id,
         "total_amount": float(order.total_amount),
-        "status": order.status
+        "status": order.status,
+        "hold_expires_at": hold.expires_at,
     }, status=201)
 
 
@@ -158,9 +184,17 @@ def organizer_orders(request):
         Order.objects
         .select_related("ticket_type__event", "user")
         .filter(ticket_type__event__organizer=request.user)
-        .order_by("-created_at")
+        .order_by("-created_at", "-id")
     )
 
+    # 📄 ?limit= / ?cursor= switch to keyset pages
+    paginate = wants_pagination(request.GET)
+    if paginate:
+        try:
+            orders, next_cursor = KeysetPaginator("created_at").paginate(orders, request.GET)
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=400)
+
     data = [{
         "id": o.id,
         "status": o.status,
@@ -174,39 +208,74 @@ def organizer_orders(request):
         "created_at": o.created_at,
     } for o in orders]
 
+    if paginate:
+        return Response(page_payload(data, next_cursor))
+
     return Response(data)
 
 
 # =====================================
-# ORGANIZER DASHBOARD STATS (BASIC)
+# ORGANIZER ORDERS EXPORT (STREAMED)
 # =====================================
+# GET /api/orders/organizer/export/?fmt=csv&columns=id,status&gzip=1
+#     &from=2026-01-01&to=2026-01-31&event=1
+
+ORDER_EXPORT_COLUMNS = {
+    "id": attrgetter("id"),
+    "status": attrgetter("status"),
+    "quantity": attrgetter("quantity"),
+    "total_amount": lambda o: float(o.total_amount),
+    "commission_amount": lambda o: float(o.commission_amount),
+    "organizer_amount": lambda o: float(o.organizer_amount),
+    "customer_email": attrgetter("user.email"),
+    "ticket_type_name": attrgetter("ticket_type.name"),
+    "event_id": attrgetter("ticket_type.event_id"),
+    "event_title": attrgetter("ticket_type.event.title"),
+    "payment_method": attrgetter("payment_method"),
+    "created_at": attrgetter("created_at"),
+}
+
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
-def organizer_dashboard_stats(request):
+def export_organizer_orders(request):
+
+    try:
+        options = parse_export(request.GET, ORDER_EXPORT_COLUMNS)
+    except InvalidExport as e:
+        return Response({"error": str(e)}, status=400)
 
-    paid_orders = Order.objects.filter(
-        ticket_type__event__organizer=request.user,
-        status="paid"
+    orders = (
+        Order.objects
+        .select_related("ticket_type__event", "user")
+        .filter(ticket_type__event__organizer=request.user)
+        .order_by("-created_at", "-id")
     )
 
+    orders = filter_export(orders, options, "created_at", "ticket_type__event_id")
+
+    return stream_export(orders, ORDER_EXPORT_COLUMNS, options, "orders")
+
+
+# =====================================
+# ORGANIZER DASHBOARD STATS (BASIC)
+# =====================================
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def organizer_dashboard_stats(request):
+
     total_events = Event.objects.filter(
         organizer=request.user
     ).count()
 
-    total_orders = paid_orders.count()
-
-    total_revenue = paid_orders.aggregate(
-        total=Sum("total_amount")
-    )["total"] or Decimal("0")
-
-    total_commission = paid_orders.aggregate(
-        total=Sum("commission_amount")
-    )["total"] or Decimal("0")
+    # 📊 Running totals (orders.rollups), not an aggregate over every order
+    totals = organizer_totals(request.user)
 
-    total_organizer_earnings = paid_orders.aggregate(
-        total=Sum("organizer_amount")
-    )["total"] or Decimal("0")
+    total_orders = totals["orders"]
+    total_revenue = totals["revenue"]
+    total_commission = totals["commission"]
+    total_organizer_earnings = totals["organizer_earnings"]
 
     return Response({
         "total_events": total_events,
@@ -231,9 +300,16 @@ def organizer_refund_requests(request):
             ticket_type__event__organizer=request.user,
             status="refund_requested"
         )
-        .order_by("-created_at")
+        .order_by("-created_at", "-id")
     )
 
+    paginate = wants_pagination(request.GET)
+    if paginate:
+        try:
+            orders, next_cursor = KeysetPaginator("created_at").paginate(orders, request.GET)
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=400)
+
     data = [{
         "id": o.id,
         "quantity": o.quantity,
@@ -244,6 +320,9 @@ def organizer_refund_requests(request):
         "created_at": o.created_at,
     } for o in orders]
 
+    if paginate:
+        return Response(page_payload(data, next_cursor))
+
     return Response(data)
 
 
@@ -285,16 +364,18 @@ def organizer_approve_refund(request, order_id):
             payment.save(update_fields=["status"])
 
         # restore stock
-        order.ticket_type.quantity_sold = max(
-            order.ticket_type.quantity_sold - order.quantity, 0
+        release_tickets(order.ticket_type_id, order.quantity)
+
+        # delete tickets (a sliced queryset cannot be deleted directly)
+        ticket_ids = list(
+            Ticket.objects.filter(
+                user=order.user,
+                ticket_type=order.ticket_type
+            ).order_by("-created_at").values_list("id", flat=True)[:order.quantity]
         )
-        order.ticket_type.save(update_fields=["quantity_sold"])
-
-        # delete tickets
-        Ticket.objects.filter(
-            user=order.user,
-            ticket_type=order.ticket_type
-        ).order_by("-created_at")[:order.quantity].delete()
+        tickets = Ticket.objects.filter(pk__in=ticket_ids)
+        remove_check_ins(order.ticket_type.event_id, tickets)
+        tickets.delete()
 
         order.status = "refunded"
         order.save(update_fields=["status"])
@@ -316,108 +397,93 @@ def organizer_approve_refund(request, order_id):
 @permission_classes([IsAuthenticated])
 def organizer_advanced_analytics(request):
 
-    filter_type = request.GET.get("range", "all")
-
-    paid_orders = Order.objects.filter(
-        ticket_type__event__organizer=request.user,
-        status="paid"
-    )
-
-    # 🔹 DATE FILTER
-    if filter_type == "7d":
-        paid_orders = paid_orders.filter(
-            created_at__gte=timezone.now() - timedelta(days=7)
-        )
-
-    elif filter_type == "30d":
-        paid_orders = paid_orders.filter(
-            created_at__gte=timezone.now() - timedelta(days=30)
-        )
-
-    elif filter_type == "12m":
-        paid_orders = paid_orders.filter(
-            created_at__gte=timezone.now() - timedelta(days=365)
-        )
-
-    # 🔹 TOTALS
-    total_revenue = paid_orders.aggregate(
-        total=Sum("total_amount")
-    )["total"] or Decimal("0")
-
-    total_orders = paid_orders.count()
-
-    total_commission = paid_orders.aggregate(
-        total=Sum("commission_amount")
-    )["total"] or Decimal("0")
+    try:
+        start, end, granularity = parse_period(request.GET)
+    except InvalidPeriod as e:
+        return Response({"error": str(e)}, status=400)
 
-    total_organizer_earnings = paid_orders.aggregate(
-        total=Sum("organizer_amount")
-    )["total"] or Decimal("0")
+    # 🔹 ONE GROUPED QUERY PER LEVEL (series + top events)
+    report = sales_report(request.user, start, end, granularity)
+    totals = report["totals"]
 
-    # 🔹 MONTHLY REVENUE
-    monthly = (
-        paid_orders
-        .annotate(month=TruncMonth("created_at"))
-        .values("month")
-        .annotate(total=Sum("total_amount"))
-        .order_by("month")
-    )
+    total_revenue = totals["revenue"]
 
-    monthly_revenue = [
+    series = [
         {
-            "month": m["month"].strftime("%b %Y"),
-            "total": float(m["total"])
+            "period": b["period"],
+            "start": b["start"],
+            "orders": b["orders"],
+            "tickets": b["tickets"],
+            "revenue": float(b["revenue"]),
+            "commission": float(b["commission"]),
+            "organizer_earnings": float(b["organizer_earnings"]),
+            "refunded_orders": b["refunded_orders"],
+            "refunded_amount": float(b["refunded_amount"]),
         }
-        for m in monthly
+        for b in report["series"]
     ]
 
-    # 🔹 ORDERS TIMELINE
-    orders_timeline = (
-        paid_orders
-        .annotate(month=TruncMonth("created_at"))
-        .values("month")
-        .annotate(orders=Count("id"))
-        .order_by("month")
-    )
+    paid_months = [m for m in report["months"] if m["orders"]]
 
-    orders_data = [
+    top_events_data = [
         {
-            "month": o["month"].strftime("%b %Y"),
-            "orders": o["orders"]
+            "event_id": e["event_id"],
+            "event": e["event"],
+            "revenue": float(e["revenue"]),
+            "orders": e["orders"],
+            "tickets": e["tickets"],
         }
-        for o in orders_timeline
+        for e in report["top_events"]
     ]
 
-    # 🔹 TOP EVENTS
-    top_events = (
-        paid_orders
-        .values("ticket_type__event__title")
-        .annotate(revenue=Sum("total_amount"))
-        .order_by("-revenue")[:5]
+    # 🔹 FORECAST (fitted offline by `manage.py forecast_revenue`)
+    forecasts = list(
+        RevenueForecast.objects
+        .select_related("event")
+        .filter(organizer=request.user)
+        .order_by("-predicted")
     )
 
-    top_events_data = [
-        {
-            "event": e["ticket_type__event__title"],
-            "revenue": float(e["revenue"])
+    def forecast_payload(f):
+        return {
+            "starts_on": f.starts_on,
+            "horizon_days": f.horizon_days,
+            "predicted": float(f.predicted),
+            "lower": float(f.lower),
+            "upper": float(f.upper),
+            "daily_trend": float(f.daily_trend),
+            "generated_at": f.created_at,
         }
-        for e in top_events
-    ]
 
-    # 🔹 SIMPLE AI PREDICTION (Average monthly growth)
-    avg_monthly = total_revenue / 12 if total_revenue > 0 else 0
-    predicted_next_month = float(avg_monthly * Decimal("1.10"))
+    forecast = next((f for f in forecasts if f.event_id is None), None)
+    forecast_data = forecast_payload(forecast) if forecast else None
+
+    event_forecasts = [
+        {"event_id": f.event_id, "event": f.event.title, **forecast_payload(f)}
+        for f in forecasts
+        if f.event_id is not None
+    ]
 
     return Response({
         "currency": "SSP",
+        "from": start,
+        "to": end,
+        "granularity": granularity,
         "total_revenue": float(total_revenue),
-        "total_orders": total_orders,
-        "total_commission": float(total_commission),
-        "total_organizer_earnings": float(total_organizer_earnings),
-        "monthly_revenue": monthly_revenue,
-        "orders_timeline": orders_data,
+        "total_orders": totals["orders"],
+        "total_tickets": totals["tickets"],
+        "total_commission": float(totals["commission"]),
+        "total_organizer_earnings": float(totals["organizer_earnings"]),
+        "total_refunded_orders": totals["refunded_orders"],
+        "total_refunded_amount": float(totals["refunded_amount"]),
+        "series": series,
+        # kept for older dashboards: months with sales, any granularity
+        "monthly_revenue": [{"month": m["period"], "total": float(m["revenue"])} for m in paid_months],
+        "orders_timeline": [{"month": m["period"], "orders": m["orders"]} for m in paid_months],
         "top_events": top_events_data,
-        "predicted_next_month": predicted_next_month
+        "forecast": forecast_data,
+        "event_forecasts": event_forecasts,
+        "predicted_next_month": forecast_data["predicted"] if forecast else 0.0
     })
 
 
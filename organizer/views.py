@@ -3,8 +3,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
 from events.models import Event
-from orders.models import Order
-from django.db.models import Sum
+from orders.rollups import organizer_totals
 
 
 @api_view(["GET"])
@@ -14,20 +13,11 @@ def organizer_dashboard(request):
 
     total_events = Event.objects.filter(organizer=user).count()
 
-    total_orders = Order.objects.filter(
-        ticket_type__event__organizer=user,
-        status="paid"
-    ).count()
+    totals = organizer_totals(user)
 
-    total_sales = Order.objects.filter(
-        ticket_type__event__organizer=user,
-        status="paid"
-    ).aggregate(total=Sum("total_amount"))["total"] or 0
-
-    organizer_balance = Order.objects.filter(
-        ticket_type__event__organizer=user,
-        status="paid"
-    ).aggregate(total=Sum("organizer_amount"))["total"] or 0
+    total_orders = totals["orders"]
+    total_sales = totals["revenue"]
+    organizer_balance = totals["organizer_earnings"]
 
     pending_payouts = 0
     paid_payouts = 0
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0007_keyset_indexes'),
+        ('payments', '0004_savedpaymentmethod'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['-created_at', '-id'], name='payment_recent_idx'),
+        ),
+    ]
@@ -84,6 +84,12 @@ class Payment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # organizer payments keyset pagination
+            models.Index(fields=["-created_at", "-id"], name="payment_recent_idx"),
+        ]
+
     # ===============================
     # HELPERS
     # ===============================
@@ -5,6 +5,7 @@ from django.core.exceptions import ValidationError
 from orders.models import Order
 from payments.models import Payment
 from tickets.models import TicketType
+from tickets.inventory import reserve_tickets
 from wallets.models import OrganizerWallet
 
 from accounts.models import PushToken
@@ -20,14 +21,14 @@ def purchase_tickets(user, event, items):
 
     ticket_objects = []
 
-    # 1️⃣ Validate availability
+    # 1️⃣ Reserve stock (conditional UPDATE, rolled back on failure)
     for item in items:
-        ticket = TicketType.objects.select_for_update().get(
+        ticket = TicketType.objects.get(
             id=item["ticket_type_id"],
             event=event,
         )
 
-        if ticket.quantity_sold + item["quantity"] > ticket.quantity_total:
+        if not reserve_tickets(ticket.id, item["quantity"]):
             raise ValidationError(
                 f"Not enough tickets for {ticket.name}"
             )
@@ -51,7 +52,7 @@ def purchase_tickets(user, event, items):
         status=Order.STATUS_PENDING,
     )
 
-    # 4️⃣ Create payments + update tickets
+    # 4️⃣ Create payments
     for ticket, qty, subtotal in ticket_objects:
         Payment.objects.create(
             order=order,
@@ -60,9 +61,6 @@ def purchase_tickets(user, event, items):
             amount=subtotal,
         )
 
-        ticket.quantity_sold += qty
-        ticket.save(update_fields=["quantity_sold"])
-
     # 5️⃣ Lock organizer funds
     wallet, _ = OrganizerWallet.objects.get_or_create(
         organizer=event.organizer
@@ -1,3 +1,90 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from events.models import Event
+from orders.models import Order
+from tickets.inventory import hold_tickets, release_expired_holds, reserve_tickets
+from tickets.models import TicketHold, TicketType
+
+
+SUCCESSFUL = {"status": "SUCCESSFUL", "financialTransactionId": "FT-1"}
+
+
+@mock.patch("payments.views_momo_order.MoMoService.get_payment_status", return_value=SUCCESSFUL)
+@mock.patch("payments.views_momo.MoMoService.get_payment_status", return_value=SUCCESSFUL)
+class MomoSettlementTests(TestCase):
+
+    def setUp(self):
+        User = get_user_model()
+        self.organizer = User.objects.create_user(email="org@example.com", password="pw")
+        self.buyer = User.objects.create_user(email="buyer@example.com", password="pw")
+
+        start = timezone.now() + timedelta(days=7)
+        event = Event.objects.create(
+            title="Concert",
+            description="-",
+            location="Juba",
+            start_date=start,
+            end_date=start,
+            organizer=self.organizer,
+        )
+        self.ticket_type = TicketType.objects.create(event=event, name="VIP", price=10, quantity_total=3)
+
+        self.order = Order.objects.create(
+            user=self.buyer,
+            ticket_type=self.ticket_type,
+            quantity=2,
+            total_amount=Decimal("20"),
+            commission_amount=Decimal("2"),
+            organizer_amount=Decimal("18"),
+            momo_reference_id="ref-1",
+        )
+        hold_tickets(self.order)
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.buyer)
+
+    def sold_held(self):
+        ticket_type = TicketType.objects.get(pk=self.ticket_type.pk)
+        return ticket_type.quantity_sold, ticket_type.quantity_held
+
+    def test_confirm_converts_the_hold_once(self, *mocks):
+        response = self.client.get("/api/payments/momo/confirm/ref-1/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["order_status"], "paid")
+
+        # the status poll for the same reference must not sell again
+        response = self.client.get("/api/payments/momo/status/ref-1/")
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.sold_held(), (2, 0))
+        self.assertFalse(TicketHold.objects.exists())
+
+    def test_expired_hold_claims_fresh_stock(self, *mocks):
+        TicketHold.objects.update(expires_at=timezone.now() - timedelta(minutes=1))
+        release_expired_holds()
+
+        response = self.client.get("/api/payments/momo/status/ref-1/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Order.objects.get(pk=self.order.pk).status, "paid")
+        self.assertEqual(self.sold_held(), (2, 0))
+
+    def test_not_marked_paid_when_seats_resold(self, *mocks):
+        TicketHold.objects.update(expires_at=timezone.now() - timedelta(minutes=1))
+        release_expired_holds()
+        self.assertTrue(reserve_tickets(self.ticket_type.pk, 2))
+
+        response = self.client.get("/api/payments/momo/confirm/ref-1/")
 
-# Create your tests here.
+        self.assertEqual(response.status_code, 409)
+        order = Order.objects.get(pk=self.order.pk)
+        self.assertEqual(order.status, "pending")
+        self.assertEqual(order.payment_status, "SUCCESSFUL")
+        self.assertEqual(self.sold_held(), (2, 0))
@@ -1,3 +1,5 @@
+from operator import attrgetter
+
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
@@ -9,7 +11,12 @@ from .serializers import SavedPaymentSerializer
 
 from orders.models import Order
 from tickets.models import Ticket
-from tickets.utils import generate_qr_code
+from tickets.inventory import claim_for_order, remaining_tickets
+from tickets.issuance import issue_tickets
+from tickets.qr import ticket_qr_url
+from events.waiting_room import check_admission
+from utils.pagination import InvalidCursor, KeysetPaginator, page_payload, wants_pagination
+from utils.export import InvalidExport, filter_export, parse_export, stream_export
 
 
 # ===============================
@@ -69,8 +76,7 @@ def initiate_payment(request):
                     "tickets": [
                         {
                             "ticket_code": str(t.ticket_code),
-                            "qr_code": request.build_absolute_uri(t.qr_code.url)
-                            if t.qr_code else None,
+                            "qr_code": ticket_qr_url(request, t),
                         }
                         for t in reversed(list(latest_tickets))
                     ],
@@ -79,17 +85,21 @@ def initiate_payment(request):
             )
 
         # ===============================
-        # CHECK TICKET AVAILABILITY
+        # WAITING ROOM
         # ===============================
-        ticket_type = (
-            order.ticket_type.__class__.objects
-            .select_for_update()
-            .get(id=order.ticket_type.id)
-        )
+        denied = check_admission(request, order.ticket_type.event_id)
+        if denied:
+            return denied
 
-        available = ticket_type.quantity_total - ticket_type.quantity_sold
+        # ===============================
+        # CLAIM TICKETS
+        # ===============================
+        # the order's hold becomes sold seats; if the hold already
+        # expired and was released, claim fresh stock instead
+        ticket_type = order.ticket_type
 
-        if order.quantity > available:
+        if not claim_for_order(order):
+            available = remaining_tickets(ticket_type.id)
             return Response(
                 {"error": f"Only {available} tickets available"},
                 status=status.HTTP_400_BAD_REQUEST
@@ -134,32 +144,11 @@ def initiate_payment(request):
         order.payment_method = provider.upper()
         order.save(update_fields=["status", "payment_status", "payment_method"])
 
-        # ===============================
-        # UPDATE SOLD TICKETS
-        # ===============================
-        ticket_type.quantity_sold += order.quantity
-        ticket_type.save(update_fields=["quantity_sold"])
-
         # ===============================
         # CREATE TICKETS
         # ===============================
-        created_tickets = []
-
-        for _ in range(order.quantity):
-
-            ticket = Ticket.objects.create(
-                user=request.user,
-                ticket_type=ticket_type,
-                order=order,
-            )
-
-            ticket.qr_code.save(
-                f"{ticket.ticket_code}.png",
-                generate_qr_code(str(ticket.ticket_code))
-            )
-
-            ticket.save()
-            created_tickets.append(ticket)
+        # one INSERT; QR images are rendered after commit
+        created_tickets = issue_tickets(request.user, ticket_type, order.quantity, order=order)
 
     return Response(
         {
@@ -170,8 +159,7 @@ def initiate_payment(request):
             "tickets": [
                 {
                     "ticket_code": str(t.ticket_code),
-                    "qr_code": request.build_absolute_uri(t.qr_code.url)
-                    if t.qr_code else None,
+                    "qr_code": ticket_qr_url(request, t),
                 }
                 for t in created_tickets
             ],
@@ -196,9 +184,16 @@ def organizer_payments(request):
             "order__ticket_type__event"
         )
         .filter(order__ticket_type__event__organizer=request.user)
-        .order_by("-created_at")
+        .order_by("-created_at", "-id")
     )
 
+    paginate = wants_pagination(request.GET)
+    if paginate:
+        try:
+            qs, next_cursor = KeysetPaginator("created_at").paginate(qs, request.GET)
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
     data = []
 
     for p in qs:
@@ -223,9 +218,61 @@ def organizer_payments(request):
             "organizer_amount": float(order.organizer_amount),
         })
 
+    if paginate:
+        return Response(page_payload(data, next_cursor))
+
     return Response(data)
 
 
+# ===============================
+# ORGANIZER PAYMENTS EXPORT (STREAMED)
+# ===============================
+# GET /api/payments/organizer/export/?fmt=csv&columns=...&gzip=1
+#     &from=<date>&to=<date>&event=<id>
+PAYMENT_EXPORT_COLUMNS = {
+    "id": attrgetter("id"),
+    "provider": attrgetter("provider"),
+    "phone": attrgetter("phone"),
+    "status": attrgetter("status"),
+    "created_at": attrgetter("created_at"),
+    "order_id": attrgetter("order_id"),
+    "quantity": attrgetter("order.quantity"),
+    "customer_email": lambda p: p.order.user.email if p.order.user else None,
+    "ticket_type_name": attrgetter("order.ticket_type.name"),
+    "event_id": attrgetter("order.ticket_type.event_id"),
+    "event_title": attrgetter("order.ticket_type.event.title"),
+    "amount": lambda p: float(p.order.total_amount),
+    "commission": lambda p: float(p.order.commission_amount),
+    "organizer_amount": lambda p: float(p.order.organizer_amount),
+}
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def export_organizer_payments(request):
+
+    try:
+        options = parse_export(request.GET, PAYMENT_EXPORT_COLUMNS)
+    except InvalidExport as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    qs = (
+        Payment.objects
+        .select_related(
+            "order",
+            "order__user",
+            "order__ticket_type",
+            "order__ticket_type__event"
+        )
+        .filter(order__ticket_type__event__organizer=request.user)
+        .order_by("-created_at", "-id")
+    )
+
+    qs = filter_export(qs, options, "created_at", "order__ticket_type__event_id")
+
+    return stream_export(qs, PAYMENT_EXPORT_COLUMNS, options, "payments")
+
+
 # ===============================
 # SAVED PAYMENTS
 # ===============================
@@ -5,6 +5,7 @@ from rest_framework.response import Response
 from rest_framework import status
 
 from .momo_service import MoMoService
+from .views_momo_order import settle_momo_order
 from payments.models import SavedPaymentMethod
 
 # 🔔 PUSH IMPORTS
@@ -73,22 +74,17 @@ def momo_check_status(request, reference_id):
         # Payment success
         if result.get("status") == "SUCCESSFUL":
 
-            try:
+            # Find order using momo reference; seats are claimed before
+            # it is marked paid
+            order, error = settle_momo_order(reference_id, result)
 
-                # Find order using momo reference
-                order = Order.objects.get(momo_reference_id=reference_id)
+            if error:
+                return Response({"error": error, "order_id": order.id, **result}, status=409)
 
-                # Only update if not already paid
-                if order.status != "paid":
-
-                    order.status = "paid"
-                    order.payment_status = "SUCCESSFUL"
-                    order.financial_transaction_id = result.get("financialTransactionId")
-
-                    order.save()
+            if order is not None:
 
                 # 🔔 Send notification only once
-                if not order.notification_sent:
+                if order.status == "paid" and not order.notification_sent:
 
                     tokens = list(
                         PushToken.objects
@@ -109,10 +105,7 @@ def momo_check_status(request, reference_id):
                         )
 
                         order.notification_sent = True
-                        order.save()
-
-            except Order.DoesNotExist:
-                pass
+                        order.save(update_fields=["notification_sent"])
 
         return Response(result)
 
@@ -4,10 +4,46 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 
+from django.db import transaction
+
 from orders.models import Order
+from events.waiting_room import check_admission
+from tickets.inventory import claim_for_order
 from .momo_service import MoMoService
 
 
+def settle_momo_order(reference_id, result, user=None):
+    """
+    Mark the order behind a successful MoMo payment as paid, claiming its
+    seats first (its hold, else fresh stock) like initiate_payment does.
+    Returns (order, error): order is None when no order uses the
+    reference; error is set when the seats ran out and the order was
+    left unpaid.
+    """
+    with transaction.atomic():
+        orders = Order.objects.select_for_update().filter(momo_reference_id=reference_id)
+        if user is not None:
+            orders = orders.filter(user=user)
+
+        order = orders.first()
+        if order is None:
+            return None, None
+
+        order.payment_status = "SUCCESSFUL"
+        order.financial_transaction_id = result.get("financialTransactionId")
+
+        if order.status == "pending":
+            if not claim_for_order(order):
+                order.save(update_fields=["payment_status", "financial_transaction_id"])
+                return order, "Tickets sold out before the payment completed"
+
+            order.status = "paid"
+
+        order.save(update_fields=["status", "payment_status", "financial_transaction_id"])
+
+    return order, None
+
+
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def momo_pay_order(request):
@@ -22,13 +58,17 @@ def momo_pay_order(request):
             return Response({"error": "order_id and phone are required"}, status=400)
 
         try:
-            order = Order.objects.get(id=order_id, user=request.user)
+            order = Order.objects.select_related("ticket_type").get(id=order_id, user=request.user)
         except Order.DoesNotExist:
             return Response({"error": "Order not found"}, status=404)
 
         if order.status == "paid":
             return Response({"error": "Order already paid"}, status=400)
 
+        denied = check_admission(request, order.ticket_type.event_id)
+        if denied:
+            return denied
+
         reference_id = str(uuid.uuid4())
 
         momo_result = MoMoService.request_to_pay(
@@ -66,18 +106,26 @@ def momo_confirm_order(request, reference_id):
     try:
         momo_status = MoMoService.get_payment_status(reference_id)
 
-        try:
-            order = Order.objects.get(momo_reference_id=reference_id, user=request.user)
-        except Order.DoesNotExist:
-            return Response({"error": "Order not found for this reference"}, status=404)
-
-        order.payment_status = momo_status.get("status", "PENDING")
-
         if momo_status.get("status") == "SUCCESSFUL":
-            order.status = "paid"
-            order.financial_transaction_id = momo_status.get("financialTransactionId")
+            order, error = settle_momo_order(reference_id, momo_status, user=request.user)
+        else:
+            order = Order.objects.filter(momo_reference_id=reference_id, user=request.user).first()
+            error = None
 
-        order.save()
+        if order is None:
+            return Response({"error": "Order not found for this reference"}, status=404)
+
+        if error:
+            return Response({
+                "error": error,
+                "order_id": order.id,
+                "payment_status": order.payment_status,
+                "order_status": order.status,
+            }, status=409)
+
+        if momo_status.get("status") != "SUCCESSFUL":
+            order.payment_status = momo_status.get("status", "PENDING")
+            order.save(update_fields=["payment_status"])
 
         return Response({
             "order_id": order.id,
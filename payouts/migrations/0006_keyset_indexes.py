@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0007_waiting_room'),
+        ('orders', '0007_keyset_indexes'),
+        ('payouts', '0005_payout_orders'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payout',
+            index=models.Index(fields=['organizer', '-created_at', '-id'], name='payout_organizer_recent_idx'),
+        ),
+    ]
@@ -94,6 +94,12 @@ class Payout(models.Model):
     processed_at = models.DateTimeField(blank=True, null=True)
     paid_at = models.DateTimeField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            # payout history keyset pagination
+            models.Index(fields=["organizer", "-created_at", "-id"], name="payout_organizer_recent_idx"),
+        ]
+
     # ===============================
     # HELPERS
     # ===============================
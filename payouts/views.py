@@ -8,6 +8,7 @@ from .models import Payout
 from .serializers import PayoutSerializer
 from orders.models import Order
 from events.models import Event
+from utils.pagination import InvalidCursor, KeysetPaginator, page_payload, wants_pagination
 
 
 # =====================================================
@@ -21,7 +22,21 @@ class MyPayoutsAPIView(generics.ListAPIView):
     def get_queryset(self):
         return Payout.objects.filter(
             organizer=self.request.user
-        ).order_by("-created_at")
+        ).order_by("-created_at", "-id")
+
+    def list(self, request, *args, **kwargs):
+        params = request.query_params
+
+        if not wants_pagination(params):
+            return super().list(request, *args, **kwargs)
+
+        try:
+            page, next_cursor = KeysetPaginator("created_at").paginate(self.get_queryset(), params)
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = self.get_serializer(page, many=True)
+        return Response(page_payload(serializer.data, next_cursor))
 
 
 # =====================================================
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0007_keyset_indexes'),
+        ('refunds', '0003_rename_processed_at_refund_approved_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='refund',
+            index=models.Index(fields=['-requested_at', '-id'], name='refund_recent_idx'),
+        ),
+    ]
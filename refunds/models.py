@@ -68,6 +68,12 @@ class Refund(models.Model):
 
     paid_at = models.DateTimeField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            # organizer refunds keyset pagination
+            models.Index(fields=["-requested_at", "-id"], name="refund_recent_idx"),
+        ]
+
     # =========================================
     # SAVE OVERRIDE (AUTO SYNC ORDER STATUS)
     # =========================================
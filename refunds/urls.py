@@ -2,6 +2,7 @@ from django.urls import path
 from .views import (
     request_refund,
     organizer_refunds,
+    export_organizer_refunds,
     admin_approve_refund,
     admin_mark_refund_paid,
     my_refunds,
@@ -10,6 +11,7 @@ from .views import (
 urlpatterns = [
     path("request/", request_refund),
     path("organizer/", organizer_refunds),
+    path("organizer/export/", export_organizer_refunds),
     path("admin/<int:refund_id>/approve/", admin_approve_refund),
     path("admin/<int:refund_id>/mark-paid/", admin_mark_refund_paid),
     path("my/", my_refunds),
@@ -1,4 +1,5 @@
 from datetime import timedelta
+from operator import attrgetter
 from django.utils import timezone
 from django.db import transaction
 
@@ -8,7 +9,10 @@ from rest_framework.response import Response
 from rest_framework import status
 
 from orders.models import Order
+from tickets.checkin_stats import remove_check_ins
 from tickets.models import Ticket
+from utils.pagination import InvalidCursor, KeysetPaginator, page_payload, wants_pagination
+from utils.export import InvalidExport, filter_export, parse_export, stream_export
 from .models import Refund
 
 
@@ -61,28 +65,31 @@ def request_refund(request):
     if not allowed:
         return Response({"error": message}, status=400)
 
-    # Cancel tickets
-    Ticket.objects.filter(
-        user=request.user,
-        ticket_type=order.ticket_type,
-        is_cancelled=False,
-    ).update(
-        is_cancelled=True,
-        cancelled_at=timezone.now(),
-    )
+    with transaction.atomic():
+        # Cancel tickets
+        tickets = Ticket.objects.filter(
+            user=request.user,
+            ticket_type=order.ticket_type,
+            is_cancelled=False,
+        )
+        remove_check_ins(order.ticket_type.event_id, tickets)
+        tickets.update(
+            is_cancelled=True,
+            cancelled_at=timezone.now(),
+        )
 
-    # Update order
-    order.status = "refund_requested"
-    order.save(update_fields=["status"])
-
-    # Create refund
-    refund = Refund.objects.create(
-        order=order,
-        amount=order.total_amount,
-        reason=reason,
-        provider=order.payment_method,
-        status="requested",
-    )
+        # Update order
+        order.status = "refund_requested"
+        order.save(update_fields=["status"])
+
+        # Create refund
+        refund = Refund.objects.create(
+            order=order,
+            amount=order.total_amount,
+            reason=reason,
+            provider=order.payment_method,
+            status="requested",
+        )
 
     return Response({
         "message": "Refund requested. Processing may take 3–7 days.",
@@ -112,12 +119,19 @@ def organizer_refunds(request):
                 "order__ticket_type__event"
             )
             .filter(order__ticket_type__event__organizer=request.user)
-            .order_by("-requested_at")
+            .order_by("-requested_at", "-id")
         )
 
         if event_id:
             refunds = refunds.filter(order__ticket_type__event_id=event_id)
 
+        paginate = wants_pagination(request.GET)
+        if paginate:
+            try:
+                refunds, next_cursor = KeysetPaginator("requested_at").paginate(refunds, request.GET)
+            except InvalidCursor as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
         data = []
 
         for r in refunds:
@@ -147,6 +161,9 @@ def organizer_refunds(request):
                 "provider_reference": r.provider_reference,
             })
 
+        if paginate:
+            return Response(page_payload(data, next_cursor))
+
         return Response(data)
 
     except Exception as e:
@@ -156,6 +173,56 @@ def organizer_refunds(request):
         )
 
 
+# =====================================================
+# ORGANIZER REFUND EXPORT (STREAMED)
+# GET /api/refunds/organizer/export/?fmt=csv&columns=...&gzip=1
+#     &from=<date>&to=<date>&event=<id>
+# =====================================================
+REFUND_EXPORT_COLUMNS = {
+    "id": attrgetter("id"),
+    "reference": attrgetter("reference"),
+    "status": attrgetter("status"),
+    "amount": lambda r: float(r.amount),
+    "requested_at": attrgetter("requested_at"),
+    "approved_at": attrgetter("approved_at"),
+    "expected_paid_from": attrgetter("expected_paid_from"),
+    "expected_paid_to": attrgetter("expected_paid_to"),
+    "paid_at": attrgetter("paid_at"),
+    "order_id": attrgetter("order_id"),
+    "customer_email": lambda r: r.order.user.email if r.order.user else None,
+    "event_id": attrgetter("order.ticket_type.event_id"),
+    "event_title": attrgetter("order.ticket_type.event.title"),
+    "ticket_type_name": attrgetter("order.ticket_type.name"),
+    "provider": attrgetter("provider"),
+    "provider_reference": attrgetter("provider_reference"),
+}
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def export_organizer_refunds(request):
+    try:
+        options = parse_export(request.GET, REFUND_EXPORT_COLUMNS)
+    except InvalidExport as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    refunds = (
+        Refund.objects
+        .select_related(
+            "order",
+            "order__user",
+            "order__ticket_type",
+            "order__ticket_type__event"
+        )
+        .filter(order__ticket_type__event__organizer=request.user)
+        .order_by("-requested_at", "-id")
+    )
+
+    refunds = filter_export(refunds, options, "requested_at", "order__ticket_type__event_id")
+
+    return stream_export(refunds, REFUND_EXPORT_COLUMNS, options, "refunds")
+
+
 # =====================================================
 # ADMIN APPROVE REFUND
 # POST /api/refunds/admin/<id>/approve/
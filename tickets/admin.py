@@ -1,13 +1,28 @@
 from django.contrib import admin
+from django.urls import reverse
 from django.utils.html import format_html
-from .models import TicketType, Ticket
+from .models import TicketType, TicketTypeShard, Ticket, TicketHold
+
+
+class TicketTypeShardInline(admin.TabularInline):
+    # shards are managed with the shard_ticket_type command
+    model = TicketTypeShard
+    fields = ("index", "capacity", "sold", "held")
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(TicketType)
 class TicketTypeAdmin(admin.ModelAdmin):
-    list_display = ("id", "event", "name", "price", "quantity_total", "quantity_sold")
+    list_display = ("id", "event", "name", "price", "quantity_total", "quantity_sold", "quantity_held", "shard_count")
     search_fields = ("name", "event__title")
     list_filter = ("event",)
+    readonly_fields = ("shard_count",)
+    inlines = [TicketTypeShardInline]
 
 
 @admin.register(Ticket)
@@ -20,7 +35,15 @@ class TicketAdmin(admin.ModelAdmin):
 
     def qr_preview(self, obj):
         if obj.qr_code:
-            return format_html('<img src="{}" width="150" height="150" />', obj.qr_code.url)
-        return "No QR Code"
+            src = obj.qr_code.url
+        else:
+            src = reverse("ticket-qr", kwargs={"ticket_code": obj.ticket_code, "fmt": "png"}) + "?size=150"
+        return format_html('<img src="{}" width="150" height="150" />', src)
+
+    qr_preview.short_description = "QR Code"
+
 
-    qr_preview.short_description = "QR Code"
\ No newline at end of file
+@admin.register(TicketHold)
+class TicketHoldAdmin(admin.ModelAdmin):
+    list_display = ("id", "order", "ticket_type", "quantity", "expires_at")
+    list_filter = ("expires_at",)
@@ -0,0 +1,116 @@
+from django.db.models import Count, F, Max, Min, Q, Sum, Value
+from django.db.models.functions import Greatest
+
+from .models import TicketType
+from .shards import shard_totals
+
+
+def remaining_expression():
+    """
+    SQL expression for seats still on sale on a TicketType row.
+    """
+    return Greatest(
+        F("quantity_total") - F("quantity_sold") - F("quantity_held"),
+        Value(0)
+    )
+
+
+def empty_summary():
+    return {
+        "min_price": None,
+        "remaining": 0,
+        "sold_out": False,
+        "ticket_type_count": 0,
+    }
+
+
+def availability_summaries(event_ids):
+    """
+    {event_id: summary} for a page of events, from one grouped query:
+    cheapest price still on sale, seats remaining, sold out flag and
+    number of ticket types.
+
+    Sales on sharded ticket types never touch their row, so those are
+    left out of the grouped query and added from the live shard sums
+    (one more query, only for pages that have any).
+    """
+    summaries = {event_id: empty_summary() for event_id in event_ids}
+    plain = Q(shard_count=0)
+
+    rows = (
+        TicketType.objects
+        .filter(event_id__in=event_ids)
+        .values("event_id")
+        .annotate(
+            ticket_type_count=Count("id"),
+            sharded_count=Count("id", filter=~plain),
+            remaining=Sum(remaining_expression(), filter=plain),
+            min_price=Min(
+                "price",
+                filter=plain & Q(quantity_total__gt=F("quantity_sold") + F("quantity_held"))
+            ),
+        )
+        .order_by()
+    )
+
+    rows = list(rows)
+    _add_sharded(rows)
+
+    for row in rows:
+        remaining = row["remaining"] or 0
+        summaries[row["event_id"]] = {
+            "min_price": (
+                f"{row['min_price']:.2f}" if row["min_price"] is not None else None
+            ),
+            "remaining": remaining,
+            "sold_out": remaining == 0,
+            "ticket_type_count": row["ticket_type_count"],
+        }
+
+    return summaries
+
+
+def _add_sharded(rows):
+    """
+    Fold sharded ticket types into grouped availability rows.
+    """
+    by_event = {row["event_id"]: row for row in rows if row["sharded_count"]}
+
+    if not by_event:
+        return
+
+    sharded = list(
+        TicketType.objects
+        .filter(event_id__in=list(by_event), shard_count__gt=0)
+        .values_list("id", "event_id", "price", "quantity_total")
+    )
+    totals = shard_totals([pk for pk, _, _, _ in sharded])
+
+    for pk, event_id, price, total in sharded:
+        sold, held = totals.get(pk, (0, 0))
+        remaining = max(total - sold - held, 0)
+        row = by_event[event_id]
+
+        row["remaining"] = (row["remaining"] or 0) + remaining
+        if remaining and (row["min_price"] is None or price < row["min_price"]):
+            row["min_price"] = price
+
+
+def ticket_types_version(ticket_types):
+    """
+    (last_modified, count) for catalogue_condition over a TicketType
+    queryset. Sharded sales only move shard counters, so their sums go
+    into the count part and still change the ETag.
+    """
+    version = ticket_types.aggregate(
+        last=Max("updated_at"),
+        count=Count("id", distinct=True),
+        sold=Sum("shards__sold"),
+        held=Sum("shards__held"),
+    )
+
+    count = version["count"]
+    if version["sold"] is not None:
+        count = f"{count}:{version['sold']}:{version['held']}"
+
+    return version["last"], count
@@ -0,0 +1,212 @@
+from collections import Counter
+from django.db import IntegrityError, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import CheckInBucket, CheckInCounter, Ticket, TicketType
+from .shards import apply_shard_totals
+
+
+# Check-in counters are bumped by tickets.gate in the transaction that
+# admits the tickets, so reading "checked in / sold" during doors-open
+# is a handful of indexed rows instead of a COUNT over Ticket. Admitted
+# tickets that are later cancelled or deleted are taken back out by the
+# code that cancels / deletes them (remove_check_ins, one aggregate per
+# event, no per-ticket signal); deleting an event drops its counters.
+BUCKET_MINUTES = 5
+
+
+def bucket_start(moment):
+    return moment.replace(
+        minute=moment.minute - moment.minute % BUCKET_MINUTES,
+        second=0,
+        microsecond=0,
+    )
+
+
+def _bump(model, lookup, amount):
+    """
+    checked_in += amount on the row matching `lookup`, creating it on
+    first use.
+    """
+    if not amount:
+        return
+
+    rows = model.objects.filter(**lookup)
+
+    if rows.update(checked_in=F("checked_in") + amount):
+        return
+
+    try:
+        with transaction.atomic():
+            model.objects.create(checked_in=amount, **lookup)
+    except IntegrityError:
+        # created by a concurrent check-in in the meantime
+        rows.update(checked_in=F("checked_in") + amount)
+
+
+def record_check_ins(event_id, admitted):
+    """
+    admitted: [(ticket_type_id, checked in at)] for newly admitted tickets.
+    """
+    if not admitted:
+        return
+
+    per_type = Counter(ticket_type_id for ticket_type_id, _ in admitted)
+    per_bucket = Counter(bucket_start(moment) for _, moment in admitted)
+
+    _bump(CheckInCounter, {"event_id": event_id, "ticket_type_id": None}, len(admitted))
+
+    for ticket_type_id, amount in sorted(per_type.items()):
+        _bump(CheckInCounter, {"event_id": event_id, "ticket_type_id": ticket_type_id}, amount)
+
+    for starts_at, amount in sorted(per_bucket.items()):
+        _bump(CheckInBucket, {"event_id": event_id, "starts_at": starts_at}, amount)
+
+
+def _drop(model, lookup, amount):
+    model.objects.filter(**lookup).update(
+        checked_in=Greatest(F("checked_in") - amount, Value(0))
+    )
+
+
+def _admissions(tickets):
+    return tickets.annotate(moment=Coalesce("used_at", "created_at"))
+
+
+def remove_check_ins(event_id, tickets):
+    """
+    Take the admitted ones among `tickets` (a Ticket queryset of one
+    event, about to be cancelled or deleted) out of the counters.
+    Cancelled tickets were taken out when they were cancelled. Call it
+    inside the transaction that changes them; the rows stay locked until
+    then so a gate cannot admit one in between. Returns how many were
+    removed.
+    """
+    rows = list(
+        _admissions(tickets.select_for_update(of=("self",)))
+        .values_list("ticket_type_id", "is_used", "is_cancelled", "moment")
+    )
+    removed = [
+        (ticket_type_id, moment)
+        for ticket_type_id, used, cancelled, moment in rows
+        if used and not cancelled
+    ]
+
+    if not removed:
+        return 0
+
+    per_type = Counter(ticket_type_id for ticket_type_id, _ in removed)
+    per_bucket = Counter(bucket_start(moment) for _, moment in removed)
+
+    _drop(CheckInCounter, {"event_id": event_id, "ticket_type_id__isnull": True}, len(removed))
+
+    for ticket_type_id, amount in sorted(per_type.items()):
+        _drop(CheckInCounter, {"event_id": event_id, "ticket_type_id": ticket_type_id}, amount)
+
+    for starts_at, amount in sorted(per_bucket.items()):
+        _drop(CheckInBucket, {"event_id": event_id, "starts_at": starts_at}, amount)
+
+    return len(removed)
+
+
+def remove_check_ins_by_event(tickets):
+    """
+    remove_check_ins for a Ticket queryset that may span events (a
+    user's tickets): one pass per event that has admissions in it.
+    """
+    event_ids = (
+        tickets
+        .filter(is_used=True, is_cancelled=False)
+        .order_by()
+        .values_list("ticket_type__event_id", flat=True)
+        .distinct()
+    )
+
+    return sum(
+        remove_check_ins(event_id, tickets.filter(ticket_type__event_id=event_id))
+        for event_id in list(event_ids)
+    )
+
+
+def move_check_in(event_id, old_moment, new_moment):
+    """
+    A check-in's time moved (offline sync found an earlier scan): shift
+    it between histogram buckets. Totals are unchanged.
+    """
+    old_bucket, new_bucket = bucket_start(old_moment), bucket_start(new_moment)
+
+    if old_bucket == new_bucket:
+        return
+
+    CheckInBucket.objects.filter(
+        event_id=event_id,
+        starts_at=old_bucket,
+        checked_in__gt=0,
+    ).update(checked_in=F("checked_in") - 1)
+
+    _bump(CheckInBucket, {"event_id": event_id, "starts_at": new_bucket}, 1)
+
+
+def check_in_summary(event_id):
+    """
+    Totals, per ticket type "checked in / sold" and the arrival histogram.
+    """
+    counters = {
+        ticket_type_id: checked_in
+        for ticket_type_id, checked_in in (
+            CheckInCounter.objects
+            .filter(event_id=event_id)
+            .values_list("ticket_type_id", "checked_in")
+        )
+    }
+
+    ticket_types = [
+        {
+            "id": t.id,
+            "name": t.name,
+            "sold": t.quantity_sold,
+            "checked_in": counters.get(t.id, 0),
+        }
+        for t in apply_shard_totals(list(TicketType.objects.filter(event_id=event_id).order_by("id")))
+    ]
+
+    histogram = [
+        {"starts_at": starts_at, "checked_in": checked_in}
+        for starts_at, checked_in in (
+            CheckInBucket.objects
+            .filter(event_id=event_id, checked_in__gt=0)
+            .order_by("starts_at")
+            .values_list("starts_at", "checked_in")
+        )
+    ]
+
+    return {
+        "event_id": event_id,
+        "checked_in": counters.get(None, 0),
+        "sold": sum(t["sold"] for t in ticket_types),
+        "ticket_types": ticket_types,
+        "bucket_minutes": BUCKET_MINUTES,
+        "histogram": histogram,
+    }
+
+
+def rebuild_check_in_counters(event_id):
+    """
+    Recount one event from the Ticket table (backfill / repair).
+    """
+    used = Ticket.objects.filter(
+        ticket_type__event_id=event_id,
+        is_used=True,
+        is_cancelled=False,
+    )
+
+    with transaction.atomic():
+        CheckInCounter.objects.filter(event_id=event_id).delete()
+        CheckInBucket.objects.filter(event_id=event_id).delete()
+
+        admitted = list(_admissions(used).values_list("ticket_type_id", "moment"))
+
+        record_check_ins(event_id, admitted)
+
+    return len(admitted)
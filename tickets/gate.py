@@ -0,0 +1,346 @@
+import hashlib
+import struct
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .checkin_stats import move_check_in, record_check_ins
+from .models import Ticket
+from .signing import InvalidTicketSignature, verify_payload
+
+
+# ==========================================
+# OFFLINE MANIFEST
+# ==========================================
+# Binary layout (big endian):
+#   magic "TKM1" | kind (1 byte) | event id (u32) | count (u32)
+#   | count x 16 byte ids, sorted ascending
+# kind 0: ids are ticket_code values (plain QR codes)
+# kind 1: ids are ticket ids (signed payloads, see tickets.signing)
+# A gate binary-searches the array; the version is a hash of the body.
+MANIFEST_MAGIC = b"TKM1"
+MANIFEST_HEADER = struct.Struct(">4sBII")
+
+KIND_TICKET_CODE = 0
+KIND_TICKET_ID = 1
+
+
+def manifest_kind():
+    return KIND_TICKET_ID if settings.SIGNED_TICKET_CODES else KIND_TICKET_CODE
+
+
+def build_manifest(event_id):
+    """
+    (body, version, count) for the tickets of an event that can still
+    get in: not cancelled and not used yet.
+    """
+    kind = manifest_kind()
+    field = "id" if kind == KIND_TICKET_ID else "ticket_code"
+
+    ids = sorted(
+        value.bytes
+        for value in (
+            Ticket.objects
+            .filter(
+                ticket_type__event_id=event_id,
+                is_cancelled=False,
+                is_used=False,
+            )
+            .values_list(field, flat=True)
+            .iterator(chunk_size=5000)
+        )
+    )
+
+    body = MANIFEST_HEADER.pack(MANIFEST_MAGIC, kind, int(event_id), len(ids)) + b"".join(ids)
+    version = hashlib.sha256(body).hexdigest()[:16]
+
+    return body, version, len(ids)
+
+
+# ==========================================
+# OFFLINE SCAN SYNC
+# ==========================================
+MAX_SYNC_RECORDS = 5000
+
+RESULT_ADMITTED = "admitted"
+RESULT_ALREADY_USED = "already_used"
+RESULT_CANCELLED = "cancelled"
+RESULT_WRONG_EVENT = "wrong_event"
+RESULT_UNKNOWN = "unknown"
+RESULT_INVALID = "invalid"
+
+
+def _scan_time(value, now):
+    try:
+        scanned_at = parse_datetime(value) if isinstance(value, str) else None
+    except ValueError:
+        # well formed but not a real date, e.g. 2026-02-30T10:00:00
+        scanned_at = None
+
+    if scanned_at is None:
+        return now
+
+    if timezone.is_naive(scanned_at):
+        scanned_at = timezone.make_aware(scanned_at)
+
+    # a gate with a wrong clock cannot claim the future
+    return min(scanned_at, now)
+
+
+def identify(value, event_id, signed=False):
+    """
+    ("id" | "code", uuid) for a scanned value, or a result string.
+    Signed payloads are verified here, without touching the database.
+    """
+    if signed:
+        try:
+            ticket = verify_payload(value)
+        except InvalidTicketSignature:
+            return RESULT_INVALID
+        if str(ticket.event_id) != str(event_id):
+            return RESULT_WRONG_EVENT
+        return "id", ticket.ticket_id
+
+    try:
+        return "code", uuid.UUID(str(value))
+    except ValueError:
+        return RESULT_INVALID
+
+
+def _lookup(identities):
+    ids = [value for kind, value in identities if kind == "id"]
+    codes = [value for kind, value in identities if kind == "code"]
+    return Q(pk__in=ids) | Q(ticket_code__in=codes)
+
+
+def sync_scans(event_id, records):
+    """
+    Apply offline scans for one event and return one result per record,
+    in the same order.
+
+    First scan wins: the earliest scan of a ticket (in this batch or
+    already on the server) is the admission; every other scan of it is a
+    duplicate. A ticket already marked used by a later scan gets its
+    used_at moved back to the earlier one.
+    """
+    now = timezone.now()
+    results = [None] * len(records)
+    scans = []
+
+    for index, record in enumerate(records):
+        if not isinstance(record, dict):
+            results[index] = {"result": RESULT_INVALID}
+            continue
+
+        if record.get("payload"):
+            identity = identify(record["payload"], event_id, signed=True)
+        else:
+            identity = identify(record.get("ticket_code"), event_id)
+
+        if isinstance(identity, str):
+            results[index] = {"result": identity}
+            continue
+
+        scans.append((index, identity, _scan_time(record.get("scanned_at"), now)))
+
+    with transaction.atomic():
+        # one locking read for every ticket in the batch
+        tickets = list(
+            Ticket.objects
+            .select_for_update(of=("self",))
+            .select_related("ticket_type")
+            .filter(_lookup([identity for _, identity, _ in scans]))
+        )
+
+        by_id = {t.pk: t for t in tickets}
+        by_code = {t.ticket_code: t for t in tickets}
+
+        changed = {}
+        admitted = []
+
+        for index, (kind, value), scanned_at in sorted(scans, key=lambda s: s[2]):
+            ticket = (by_id if kind == "id" else by_code).get(value)
+
+            if ticket is None:
+                results[index] = {"result": RESULT_UNKNOWN}
+                continue
+
+            code = str(ticket.ticket_code)
+
+            if str(ticket.ticket_type.event_id) != str(event_id):
+                results[index] = {"result": RESULT_WRONG_EVENT, "ticket_code": code}
+                continue
+
+            if ticket.is_cancelled:
+                results[index] = {"result": RESULT_CANCELLED, "ticket_code": code}
+                continue
+
+            if ticket.is_used and (ticket.used_at is None or ticket.used_at <= scanned_at):
+                results[index] = {
+                    "result": RESULT_ALREADY_USED,
+                    "ticket_code": code,
+                    "first_scanned_at": ticket.used_at,
+                }
+                continue
+
+            # first scan so far (scans are walked oldest first)
+            if ticket.is_used:
+                move_check_in(event_id, ticket.used_at, scanned_at)
+            else:
+                admitted.append((ticket.ticket_type_id, scanned_at))
+
+            ticket.is_used = True
+            ticket.used_at = scanned_at
+            changed[ticket.pk] = ticket
+
+            results[index] = {
+                "result": RESULT_ADMITTED,
+                "ticket_code": code,
+                "scanned_at": scanned_at,
+            }
+
+        Ticket.objects.bulk_update(list(changed.values()), ["is_used", "used_at"], batch_size=500)
+        record_check_ins(event_id, admitted)
+
+    return results
+
+
+# ==========================================
+# LIVE CHECK-IN
+# ==========================================
+# A check-in is one conditional UPDATE:
+#   UPDATE ... SET is_used = true, used_at = <marker>
+#   WHERE <ticket> AND event AND is_used = false AND is_cancelled = false
+# so two gates scanning the same ticket at once cannot both admit it.
+# The rows this request admitted are the ones carrying its used_at
+# marker.
+MAX_BATCH_CHECK_IN = 500
+
+
+def _admit(event_id, lookup, now, organizer_id=None):
+    tickets = Ticket.objects.filter(
+        lookup,
+        ticket_type__event_id=event_id,
+        is_used=False,
+        is_cancelled=False,
+    )
+
+    if organizer_id is not None:
+        tickets = tickets.filter(ticket_type__event__organizer_id=organizer_id)
+
+    return tickets.update(is_used=True, used_at=now)
+
+
+def check_in_ticket(event_id, organizer_id, identity):
+    """
+    Admit one ticket in a single statement (plus the check-in counters,
+    in the same transaction). Returns (result, ticket); ticket is None
+    when it does not exist.
+    """
+    kind, value = identity
+    lookup = Q(pk=value) if kind == "id" else Q(ticket_code=value)
+    now = timezone.now()
+
+    with transaction.atomic():
+        admitted = _admit(event_id, lookup, now, organizer_id=organizer_id)
+
+        ticket = (
+            Ticket.objects
+            .select_related("ticket_type", "ticket_type__event", "user")
+            .filter(lookup)
+            .first()
+        )
+
+        if admitted:
+            record_check_ins(event_id, [(ticket.ticket_type_id, now)])
+
+    if admitted:
+        return RESULT_ADMITTED, ticket
+
+    if ticket is None:
+        return RESULT_UNKNOWN, None
+
+    if str(ticket.ticket_type.event_id) != str(event_id):
+        return RESULT_WRONG_EVENT, ticket
+
+    if ticket.is_cancelled:
+        return RESULT_CANCELLED, ticket
+
+    return RESULT_ALREADY_USED, ticket
+
+
+def check_in_batch(event_id, values, signed=False):
+    """
+    Admit many scanned values (ticket codes, or signed payloads) for one
+    event with one UPDATE and one read. One result per value, in order;
+    a value repeated in the batch is admitted at most once.
+    """
+    now = timezone.now()
+    identities = [identify(value, event_id, signed=signed) for value in values]
+    valid = [i for i in identities if not isinstance(i, str)]
+
+    with transaction.atomic():
+        if valid:
+            _admit(event_id, _lookup(valid), now)
+
+        rows = list(
+            Ticket.objects
+            .filter(_lookup(valid))
+            .values_list(
+                "id",
+                "ticket_code",
+                "ticket_type__event_id",
+                "is_used",
+                "used_at",
+                "is_cancelled",
+                "ticket_type_id",
+            )
+        ) if valid else []
+
+        record_check_ins(event_id, [
+            (row[6], now)
+            for row in rows
+            if row[4] == now and str(row[2]) == str(event_id)
+        ])
+
+    by_id = {}
+    by_code = {}
+    for row in rows:
+        by_id[row[0]] = row
+        by_code[row[1]] = row
+
+    results = []
+    seen = set()
+
+    for identity in identities:
+        if isinstance(identity, str):
+            results.append({"result": identity})
+            continue
+
+        kind, value = identity
+        row = (by_id if kind == "id" else by_code).get(value)
+
+        if row is None:
+            results.append({"result": RESULT_UNKNOWN})
+            continue
+
+        ticket_id, code, row_event_id, is_used, used_at, is_cancelled, _ = row
+        code = str(code)
+
+        if str(row_event_id) != str(event_id):
+            result = {"result": RESULT_WRONG_EVENT, "ticket_code": code}
+        elif is_cancelled:
+            result = {"result": RESULT_CANCELLED, "ticket_code": code}
+        elif used_at == now and ticket_id not in seen:
+            result = {"result": RESULT_ADMITTED, "ticket_code": code, "scanned_at": used_at}
+        else:
+            result = {"result": RESULT_ALREADY_USED, "ticket_code": code, "first_scanned_at": used_at}
+
+        seen.add(ticket_id)
+        results.append(result)
+
+    return results
@@ -0,0 +1,260 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import TicketHold, TicketType
+from .shards import (
+    claim_from_shards,
+    move_held_to_sold,
+    release_held,
+    release_sold,
+    remaining_from_shards,
+)
+
+
+# Stock changes are single conditional UPDATE statements: the check and
+# the increment happen in the database, so there is no read-modify-write
+# race and no row lock held across Python code. Callers inside a
+# transaction get the claim rolled back with everything else.
+#
+# Sharded ticket types (shard_count > 0) keep their counters on
+# TicketTypeShard rows instead; the row UPDATEs below are guarded by
+# shard_count=0 and fall through to tickets.shards when they miss.
+
+
+def reserve_tickets(ticket_type_id, quantity):
+    """
+    Claim `quantity` seats. Returns True if they were claimed, False if
+    there is not enough stock left (or the ticket type does not exist).
+    """
+    if quantity < 1:
+        raise ValueError("quantity must be >= 1")
+
+    updated = (
+        TicketType.objects
+        .filter(
+            pk=ticket_type_id,
+            shard_count=0,
+            quantity_sold__lte=F("quantity_total") - F("quantity_held") - quantity,
+        )
+        .update(
+            quantity_sold=F("quantity_sold") + quantity,
+            updated_at=timezone.now(),
+        )
+    )
+
+    if updated == 1:
+        return True
+
+    return bool(claim_from_shards(ticket_type_id, quantity))
+
+
+def release_tickets(ticket_type_id, quantity):
+    """
+    Give `quantity` seats back (refunds, failed issuance).
+    """
+    if quantity < 1:
+        return
+
+    updated = TicketType.objects.filter(pk=ticket_type_id, shard_count=0).update(
+        quantity_sold=Greatest(F("quantity_sold") - quantity, Value(0)),
+        updated_at=timezone.now(),
+    )
+
+    if not updated:
+        release_sold(ticket_type_id, quantity)
+
+
+def remaining_tickets(ticket_type_id):
+    row = (
+        TicketType.objects
+        .filter(pk=ticket_type_id)
+        .values_list("quantity_total", "quantity_sold", "quantity_held", "shard_count")
+        .first()
+    )
+
+    if row is None:
+        return 0
+
+    total, sold, held, shard_count = row
+
+    if shard_count:
+        return remaining_from_shards(ticket_type_id) or 0
+
+    return max(total - sold - held, 0)
+
+
+# ==========================================
+# HOLDS (pending orders)
+# ==========================================
+def hold_tickets(order, minutes=None):
+    """
+    Reserve the order's seats for TICKET_HOLD_MINUTES. Returns the
+    TicketHold, or None if there is not enough stock. Call inside the
+    transaction that creates the order.
+    """
+    quantity = order.quantity
+
+    if quantity < 1:
+        raise ValueError("quantity must be >= 1")
+
+    updated = (
+        TicketType.objects
+        .filter(
+            pk=order.ticket_type_id,
+            shard_count=0,
+            quantity_sold__lte=F("quantity_total") - F("quantity_held") - quantity,
+        )
+        .update(
+            quantity_held=F("quantity_held") + quantity,
+            updated_at=timezone.now(),
+        )
+    )
+
+    shard_id = None
+
+    if updated != 1:
+        shard_id = claim_from_shards(order.ticket_type_id, quantity, field="held")
+        if not shard_id:
+            return None
+
+    if minutes is None:
+        minutes = settings.TICKET_HOLD_MINUTES
+
+    return TicketHold.objects.create(
+        ticket_type_id=order.ticket_type_id,
+        order=order,
+        shard_id=shard_id,
+        quantity=quantity,
+        expires_at=timezone.now() + timedelta(minutes=minutes),
+    )
+
+
+def convert_hold(order):
+    """
+    Turn the order's hold into sold seats. Returns False when the order
+    has no hold left (already swept), so the caller can fall back to
+    reserve_tickets(). Call inside the payment transaction.
+    """
+    hold = (
+        TicketHold.objects
+        .select_for_update()
+        .filter(order=order)
+        .first()
+    )
+
+    if hold is None:
+        return False
+
+    # only the transaction that deletes the hold moves the counters
+    deleted, _ = TicketHold.objects.filter(pk=hold.pk).delete()
+    if not deleted:
+        return False
+
+    if hold.shard_id:
+        move_held_to_sold(hold.shard_id, hold.quantity)
+        return True
+
+    TicketType.objects.filter(pk=hold.ticket_type_id).update(
+        quantity_held=Greatest(F("quantity_held") - hold.quantity, Value(0)),
+        quantity_sold=F("quantity_sold") + hold.quantity,
+        updated_at=timezone.now(),
+    )
+
+    return True
+
+
+def claim_for_order(order):
+    """
+    Sell the order's seats at payment time: its hold if it still has one,
+    fresh stock otherwise. False when there is not enough stock. Call
+    inside the payment transaction.
+    """
+    return convert_hold(order) or reserve_tickets(order.ticket_type_id, order.quantity)
+
+
+def release_hold(order):
+    """
+    Give a pending order's held seats back (order cancelled or deleted).
+    Returns True if it had a hold.
+    """
+    with transaction.atomic():
+        hold = (
+            TicketHold.objects
+            .select_for_update()
+            .filter(order=order)
+            .first()
+        )
+
+        if hold is None:
+            return False
+
+        deleted, _ = TicketHold.objects.filter(pk=hold.pk).delete()
+        if not deleted:
+            return False
+
+        if hold.shard_id:
+            release_held(hold.shard_id, hold.quantity)
+        else:
+            TicketType.objects.filter(pk=hold.ticket_type_id).update(
+                quantity_held=Greatest(F("quantity_held") - hold.quantity, Value(0)),
+                updated_at=timezone.now(),
+            )
+
+    return True
+
+
+def release_expired_holds(ticket_type_id=None, batch_size=1000):
+    """
+    Release expired holds in bulk (index on expires_at). Holds being
+    converted by a payment right now are locked and skipped.
+    Returns the number of holds released.
+    """
+    released = 0
+
+    while True:
+        with transaction.atomic():
+            holds = (
+                TicketHold.objects
+                .select_for_update(skip_locked=True)
+                .filter(expires_at__lte=timezone.now())
+            )
+
+            if ticket_type_id is not None:
+                holds = holds.filter(ticket_type_id=ticket_type_id)
+
+            rows = list(
+                holds.values_list("id", "ticket_type_id", "shard_id", "quantity")[:batch_size]
+            )
+
+            if not rows:
+                return released
+
+            TicketHold.objects.filter(pk__in=[r[0] for r in rows]).delete()
+
+            per_type = defaultdict(int)
+            per_shard = defaultdict(int)
+            for _, type_id, shard_id, quantity in rows:
+                if shard_id:
+                    per_shard[shard_id] += quantity
+                else:
+                    per_type[type_id] += quantity
+
+            for shard_id, quantity in per_shard.items():
+                release_held(shard_id, quantity)
+
+            for type_id, quantity in per_type.items():
+                TicketType.objects.filter(pk=type_id).update(
+                    quantity_held=Greatest(F("quantity_held") - quantity, Value(0)),
+                    updated_at=timezone.now(),
+                )
+
+            released += len(rows)
+
+        if len(rows) < batch_size:
+            return released
@@ -0,0 +1,116 @@
+import logging
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Q
+
+from utils.background import run_in_background
+
+from .models import Ticket
+from .qr import render_qr_batch
+from .signing import sign_ticket
+
+
+logger = logging.getLogger(__name__)
+
+# same dimensions as the images generate_ticket_qr produced (box 10)
+STORED_QR_SIZE = 370
+
+# tickets read, rendered and uploaded per round by attach_qr_codes
+QR_BATCH_SIZE = 500
+
+
+def issue_tickets(user, ticket_type, quantity, order=None):
+    """
+    Create `quantity` tickets with a single INSERT. Call it inside the
+    purchase transaction. QR images are served on demand by ticket_qr;
+    with STORE_TICKET_QR_IMAGES they are also uploaded after commit, in
+    the background, so no row locks are held while that happens.
+    """
+    # uuid primary keys are set in Python, so the ids are known even on
+    # backends where bulk_create does not return them
+    tickets = [
+        Ticket(user=user, ticket_type=ticket_type, order=order)
+        for _ in range(quantity)
+    ]
+    Ticket.objects.bulk_create(tickets)
+
+    if settings.STORE_TICKET_QR_IMAGES:
+        ticket_ids = [t.pk for t in tickets]
+        transaction.on_commit(lambda: run_in_background(attach_qr_codes, ticket_ids))
+
+    return tickets
+
+
+def missing_qr_codes():
+    return Ticket.objects.filter(Q(qr_code="") | Q(qr_code__isnull=True))
+
+
+def attach_qr_codes(ticket_ids=None, since=None, batch_size=QR_BATCH_SIZE, workers=1):
+    """
+    Render and store the QR image for tickets that don't have one yet,
+    `batch_size` tickets at a time (keyset on the id, so memory stays
+    flat). Each ticket is written with its own UPDATE so a failed upload
+    only leaves that ticket for the next run (generate_missing_qr_codes).
+    `workers` > 1 renders on the QR process pool; only commands do that.
+    Returns the number of tickets updated.
+    """
+    tickets = missing_qr_codes()
+
+    if ticket_ids is not None:
+        tickets = tickets.filter(pk__in=ticket_ids)
+
+    if since is not None:
+        tickets = tickets.filter(created_at__gte=since)
+
+    tickets = tickets.order_by("pk").values_list(
+        "id", "ticket_code", "ticket_type_id", "ticket_type__event_id", "created_at"
+    )
+
+    done = 0
+    last_id = None
+
+    while True:
+        page = tickets if last_id is None else tickets.filter(pk__gt=last_id)
+        batch = list(page[:batch_size])
+
+        if not batch:
+            return done
+
+        done += _store_qr_codes(batch, workers)
+        last_id = batch[-1][0]
+
+        if len(batch) < batch_size:
+            return done
+
+
+def _store_qr_codes(tickets, workers):
+    # the image carries whatever ticket_qr_payload() would encode
+    if settings.SIGNED_TICKET_CODES:
+        codes = [
+            sign_ticket(ticket_id, event_id, ticket_type_id, created_at)
+            for ticket_id, _, ticket_type_id, event_id, created_at in tickets
+        ]
+    else:
+        codes = [str(code) for _, code, *_ in tickets]
+
+    done = 0
+
+    # uploads follow as each image comes back
+    rendered = render_qr_batch(codes, size=STORED_QR_SIZE, workers=workers)
+
+    for ticket, (_, content) in zip(tickets, rendered):
+        ticket_id, ticket_code = ticket[0], ticket[1]
+        field = Ticket(pk=ticket_id).qr_code
+
+        try:
+            field.save(f"{ticket_code}.png", ContentFile(content), save=False)
+        except Exception:
+            logger.exception("Could not store QR code for ticket %s", ticket_id)
+            continue
+
+        Ticket.objects.filter(pk=ticket_id).update(qr_code=field.name)
+        done += 1
+
+    return done
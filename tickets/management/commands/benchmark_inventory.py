@@ -0,0 +1,129 @@
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from events.models import Event
+from tickets.inventory import remaining_tickets, reserve_tickets
+from tickets.models import TicketType
+from tickets.shards import enable_sharding, shard_totals
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure ticket purchases per second on one ticket type, plain row "
+        "counter vs sharded counters, at several concurrency levels. "
+        "Creates and removes its own throwaway event."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--purchases", type=int, default=2000, help="purchases per run")
+        parser.add_argument("--shards", type=int, default=16)
+        parser.add_argument("--concurrency", default="1,8,32", help="comma separated buyer counts")
+
+    def handle(self, *args, **options):
+
+        try:
+            levels = [int(c) for c in options["concurrency"].split(",") if c.strip()]
+        except ValueError:
+            raise CommandError("--concurrency must be a comma separated list of numbers")
+
+        purchases = options["purchases"]
+
+        if connection.vendor == "sqlite":
+            self.stdout.write(self.style.WARNING(
+                "SQLite serialises all writers; run this against Postgres for meaningful numbers."
+            ))
+
+        organizer = get_user_model().objects.create_user(
+            email=f"inventory-benchmark-{uuid.uuid4().hex[:8]}@example.com",
+            password=None,
+        )
+
+        try:
+            now = timezone.now()
+            event = Event.objects.create(
+                title="Inventory benchmark",
+                description="Temporary event created by benchmark_inventory",
+                location="-",
+                start_date=now + timedelta(days=365),
+                end_date=now + timedelta(days=365),
+                organizer=organizer,
+            )
+
+            self.stdout.write(f"{'mode':<10}{'buyers':>8}{'purchases/s':>14}{'failed':>8}")
+
+            for mode in ("row", "sharded"):
+                for buyers in levels:
+                    ticket_type = TicketType.objects.create(
+                        event=event,
+                        name=f"{mode}-{buyers}",
+                        price=1,
+                        quantity_total=purchases,
+                    )
+
+                    if mode == "sharded":
+                        enable_sharding(ticket_type.id, options["shards"])
+
+                    rate, failed = self._run(ticket_type.id, purchases, buyers)
+                    self._check(ticket_type.id, purchases - failed)
+
+                    self.stdout.write(f"{mode:<10}{buyers:>8}{rate:>14.0f}{failed:>8}")
+
+        finally:
+            # cascades to the event, ticket types and shards
+            organizer.delete()
+
+    def _run(self, ticket_type_id, purchases, buyers):
+        per_buyer = [purchases // buyers + (1 if i < purchases % buyers else 0) for i in range(buyers)]
+        failed = [0] * buyers
+        start_gate = threading.Barrier(buyers + 1)
+
+        def buyer(index, count):
+            start_gate.wait()
+            try:
+                for _ in range(count):
+                    try:
+                        with transaction.atomic():
+                            if not reserve_tickets(ticket_type_id, 1):
+                                failed[index] += 1
+                    except Exception:
+                        failed[index] += 1
+            finally:
+                connections.close_all()
+
+        threads = [
+            threading.Thread(target=buyer, args=(i, count))
+            for i, count in enumerate(per_buyer)
+        ]
+
+        for thread in threads:
+            thread.start()
+
+        start_gate.wait()
+        started = time.perf_counter()
+
+        for thread in threads:
+            thread.join()
+
+        elapsed = time.perf_counter() - started
+        total_failed = sum(failed)
+
+        return (purchases - total_failed) / elapsed, total_failed
+
+    def _check(self, ticket_type_id, expected):
+        ticket_type = TicketType.objects.get(pk=ticket_type_id)
+        sold = ticket_type.quantity_sold
+
+        if ticket_type.shard_count:
+            sold = shard_totals([ticket_type_id])[ticket_type_id][0]
+
+        if sold != expected or sold + remaining_tickets(ticket_type_id) != ticket_type.quantity_total:
+            raise CommandError(
+                f"Counter mismatch on ticket type {ticket_type_id}: sold {sold}, expected {expected}"
+            )
@@ -0,0 +1,39 @@
+import os
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+
+from tickets.qr import render_qr_batch
+
+
+class Command(BaseCommand):
+    help = "Compare serial and process-pool QR rendering throughput."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=1000)
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--format", dest="fmt", choices=["png", "svg"], default="png")
+        parser.add_argument("--size", type=int, default=370)
+
+    def handle(self, *args, **options):
+
+        codes = [str(uuid.uuid4()) for _ in range(options["count"])]
+
+        runs = [("serial", 1), (f"pool x{options['workers']}", options["workers"])]
+
+        self.stdout.write(f"{len(codes)} {options['fmt']} codes, {os.cpu_count()} CPUs")
+
+        for label, workers in runs:
+            started = time.perf_counter()
+            total_bytes = 0
+
+            for _, content in render_qr_batch(codes, fmt=options["fmt"], size=options["size"], workers=workers):
+                total_bytes += len(content)
+
+            elapsed = time.perf_counter() - started
+
+            self.stdout.write(
+                f"{label:<12} {len(codes) / elapsed:>8.0f} codes/s  "
+                f"{elapsed:>6.2f}s  {total_bytes / len(codes):>6.0f} bytes avg"
+            )
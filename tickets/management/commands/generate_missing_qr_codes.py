@@ -0,0 +1,40 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tickets.issuance import attach_qr_codes
+from tickets.qr import batch_workers
+
+
+class Command(BaseCommand):
+    help = (
+        "Render and store QR images for recent tickets issued without one "
+        "(e.g. a worker restarted mid-job). Only does anything with "
+        "STORE_TICKET_QR_IMAGES on; otherwise QR codes are served on demand."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=2,
+            help="only tickets issued in the last N days (default 2, 0 for all)",
+        )
+
+    def handle(self, *args, **options):
+
+        if not settings.STORE_TICKET_QR_IMAGES:
+            self.stdout.write(self.style.WARNING(
+                "STORE_TICKET_QR_IMAGES is off: tickets have no stored QR image by design."
+            ))
+            return
+
+        since = None
+        if options["days"] > 0:
+            since = timezone.now() - timedelta(days=options["days"])
+
+        done = attach_qr_codes(since=since, workers=batch_workers())
+
+        self.stdout.write(self.style.SUCCESS(f"Stored QR codes for {done} tickets."))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from tickets.models import TicketType
+from tickets.shards import rebalance_shards
+
+
+class Command(BaseCommand):
+    help = "Even out free seats across the shards of sharded ticket types and sync their totals."
+
+    def handle(self, *args, **kwargs):
+
+        ticket_type_ids = list(
+            TicketType.objects
+            .filter(shard_count__gt=0)
+            .values_list("id", flat=True)
+        )
+
+        for ticket_type_id in ticket_type_ids:
+            rebalance_shards(ticket_type_id)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebalanced {len(ticket_type_ids)} sharded ticket types."))
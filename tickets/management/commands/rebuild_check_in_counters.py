@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from events.models import Event
+from tickets.checkin_stats import rebuild_check_in_counters
+
+
+class Command(BaseCommand):
+    help = "Recount check-in counters and the arrival histogram from the tickets (backfill / repair)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("event_ids", nargs="*", type=int, help="events to rebuild (default: all)")
+
+    def handle(self, *args, **options):
+
+        event_ids = options["event_ids"] or Event.objects.values_list("id", flat=True)
+
+        for event_id in event_ids:
+            count = rebuild_check_in_counters(event_id)
+            self.stdout.write(f"Event {event_id}: {count} checked in")
+
+        self.stdout.write(self.style.SUCCESS("Check-in counters rebuilt."))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from tickets.inventory import release_expired_holds
+
+
+class Command(BaseCommand):
+    help = "Release seats held by pending orders whose hold has expired."
+
+    def handle(self, *args, **kwargs):
+
+        released = release_expired_holds()
+
+        self.stdout.write(self.style.SUCCESS(f"Released {released} expired holds."))
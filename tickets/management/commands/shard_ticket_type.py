@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tickets.models import TicketType
+from tickets.shards import MAX_SHARDS, disable_sharding, enable_sharding
+
+
+class Command(BaseCommand):
+    help = "Split a ticket type's stock across N counter shards (0 turns sharding off)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("ticket_type_id", type=int)
+        parser.add_argument("shards", type=int, help=f"0 to {MAX_SHARDS}")
+
+    def handle(self, *args, **options):
+
+        ticket_type_id = options["ticket_type_id"]
+        count = options["shards"]
+
+        if not TicketType.objects.filter(pk=ticket_type_id).exists():
+            raise CommandError(f"Ticket type {ticket_type_id} not found")
+
+        if count == 0:
+            disable_sharding(ticket_type_id)
+            self.stdout.write(self.style.SUCCESS(f"Ticket type {ticket_type_id} is no longer sharded."))
+            return
+
+        try:
+            enable_sharding(ticket_type_id, count)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(f"Ticket type {ticket_type_id} split across {count} shards."))
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0002_ticket_order'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tickettype',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0004_ticket_holds'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tickettype',
+            name='shard_count',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='TicketTypeShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveSmallIntegerField()),
+                ('capacity', models.PositiveIntegerField(default=0)),
+                ('sold', models.PositiveIntegerField(default=0)),
+                ('held', models.PositiveIntegerField(default=0)),
+                ('ticket_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shards', to='tickets.tickettype')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='tickethold',
+            name='shard',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='holds', to='tickets.tickettypeshard'),
+        ),
+        migrations.AddConstraint(
+            model_name='tickettypeshard',
+            constraint=models.UniqueConstraint(fields=('ticket_type', 'index'), name='unique_ticket_type_shard'),
+        ),
+    ]
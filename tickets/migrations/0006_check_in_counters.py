@@ -0,0 +1,39 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0007_waiting_room'),
+        ('tickets', '0005_ticket_type_shards'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CheckInBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('starts_at', models.DateTimeField()),
+                ('checked_in', models.PositiveIntegerField(default=0)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='check_in_buckets', to='events.event')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('event', 'starts_at'), name='unique_check_in_bucket')],
+            },
+        ),
+        migrations.CreateModel(
+            name='CheckInCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('checked_in', models.PositiveIntegerField(default=0)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='check_in_counters', to='events.event')),
+                ('ticket_type', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='check_in_counters', to='tickets.tickettype')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('event', 'ticket_type'), name='unique_check_in_counter'), models.UniqueConstraint(condition=models.Q(('ticket_type__isnull', True)), fields=('event',), name='unique_event_check_in_counter')],
+            },
+        ),
+    ]
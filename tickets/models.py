@@ -11,10 +11,86 @@ class TicketType(models.Model):
     quantity_total = models.PositiveIntegerField(default=0)
     quantity_sold = models.PositiveIntegerField(default=0)
 
+    # seats reserved by pending orders (see TicketHold)
+    quantity_held = models.PositiveIntegerField(default=0)
+
+    # 0 = counters live on this row; N = stock split across N
+    # TicketTypeShard rows (see tickets.shards)
+    shard_count = models.PositiveSmallIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def available(self):
+        return max(self.quantity_total - self.quantity_sold - self.quantity_held, 0)
+
     def __str__(self):
         return f"{self.event.title} - {self.name}"
 
 
+class TicketTypeShard(models.Model):
+    """
+    One slice of a sharded TicketType's stock. capacity across all
+    shards adds up to quantity_total.
+    """
+    ticket_type = models.ForeignKey(
+        TicketType,
+        on_delete=models.CASCADE,
+        related_name="shards"
+    )
+
+    index = models.PositiveSmallIntegerField()
+    capacity = models.PositiveIntegerField(default=0)
+    sold = models.PositiveIntegerField(default=0)
+    held = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["ticket_type", "index"],
+                name="unique_ticket_type_shard",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.ticket_type_id} shard {self.index}: {self.sold + self.held}/{self.capacity}"
+
+
+class TicketHold(models.Model):
+    """
+    Seats reserved for a pending order until expires_at. Counted in
+    TicketType.quantity_held; converted to sold seats on payment or
+    released by tickets.inventory.release_expired_holds.
+    """
+    ticket_type = models.ForeignKey(
+        TicketType,
+        on_delete=models.CASCADE,
+        related_name="holds"
+    )
+
+    order = models.OneToOneField(
+        "orders.Order",
+        on_delete=models.CASCADE,
+        related_name="hold"
+    )
+
+    # set when the seats were claimed from a shard
+    shard = models.ForeignKey(
+        TicketTypeShard,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="holds"
+    )
+
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Hold {self.quantity} x {self.ticket_type_id} for order #{self.order_id}"
+
+
 class Ticket(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
 
@@ -54,4 +130,68 @@ class Ticket(models.Model):
     location = models.CharField(max_length=255, blank=True, null=True)
 
     def __str__(self):
-        return f"{self.ticket_type.event.title} - {self.ticket_type.name} ({self.ticket_code})"
\ No newline at end of file
+        return f"{self.ticket_type.event.title} - {self.ticket_type.name} ({self.ticket_code})"
+
+
+class CheckInCounter(models.Model):
+    """
+    Running count of admitted tickets, bumped in the same transaction as
+    each check-in (see tickets.checkin_stats). One row per ticket type,
+    plus one row with no ticket type holding the event total.
+    """
+    event = models.ForeignKey(
+        Event,
+        on_delete=models.CASCADE,
+        related_name="check_in_counters"
+    )
+
+    ticket_type = models.ForeignKey(
+        TicketType,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="check_in_counters"
+    )
+
+    checked_in = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["event", "ticket_type"],
+                name="unique_check_in_counter",
+            ),
+            models.UniqueConstraint(
+                fields=["event"],
+                condition=models.Q(ticket_type__isnull=True),
+                name="unique_event_check_in_counter",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.event_id}/{self.ticket_type_id or 'all'}: {self.checked_in}"
+
+
+class CheckInBucket(models.Model):
+    """
+    Check-ins per event per 5 minute window (arrival histogram).
+    """
+    event = models.ForeignKey(
+        Event,
+        on_delete=models.CASCADE,
+        related_name="check_in_buckets"
+    )
+
+    starts_at = models.DateTimeField()
+    checked_in = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["event", "starts_at"],
+                name="unique_check_in_bucket",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.event_id} @ {self.starts_at}: {self.checked_in}"
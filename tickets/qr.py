@@ -0,0 +1,223 @@
+import hashlib
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+
+import qrcode
+from qrcode.image.svg import SvgPathImage
+from django.conf import settings
+from django.urls import reverse
+
+
+# A ticket's QR is a pure function of (code, format, size), so renders
+# are cached under a key derived from exactly that: in memory (LRU) and,
+# when QR_CACHE_DIR is set, on local disk shared by the workers.
+FORMATS = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+}
+
+DEFAULT_SIZE = 300
+MIN_SIZE = 64
+MAX_SIZE = 1024
+BORDER = 4
+
+MEMORY_CACHE_SIZE = 512
+
+
+class InvalidQRRequest(ValueError):
+    pass
+
+
+def parse_size(value):
+    if value in (None, ""):
+        return DEFAULT_SIZE
+
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        raise InvalidQRRequest("size must be a number")
+
+    if not MIN_SIZE <= size <= MAX_SIZE:
+        raise InvalidQRRequest(f"size must be between {MIN_SIZE} and {MAX_SIZE}")
+
+    return size
+
+
+def _make(data):
+    qr = qrcode.QRCode(version=None, border=BORDER)
+    qr.add_data(data)
+    qr.make(fit=True)
+    return qr
+
+
+def cache_key(data, fmt, box_size):
+    raw = f"{data}:{fmt}:{box_size}".encode()
+    return hashlib.sha256(raw).hexdigest()
+
+
+def _render(qr, fmt):
+    buffer = BytesIO()
+
+    if fmt == "svg":
+        qr.make_image(image_factory=SvgPathImage).save(buffer)
+    else:
+        qr.make_image(fill_color="black", back_color="white").save(buffer, format="PNG", optimize=True)
+
+    return buffer.getvalue()
+
+
+def _disk_path(key, fmt):
+    directory = getattr(settings, "QR_CACHE_DIR", None)
+    if not directory:
+        return None
+    return os.path.join(directory, key[:2], f"{key}.{fmt}")
+
+
+def _read_disk(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _write_disk(path, content):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # write then rename, so readers never see half a file
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+@lru_cache(maxsize=MEMORY_CACHE_SIZE)
+def _cached_render(data, fmt, size):
+    qr = _make(data)
+
+    # pixels per module so the image is at most `size` wide; sizes that
+    # round to the same box size share one disk entry
+    qr.box_size = max(1, size // (qr.modules_count + 2 * BORDER))
+
+    key = cache_key(data, fmt, qr.box_size)
+    path = _disk_path(key, fmt)
+
+    content = _read_disk(path) if path else None
+
+    if content is None:
+        content = _render(qr, fmt)
+        if path:
+            _write_disk(path, content)
+
+    return content, key
+
+
+def render_qr(data, fmt="png", size=DEFAULT_SIZE):
+    """
+    (content, content_type, cache key) for the QR of `data`.
+    """
+    if fmt not in FORMATS:
+        raise InvalidQRRequest("format must be png or svg")
+
+    content, key = _cached_render(data, fmt, size)
+    return content, FORMATS[fmt], key
+
+
+# ==========================================
+# BATCH RENDERING
+# ==========================================
+# qrcode + PNG encoding is CPU bound, so big jobs run by management
+# commands render across a process pool. The pool is created once per
+# process, on first use, and reused; web workers never pass `workers`
+# and always render in-process (fresh interpreters re-importing Django
+# per order cost more than they save). Small batches stay in-process
+# too.
+POOL_THRESHOLD = 64
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def batch_workers():
+    """
+    Worker count for command-line batch jobs: QR_RENDER_WORKERS,
+    default one per CPU.
+    """
+    return getattr(settings, "QR_RENDER_WORKERS", None) or os.cpu_count() or 1
+
+
+def _process_pool(workers):
+    global _pool, _pool_workers
+
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown()
+
+            # spawn, not fork: the caller may have threads running
+            context = multiprocessing.get_context("spawn")
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+            _pool_workers = workers
+
+        return _pool
+
+
+def _render_one(job):
+    data, fmt, size = job
+    qr = _make(data)
+    qr.box_size = max(1, size // (qr.modules_count + 2 * BORDER))
+    return data, _render(qr, fmt)
+
+
+def render_qr_batch(codes, fmt="png", size=DEFAULT_SIZE, workers=1, chunksize=32):
+    """
+    Yield (code, content) for every code, in order, as soon as each
+    chunk is done. In-process unless `workers` > 1 and the batch is big
+    enough, in which case the long-lived process pool is used.
+    """
+    if fmt not in FORMATS:
+        raise InvalidQRRequest("format must be png or svg")
+
+    jobs = [(str(code), fmt, size) for code in codes]
+
+    if workers <= 1 or len(jobs) < POOL_THRESHOLD:
+        for job in jobs:
+            yield _render_one(job)
+        return
+
+    yield from _process_pool(workers).map(_render_one, jobs, chunksize=chunksize)
+
+
+def ticket_qr_payload(ticket):
+    """
+    What the QR encodes: the signed payload with SIGNED_TICKET_CODES,
+    otherwise the plain ticket_code. Needs ticket.ticket_type loaded.
+    """
+    if settings.SIGNED_TICKET_CODES:
+        from .signing import payload_for
+        return payload_for(ticket)
+
+    return str(ticket.ticket_code)
+
+
+def ticket_qr_url(request, ticket, fmt="png"):
+    """
+    Stored image if there is one, otherwise the on-demand render.
+    """
+    if settings.SIGNED_TICKET_CODES:
+        path = reverse("ticket-qr-signed", kwargs={"payload": ticket_qr_payload(ticket), "fmt": fmt})
+        return request.build_absolute_uri(path)
+
+    if ticket.qr_code:
+        return request.build_absolute_uri(ticket.qr_code.url)
+
+    path = reverse("ticket-qr", kwargs={"ticket_code": ticket.ticket_code, "fmt": fmt})
+    return request.build_absolute_uri(path)
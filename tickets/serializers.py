@@ -8,6 +8,16 @@ class TicketTypeSerializer(serializers.ModelSerializer):
     class Meta:
         model = TicketType
         fields = ["id", "event", "event_title", "name", "price", "quantity_total", "quantity_sold"]
+        # stock only moves through tickets.inventory
+        read_only_fields = ["quantity_sold"]
+
+    def update(self, instance, validated_data):
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+
+        # never write back a stale quantity_sold over concurrent sales
+        instance.save(update_fields=[*validated_data, "updated_at"])
+        return instance
 
 
 class TicketSerializer(serializers.ModelSerializer):
@@ -0,0 +1,350 @@
+import random
+import threading
+
+from django.db import connection, transaction
+from django.db.models import Count, F, Sum, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from utils.background import run_in_background
+
+from .models import TicketHold, TicketType, TicketTypeShard
+
+
+# Sharded stock for flash-sale ticket types.
+#
+# quantity_total is split across TicketTypeShard rows. A purchase claims
+# from a random shard that still has room, so concurrent buyers update
+# different rows instead of queueing on the one TicketType row.
+# TicketType.quantity_sold / quantity_held become the sum of the shards
+# and the row itself is only refreshed by sync_shard_totals() (rebalance
+# command, enable / disable). Readers that serve buyers must use the
+# shard sums: apply_shard_totals / shard_totals, availability_summaries
+# and ticket_types_version. Admin shows the last synced totals.
+MAX_SHARDS = 64
+
+# how long a buyer waits for the inline rebalance before retrying
+REBALANCE_WAIT_SECONDS = 2
+
+
+def _shard_free(ticket_type_id):
+    """
+    [(shard_id, free seats)] for a sharded type, [] for a plain one.
+    """
+    return [
+        (pk, capacity - sold - held)
+        for pk, capacity, sold, held in (
+            TicketTypeShard.objects
+            .filter(ticket_type_id=ticket_type_id)
+            .values_list("id", "capacity", "sold", "held")
+        )
+    ]
+
+
+def _claim(shard_id, quantity, field):
+    return (
+        TicketTypeShard.objects
+        .filter(
+            pk=shard_id,
+            capacity__gte=F("sold") + F("held") + quantity,
+        )
+        .update(**{field: F(field) + quantity})
+    ) == 1
+
+
+def claim_from_shards(ticket_type_id, quantity, field="sold"):
+    """
+    Claim `quantity` seats as sold (or held) from one shard.
+
+    Returns the shard id, None when there is not enough stock, or False
+    when the type is not sharded (caller uses the row counters).
+    """
+    shards = _shard_free(ticket_type_id)
+
+    if not shards:
+        return False
+
+    for attempt in range(2):
+        candidates = [pk for pk, free in shards if free >= quantity]
+        random.shuffle(candidates)
+
+        for shard_id in candidates:
+            if _claim(shard_id, quantity, field):
+                return shard_id
+
+        # no single shard has room (or we lost every race): pool the
+        # leftovers if together they still cover the order
+        if attempt or sum(max(free, 0) for _, free in shards) < quantity:
+            return None
+
+        _rebalance_for_buyer(ticket_type_id, quantity)
+        shards = _shard_free(ticket_type_id)
+
+    return None
+
+
+def _rebalance_for_buyer(ticket_type_id, quantity):
+    """
+    Rebalance in a transaction of its own, so the shard locks it takes
+    are gone as soon as it is done. Inside a purchase transaction that
+    means another connection (a background thread we wait for):
+    locks taken on the buyer's connection would be held until the
+    purchase commits and queue every other buyer behind it.
+    """
+    if not connection.in_atomic_block:
+        rebalance_shards(ticket_type_id, skip_locked=True, reserve=quantity)
+        return
+
+    job = run_in_background(rebalance_shards, ticket_type_id, skip_locked=True, reserve=quantity)
+    if isinstance(job, threading.Thread):
+        # SKIP LOCKED: shards the buyer has locked are left alone, so
+        # this cannot wait on us
+        job.join(REBALANCE_WAIT_SECONDS)
+
+
+def move_held_to_sold(shard_id, quantity):
+    TicketTypeShard.objects.filter(pk=shard_id).update(
+        held=Greatest(F("held") - quantity, Value(0)),
+        sold=F("sold") + quantity,
+    )
+
+
+def release_held(shard_id, quantity):
+    TicketTypeShard.objects.filter(pk=shard_id).update(
+        held=Greatest(F("held") - quantity, Value(0)),
+    )
+
+
+def release_sold(ticket_type_id, quantity):
+    """
+    Give back sold seats (refunds). Rare, so the shards are simply
+    locked and drained from the fullest one. Returns False when the type
+    is not sharded.
+    """
+    with transaction.atomic():
+        shards = list(
+            TicketTypeShard.objects
+            .select_for_update()
+            .filter(ticket_type_id=ticket_type_id)
+            .order_by("-sold", "index")
+        )
+
+        if not shards:
+            return False
+
+        changed = []
+        for shard in shards:
+            if quantity <= 0:
+                break
+            take = min(shard.sold, quantity)
+            if take:
+                shard.sold -= take
+                quantity -= take
+                changed.append(shard)
+
+        TicketTypeShard.objects.bulk_update(changed, ["sold"])
+
+    return True
+
+
+def remaining_from_shards(ticket_type_id):
+    """
+    Seats left on a sharded type, None for a plain one.
+    """
+    row = (
+        TicketTypeShard.objects
+        .filter(ticket_type_id=ticket_type_id)
+        .aggregate(
+            count=Count("id"),
+            free=Sum(Greatest(F("capacity") - F("sold") - F("held"), Value(0))),
+        )
+    )
+
+    if not row["count"]:
+        return None
+
+    return row["free"] or 0
+
+
+def shard_totals(ticket_type_ids):
+    """
+    {ticket_type_id: (sold, held)} summed over the shards, one query.
+    """
+    if not ticket_type_ids:
+        return {}
+
+    rows = (
+        TicketTypeShard.objects
+        .filter(ticket_type_id__in=ticket_type_ids)
+        .values("ticket_type_id")
+        .annotate(sold=Sum("sold"), held=Sum("held"))
+        .order_by()
+    )
+
+    return {r["ticket_type_id"]: (r["sold"], r["held"]) for r in rows}
+
+
+def apply_shard_totals(ticket_types):
+    """
+    Overwrite quantity_sold / quantity_held on TicketType instances with
+    the live shard sums (sharded types only, no query if there are none).
+    """
+    sharded = {t.id: t for t in ticket_types if t.shard_count}
+    totals = shard_totals(list(sharded))
+
+    for ticket_type_id, (sold, held) in totals.items():
+        sharded[ticket_type_id].quantity_sold = sold
+        sharded[ticket_type_id].quantity_held = held
+
+    return ticket_types
+
+
+def sync_shard_totals(ticket_type_id):
+    """
+    Write the summed shard counters back onto the TicketType row.
+    """
+    totals = shard_totals([ticket_type_id]).get(ticket_type_id)
+
+    if totals is None:
+        return False
+
+    sold, held = totals
+    TicketType.objects.filter(pk=ticket_type_id).update(
+        quantity_sold=sold,
+        quantity_held=held,
+        updated_at=timezone.now(),
+    )
+    return True
+
+
+# ==========================================
+# SHARD MANAGEMENT
+# ==========================================
+def _spread(shards, free, reserve=0):
+    """
+    Give every shard its used seats plus an equal part of `free`. With
+    `reserve`, the first shard gets that many seats before the split so
+    an order bigger than an even share still fits somewhere.
+    """
+    free = max(free, 0)
+    reserve = min(reserve, free)
+    base, extra = divmod(free - reserve, len(shards))
+
+    for i, shard in enumerate(shards):
+        shard.capacity = shard.sold + shard.held + base + (1 if i < extra else 0)
+
+    shards[0].capacity += reserve
+
+
+def rebalance_shards(ticket_type_id, skip_locked=False, reserve=0):
+    """
+    Redistribute unclaimed capacity evenly so shards that ran dry get
+    seats back from the ones that still have stock, and pick up changes
+    to quantity_total. Returns the number of free seats.
+
+    With skip_locked (used inline by purchases) only shards nobody else
+    is writing to are touched and capacity just moves between them, so
+    two buyers rebalancing at once cannot deadlock on each other.
+    `reserve` keeps that many free seats together on one shard for the
+    order that triggered the rebalance.
+    """
+    with transaction.atomic():
+        if not skip_locked:
+            total = (
+                TicketType.objects
+                .select_for_update()
+                .filter(pk=ticket_type_id)
+                .values_list("quantity_total", flat=True)
+                .first()
+            )
+
+        shards = list(
+            TicketTypeShard.objects
+            .select_for_update(skip_locked=skip_locked)
+            .filter(ticket_type_id=ticket_type_id)
+            .order_by("index")
+        )
+
+        if not shards:
+            return 0
+
+        if skip_locked:
+            total = sum(s.capacity for s in shards)
+        elif total is None:
+            return 0
+
+        free = total - sum(s.sold + s.held for s in shards)
+        _spread(shards, free, reserve)
+
+        TicketTypeShard.objects.bulk_update(shards, ["capacity"])
+
+        if not skip_locked:
+            sync_shard_totals(ticket_type_id)
+
+    return max(free, 0)
+
+
+def enable_sharding(ticket_type_id, count):
+    """
+    Split a ticket type's stock across `count` shards. Current sales and
+    holds go to shard 0; free seats are spread over all of them.
+    Calling it again with a different count re-shards.
+    """
+    if not 1 <= count <= MAX_SHARDS:
+        raise ValueError(f"shard count must be between 1 and {MAX_SHARDS}")
+
+    with transaction.atomic():
+        ticket_type = TicketType.objects.select_for_update().get(pk=ticket_type_id)
+
+        if ticket_type.shard_count:
+            # fold the existing shards back into the row first
+            disable_sharding(ticket_type_id)
+            ticket_type.refresh_from_db()
+
+        shards = [
+            TicketTypeShard(ticket_type=ticket_type, index=i)
+            for i in range(count)
+        ]
+        shards[0].sold = ticket_type.quantity_sold
+        shards[0].held = ticket_type.quantity_held
+
+        _spread(shards, ticket_type.quantity_total - ticket_type.quantity_sold - ticket_type.quantity_held)
+        TicketTypeShard.objects.bulk_create(shards)
+
+        first = TicketTypeShard.objects.get(ticket_type=ticket_type, index=0)
+        TicketHold.objects.filter(ticket_type=ticket_type).update(shard=first)
+
+        TicketType.objects.filter(pk=ticket_type_id).update(
+            shard_count=count,
+            updated_at=timezone.now(),
+        )
+
+    return count
+
+
+def disable_sharding(ticket_type_id):
+    """
+    Move the shard totals back onto the TicketType row and drop the
+    shards.
+    """
+    with transaction.atomic():
+        TicketType.objects.select_for_update().filter(pk=ticket_type_id).first()
+        list(
+            TicketTypeShard.objects
+            .select_for_update()
+            .filter(ticket_type_id=ticket_type_id)
+            .values_list("id", flat=True)
+        )
+
+        if not sync_shard_totals(ticket_type_id):
+            return False
+
+        TicketHold.objects.filter(ticket_type_id=ticket_type_id).update(shard=None)
+        TicketTypeShard.objects.filter(ticket_type_id=ticket_type_id).delete()
+
+        TicketType.objects.filter(pk=ticket_type_id).update(
+            shard_count=0,
+            updated_at=timezone.now(),
+        )
+
+    return True
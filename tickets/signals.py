@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+
+from orders.models import Order
+
+from events.cache import EVENTS_NAMESPACE, invalidate_on_commit, ticket_types_namespace
+from events.models import Event
+from .checkin_stats import remove_check_ins, remove_check_ins_by_event
+from .inventory import release_hold
+from .models import Ticket, TicketType
+from .shards import rebalance_shards
+
+
+@receiver(post_save, sender=TicketType)
+@receiver(post_delete, sender=TicketType)
+def invalidate_ticket_type_cache(sender, instance, **kwargs):
+    # the event list can embed availability summaries
+    invalidate_on_commit(ticket_types_namespace(instance.event_id), EVENTS_NAMESPACE)
+
+
+@receiver(post_save, sender=TicketType)
+def rebalance_sharded_stock(sender, instance, created, **kwargs):
+    # quantity_total may have changed; spread it over the shards
+    if not created and instance.shard_count:
+        rebalance_shards(instance.pk)
+
+
+@receiver(pre_delete, sender=Order)
+def release_deleted_order_hold(sender, instance, **kwargs):
+    # the hold would cascade away without giving its seats back
+    release_hold(instance)
+
+
+@receiver(pre_delete, sender=TicketType)
+def remove_ticket_type_check_ins(sender, instance, origin=None, **kwargs):
+    # the event's counters go with the event; otherwise the type's
+    # admissions leave the event total and histogram in one pass
+    if getattr(origin, "model", type(origin)) is Event:
+        return
+    remove_check_ins(instance.event_id, Ticket.objects.filter(ticket_type=instance))
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def remove_user_check_ins(sender, instance, **kwargs):
+    # the user's tickets cascade away; a receiver on Ticket would load
+    # every ticket of every cascade, so this is done per user instead
+    remove_check_ins_by_event(Ticket.objects.filter(user=instance))
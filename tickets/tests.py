@@ -1,3 +1,662 @@
-from django.test import TestCase
+import io
+import tempfile
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from events.models import Event
+from orders.models import Order
+
+from . import qr as qr_module
+from .availability import availability_summaries
+from .checkin_stats import check_in_summary, rebuild_check_in_counters
+from .gate import (
+    RESULT_ADMITTED,
+    RESULT_ALREADY_USED,
+    RESULT_CANCELLED,
+    RESULT_INVALID,
+    RESULT_UNKNOWN,
+    RESULT_WRONG_EVENT,
+    check_in_batch,
+    check_in_ticket,
+    sync_scans,
+)
+from .inventory import (
+    claim_for_order,
+    convert_hold,
+    hold_tickets,
+    release_expired_holds,
+    release_tickets,
+    remaining_tickets,
+    reserve_tickets,
+)
+from .issuance import attach_qr_codes, issue_tickets
+from .models import Ticket, TicketHold, TicketType
+from .qr import POOL_THRESHOLD, render_qr, render_qr_batch
+from .shards import enable_sharding, shard_totals
+from .signing import InvalidTicketSignature, payload_for, sign_ticket, verify_payload
+from .views import MAX_BULK_EVENTS
+
+
+@override_settings(RUN_BACKGROUND_TASKS_INLINE=True)
+class InventoryTestCase(TestCase):
+
+    def setUp(self):
+        User = get_user_model()
+        self.organizer = User.objects.create_user(email="org@example.com", password="pw")
+        self.buyer = User.objects.create_user(email="buyer@example.com", password="pw")
+
+        start = timezone.now() + timedelta(days=7)
+        self.event = Event.objects.create(
+            title="Concert",
+            description="-",
+            location="Juba",
+            start_date=start,
+            end_date=start,
+            organizer=self.organizer,
+        )
+        self.ticket_type = TicketType.objects.create(
+            event=self.event,
+            name="VIP",
+            price=10,
+            quantity_total=5,
+        )
+
+    def order(self, quantity=2):
+        total = Decimal(10 * quantity)
+        return Order.objects.create(
+            user=self.buyer,
+            ticket_type=self.ticket_type,
+            quantity=quantity,
+            total_amount=total,
+            commission_amount=total / 10,
+            organizer_amount=total - total / 10,
+        )
+
+    def counters(self):
+        ticket_type = TicketType.objects.get(pk=self.ticket_type.pk)
+        if ticket_type.shard_count:
+            return shard_totals([ticket_type.pk])[ticket_type.pk]
+        return ticket_type.quantity_sold, ticket_type.quantity_held
+
+    def expire(self, order):
+        TicketHold.objects.filter(order=order).update(expires_at=timezone.now() - timedelta(minutes=1))
+
+
+class ReserveTests(InventoryTestCase):
+
+    def test_reserve_never_oversells(self):
+        self.assertTrue(reserve_tickets(self.ticket_type.pk, 3))
+        self.assertFalse(reserve_tickets(self.ticket_type.pk, 3))
+        self.assertTrue(reserve_tickets(self.ticket_type.pk, 2))
+        self.assertFalse(reserve_tickets(self.ticket_type.pk, 1))
+
+        self.assertEqual(self.counters(), (5, 0))
+        self.assertEqual(remaining_tickets(self.ticket_type.pk), 0)
+
+    def test_release_gives_seats_back_without_going_negative(self):
+        reserve_tickets(self.ticket_type.pk, 2)
+
+        release_tickets(self.ticket_type.pk, 1)
+        self.assertEqual(self.counters(), (1, 0))
+
+        release_tickets(self.ticket_type.pk, 5)
+        self.assertEqual(self.counters(), (0, 0))
+
+    def test_bad_requests(self):
+        self.assertFalse(reserve_tickets(self.ticket_type.pk + 100, 1))
+
+        with self.assertRaises(ValueError):
+            reserve_tickets(self.ticket_type.pk, 0)
+
+
+class ShardedReserveTests(ReserveTests):
+
+    def setUp(self):
+        super().setUp()
+        enable_sharding(self.ticket_type.pk, 3)
+
+
+class HoldTests(InventoryTestCase):
+
+    def test_hold_then_convert(self):
+        order = self.order()
+
+        self.assertIsNotNone(hold_tickets(order))
+        self.assertEqual(self.counters(), (0, 2))
+        self.assertEqual(remaining_tickets(self.ticket_type.pk), 3)
+
+        self.assertTrue(convert_hold(order))
+        self.assertEqual(self.counters(), (2, 0))
+
+        # the hold is gone; converting twice cannot sell twice
+        self.assertFalse(convert_hold(order))
+        self.assertEqual(self.counters(), (2, 0))
+
+    def test_hold_refused_when_sold_out(self):
+        self.assertIsNotNone(hold_tickets(self.order(quantity=4)))
+        self.assertIsNone(hold_tickets(self.order(quantity=2)))
+        self.assertEqual(self.counters(), (0, 4))
+
+    def test_expired_hold_is_released_and_claim_falls_back(self):
+        order = self.order()
+        hold_tickets(order)
+        self.expire(order)
+
+        self.assertEqual(release_expired_holds(), 1)
+        self.assertEqual(self.counters(), (0, 0))
+
+        self.assertTrue(claim_for_order(order))
+        self.assertEqual(self.counters(), (2, 0))
+
+    def test_claim_fails_when_expired_seats_resold(self):
+        order = self.order(quantity=2)
+        hold_tickets(order)
+        self.expire(order)
+        release_expired_holds()
+
+        self.assertTrue(reserve_tickets(self.ticket_type.pk, 4))
+        self.assertFalse(claim_for_order(order))
+        self.assertEqual(self.counters(), (4, 0))
+
+    def test_deleting_pending_order_releases_its_hold(self):
+        order = self.order(quantity=3)
+        hold_tickets(order)
+
+        order.delete()
+
+        self.assertEqual(self.counters(), (0, 0))
+        self.assertEqual(remaining_tickets(self.ticket_type.pk), 5)
+
+
+class ShardedHoldTests(HoldTests):
+
+    def setUp(self):
+        super().setUp()
+        enable_sharding(self.ticket_type.pk, 2)
+
+    def test_claims_spread_over_shards(self):
+        for _ in range(5):
+            self.assertTrue(reserve_tickets(self.ticket_type.pk, 1))
+
+        self.assertFalse(reserve_tickets(self.ticket_type.pk, 1))
+        self.assertEqual(self.counters(), (5, 0))
+
+    def test_inline_rebalance_runs_off_the_purchase_transaction(self):
+        # shard capacities 3 / 2: an order of 4 needs a rebalance
+        with mock.patch("tickets.shards.run_in_background", side_effect=lambda f, *a, **k: f(*a, **k)) as job:
+            with transaction.atomic():
+                self.assertTrue(reserve_tickets(self.ticket_type.pk, 4))
+
+        job.assert_called_once()
+        self.assertEqual(self.counters(), (4, 0))
+
+    def test_readers_see_shard_sales(self):
+        client = APIClient()
+        first = client.get("/api/tickets/", {"event": self.event.pk})
+
+        self.assertTrue(reserve_tickets(self.ticket_type.pk, 5))
+
+        # the row is not touched by the sale, the ETag must still change
+        again = client.get(
+            "/api/tickets/",
+            {"event": self.event.pk},
+            HTTP_IF_NONE_MATCH=first["ETag"],
+        )
+        self.assertEqual(again.status_code, 200)
+
+        summary = availability_summaries([self.event.pk])[self.event.pk]
+        self.assertEqual(summary["remaining"], 0)
+        self.assertTrue(summary["sold_out"])
+        self.assertIsNone(summary["min_price"])
+
+
+class GateSyncTests(InventoryTestCase):
+
+    def test_impossible_scan_time_falls_back_to_now(self):
+        ticket = Ticket.objects.create(user=self.buyer, ticket_type=self.ticket_type)
+        before = timezone.now()
+
+        results = sync_scans(self.event.pk, [
+            {"ticket_code": str(ticket.ticket_code), "scanned_at": "2026-02-30T10:00:00"},
+        ])
+
+        self.assertEqual(results[0]["result"], RESULT_ADMITTED)
+        self.assertGreaterEqual(results[0]["scanned_at"], before)
+
+
+class CheckInBatchTests(InventoryTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tickets = [
+            Ticket.objects.create(user=self.buyer, ticket_type=self.ticket_type)
+            for _ in range(2)
+        ]
+
+    def test_batch_results(self):
+        first, cancelled = self.tickets
+        Ticket.objects.filter(pk=cancelled.pk).update(is_cancelled=True)
+
+        code = str(first.ticket_code)
+        results = check_in_batch(self.event.pk, [
+            code,
+            code,
+            str(cancelled.ticket_code),
+            str(uuid.uuid4()),
+            "not-a-code",
+        ])
+
+        self.assertEqual(
+            [r["result"] for r in results],
+            [RESULT_ADMITTED, RESULT_ALREADY_USED, RESULT_CANCELLED, RESULT_UNKNOWN, RESULT_INVALID],
+        )
+        self.assertEqual(check_in_summary(self.event.pk)["checked_in"], 1)
+
+        # scanning again later is a duplicate, not a second admission
+        again = check_in_batch(self.event.pk, [code])
+        self.assertEqual(again[0]["result"], RESULT_ALREADY_USED)
+        self.assertEqual(check_in_summary(self.event.pk)["checked_in"], 1)
+
+    def test_wrong_event(self):
+        results = check_in_batch(self.event.pk + 1, [str(self.tickets[0].ticket_code)])
+
+        self.assertEqual(results[0]["result"], RESULT_WRONG_EVENT)
+        self.assertFalse(Ticket.objects.get(pk=self.tickets[0].pk).is_used)
+
+    def test_single_check_in(self):
+        identity = ("code", self.tickets[0].ticket_code)
+
+        result, ticket = check_in_ticket(self.event.pk, self.organizer.pk, identity)
+        self.assertEqual(result, RESULT_ADMITTED)
+        self.assertEqual(ticket.pk, self.tickets[0].pk)
+
+        result, _ = check_in_ticket(self.event.pk, self.organizer.pk, identity)
+        self.assertEqual(result, RESULT_ALREADY_USED)
+
+
+def tamper(payload, index):
+    swapped = "B" if payload[index] == "A" else "A"
+    return payload[:index] + swapped + payload[index + 1:]
+
+
+class SignedTicketTests(InventoryTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.ticket = Ticket.objects.select_related("ticket_type").get(
+            pk=Ticket.objects.create(user=self.buyer, ticket_type=self.ticket_type).pk
+        )
+        self.payload = payload_for(self.ticket)
+
+    def test_round_trip(self):
+        signed = verify_payload(self.payload, event_id=self.event.pk)
+
+        self.assertEqual(len(self.payload), 60)
+        self.assertEqual(signed.ticket_id, self.ticket.pk)
+        self.assertEqual(signed.event_id, self.event.pk)
+        self.assertEqual(signed.ticket_type_id, self.ticket_type.pk)
+        self.assertEqual(signed.issued_at, int(self.ticket.created_at.timestamp()))
+
+    def test_tampered_payloads_are_rejected(self):
+        forged = [
+            tamper(self.payload, 3),               # ticket id
+            tamper(self.payload, 25),              # event id
+            tamper(self.payload, len(self.payload) - 1),  # mac
+            self.payload[:-4],
+            "not a payload",
+            "",
+        ]
+
+        for payload in forged:
+            with self.assertRaises(InvalidTicketSignature):
+                verify_payload(payload)
+
+    def test_other_keys_and_events(self):
+        with self.assertRaises(InvalidTicketSignature):
+            verify_payload(self.payload, event_id=self.event.pk + 1)
+
+        with self.settings(TICKET_SIGNING_KEY="rotated"):
+            with self.assertRaises(InvalidTicketSignature):
+                verify_payload(self.payload)
+
+    def test_signed_batch_check_in(self):
+        other_event = sign_ticket(
+            self.ticket.pk, self.event.pk + 1, self.ticket_type.pk, self.ticket.created_at
+        )
+
+        results = check_in_batch(self.event.pk, [
+            self.payload,
+            self.payload,
+            tamper(self.payload, 3),
+            other_event,
+        ], signed=True)
+
+        self.assertEqual(
+            [r["result"] for r in results],
+            [RESULT_ADMITTED, RESULT_ALREADY_USED, RESULT_INVALID, RESULT_WRONG_EVENT],
+        )
+        self.assertTrue(Ticket.objects.get(pk=self.ticket.pk).is_used)
+
+    def test_forged_scan_is_rejected_before_any_query(self):
+        client = APIClient()
+
+        with self.assertNumQueries(0):
+            response = client.post("/api/tickets/scan/", {
+                "event_id": self.event.pk,
+                "payload": tamper(self.payload, 3),
+            }, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Ticket.objects.get(pk=self.ticket.pk).is_used)
+
+
+class CheckInCounterTests(InventoryTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tickets = [
+            Ticket.objects.create(user=self.buyer, ticket_type=self.ticket_type)
+            for _ in range(3)
+        ]
+        sync_scans(self.event.pk, [
+            {"ticket_code": str(t.ticket_code)} for t in self.tickets[:2]
+        ])
+
+    def checked_in(self):
+        summary = check_in_summary(self.event.pk)
+        return (
+            summary["checked_in"],
+            summary["ticket_types"][0]["checked_in"] if summary["ticket_types"] else None,
+            sum(b["checked_in"] for b in summary["histogram"]),
+        )
+
+    def admit_other_buyer(self):
+        other = get_user_model().objects.create_user(email="other@example.com", password="pw")
+        ticket = Ticket.objects.create(user=other, ticket_type=self.ticket_type)
+        sync_scans(self.event.pk, [{"ticket_code": str(ticket.ticket_code)}])
+        self.assertEqual(self.checked_in(), (3, 3, 3))
+
+    def test_refund_takes_admissions_back_once(self):
+        self.admit_other_buyer()
+
+        order = self.order(quantity=3)
+        order.status = "paid"
+        order.save(update_fields=["status"])
+
+        buyer = APIClient()
+        buyer.force_authenticate(self.buyer)
+        response = buyer.post("/api/refunds/request/", {"order_id": order.pk})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.checked_in(), (1, 1, 1))
+
+        # approving deletes the (already cancelled) tickets: no second decrement
+        organizer = APIClient()
+        organizer.force_authenticate(self.organizer)
+        response = organizer.post(f"/api/orders/organizer/refunds/{order.pk}/approve/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Ticket.objects.filter(user=self.buyer).exists())
+        self.assertEqual(self.checked_in(), (1, 1, 1))
+
+    def test_deleted_user(self):
+        self.admit_other_buyer()
+
+        with CaptureQueriesContext(connection) as queries:
+            self.buyer.delete()
+
+        # the tickets still go in one fast DELETE, not row by row
+        self.assertTrue(any(
+            q["sql"].startswith('DELETE FROM "tickets_ticket" WHERE "tickets_ticket"."user_id" IN')
+            for q in queries.captured_queries
+        ))
+
+        self.assertEqual(self.checked_in(), (1, 1, 1))
+
+    def test_deleted_ticket_type(self):
+        other = TicketType.objects.create(event=self.event, name="Regular", price=5, quantity_total=10)
+        ticket = Ticket.objects.create(user=self.buyer, ticket_type=other)
+        sync_scans(self.event.pk, [{"ticket_code": str(ticket.ticket_code)}])
+        self.assertEqual(self.checked_in()[0], 3)
+
+        self.ticket_type.delete()
+
+        self.assertEqual(self.checked_in(), (1, 1, 1))
+        self.assertEqual(rebuild_check_in_counters(self.event.pk), 1)
+
+
+class IssueTicketsTests(InventoryTestCase):
+
+    def issue(self, quantity=3):
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks() as callbacks:
+                tickets = issue_tickets(self.buyer, self.ticket_type, quantity)
+        inserts = [q["sql"] for q in queries if q["sql"].startswith('INSERT INTO "tickets_ticket"')]
+        return tickets, inserts, callbacks
+
+    def test_one_insert_for_all_tickets(self):
+        tickets, inserts, callbacks = self.issue()
+
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(
+            set(Ticket.objects.values_list("pk", flat=True)), {t.pk for t in tickets}
+        )
+        self.assertEqual(callbacks, [])
+
+    def test_stored_images_are_attached_after_commit(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+
+        with self.settings(MEDIA_ROOT=media.name, STORE_TICKET_QR_IMAGES=True):
+            tickets, inserts, callbacks = self.issue()
+            self.assertEqual(len(inserts), 1)
+            self.assertEqual(Ticket.objects.exclude(qr_code="").count(), 0)
+            self.assertEqual(len(callbacks), 1)
+
+            callbacks[0]()
+
+        self.assertEqual(Ticket.objects.exclude(qr_code="").count(), 3)
+        self.assertEqual(
+            Ticket.objects.get(pk=tickets[0].pk).qr_code.name,
+            f"tickets/qr_codes/{tickets[0].ticket_code}.png",
+        )
+
+
+class QrBackfillTests(InventoryTestCase):
+
+    def setUp(self):
+        super().setUp()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.settings_override = self.settings(MEDIA_ROOT=media.name, STORE_TICKET_QR_IMAGES=True)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+        self.tickets = [
+            Ticket.objects.create(user=self.buyer, ticket_type=self.ticket_type)
+            for _ in range(3)
+        ]
+
+    def stored(self):
+        return Ticket.objects.exclude(qr_code="").count()
+
+    def test_backfill_in_batches_and_only_recent(self):
+        Ticket.objects.filter(pk=self.tickets[0].pk).update(
+            created_at=timezone.now() - timedelta(days=30)
+        )
+
+        done = attach_qr_codes(since=timezone.now() - timedelta(days=2), batch_size=1)
+
+        self.assertEqual(done, 2)
+        self.assertEqual(self.stored(), 2)
+        self.assertEqual(Ticket.objects.get(pk=self.tickets[0].pk).qr_code, "")
+
+    def test_command_does_nothing_when_images_are_not_stored(self):
+        with self.settings(STORE_TICKET_QR_IMAGES=False):
+            call_command("generate_missing_qr_codes", stdout=io.StringIO())
+
+        self.assertEqual(self.stored(), 0)
+
+        call_command("generate_missing_qr_codes", stdout=io.StringIO())
+        self.assertEqual(self.stored(), 3)
+
+
+class QrEndpointTests(TestCase):
+
+    def setUp(self):
+        self.code = uuid.uuid4()
+        self.url = f"/api/tickets/qr/{self.code}.png"
+
+    def test_png_is_cacheable_forever(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertEqual(response["Cache-Control"], "public, max-age=31536000, immutable")
+        self.assertEqual(response.content, render_qr(str(self.code))[0])
+        self.assertTrue(response["ETag"].startswith('"'))
+
+    def test_etag_depends_on_size_and_format(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        self.assertEqual(self.client.get(self.url)["ETag"], etag)
+        self.assertNotEqual(self.client.get(self.url, {"size": 200})["ETag"], etag)
+
+        svg = self.client.get(f"/api/tickets/qr/{self.code}.svg")
+        self.assertEqual(svg["Content-Type"], "image/svg+xml")
+        self.assertNotEqual(svg["ETag"], etag)
+
+    def test_if_none_match(self):
+        etag = self.client.get(self.url)["ETag"]
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["Cache-Control"], "public, max-age=31536000, immutable")
+
+    def test_bad_requests(self):
+        for size in ("abc", "10", "5000"):
+            self.assertEqual(self.client.get(self.url, {"size": size}).status_code, 400)
+
+        self.assertEqual(self.client.get(f"/api/tickets/qr/{self.code}.gif").status_code, 400)
+        self.assertEqual(self.client.post(self.url).status_code, 405)
+
+
+class QrBatchTests(TestCase):
+
+    def test_batch_matches_single_renders_in_order(self):
+        codes = [str(uuid.uuid4()) for _ in range(3)]
+
+        rendered = list(render_qr_batch(codes, size=200))
+
+        self.assertEqual([code for code, _ in rendered], codes)
+        for code, content in rendered:
+            self.assertEqual(content, render_qr(code, size=200)[0])
+
+    def test_pool_is_created_once_and_reused(self):
+        codes = [str(uuid.uuid4()) for _ in range(POOL_THRESHOLD)]
+
+        first = [code for code, _ in render_qr_batch(codes, workers=2)]
+        pool = qr_module._pool
+        second = [code for code, _ in render_qr_batch(codes, workers=2)]
+
+        self.assertEqual(first, codes)
+        self.assertEqual(second, codes)
+        self.assertIsNotNone(pool)
+        self.assertIs(qr_module._pool, pool)
+
+    def test_default_is_in_process(self):
+        codes = [str(uuid.uuid4()) for _ in range(POOL_THRESHOLD)]
+
+        with mock.patch.object(qr_module, "_process_pool") as pool:
+            self.assertEqual(len(list(render_qr_batch(codes))), len(codes))
+
+        pool.assert_not_called()
+
+
+class BulkTicketTypesTests(InventoryTestCase):
+
+    def setUp(self):
+        super().setUp()
+        from django.core.cache import cache
+        cache.clear()
+        self.client = APIClient()
+
+    def get(self, events):
+        return self.client.get("/api/tickets/bulk/", {"events": events})
+
+    def test_duplicates_are_dropped_in_request_order(self):
+        missing = self.event.pk + 100
+        response = self.get(f"{missing}, {self.event.pk},{missing},{self.event.pk}")
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(list(data), [str(missing), str(self.event.pk)])
+        self.assertEqual([t["name"] for t in data[str(self.event.pk)]], ["VIP"])
+        self.assertEqual(data[str(missing)], [])
+
+    def test_too_many_ids_are_rejected_before_parsing(self):
+        too_many = ",".join(["1"] * (MAX_BULK_EVENTS + 1))
+
+        response = self.get(too_many)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(str(MAX_BULK_EVENTS), response.json()["error"])
+
+    def test_bad_ids(self):
+        self.assertEqual(self.get("1,abc").status_code, 400)
+        self.assertEqual(self.get("").status_code, 400)
+
+    def test_sharded_types_show_live_counts(self):
+        enable_sharding(self.ticket_type.pk, 2)
+        reserve_tickets(self.ticket_type.pk, 2)
+
+        row = self.get(str(self.event.pk)).json()[str(self.event.pk)][0]
+
+        self.assertEqual((row["quantity_sold"], row["available"]), (2, 3))
+
+
+class TicketTypeCacheTests(InventoryTestCase):
+
+    def setUp(self):
+        super().setUp()
+        from django.core.cache import cache
+        cache.clear()
+        self.client = APIClient()
+
+    def names(self, event_param):
+        response = self.client.get("/api/tickets/", {"event": event_param})
+        self.assertEqual(response.status_code, 200)
+        return [t["name"] for t in response.json()]
+
+    def test_unnormalised_event_id_is_invalidated(self):
+        self.assertEqual(self.names("01"), ["VIP"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            TicketType.objects.create(event=self.event, name="Regular", price=5, quantity_total=10)
+
+        self.assertEqual(sorted(self.names("01")), ["Regular", "VIP"])
+
+    def test_invalidation_waits_for_commit(self):
+        self.assertEqual(self.names(self.event.pk), ["VIP"])
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            TicketType.objects.create(event=self.event, name="Regular", price=5, quantity_total=10)
+
+            # not committed yet: the cached generation is untouched
+            self.assertEqual(self.names(self.event.pk), ["VIP"])
+
+        self.assertEqual(len(callbacks), 1)
+
+    def test_bad_event_id(self):
+        self.assertEqual(self.client.get("/api/tickets/", {"event": "abc"}).status_code, 400)
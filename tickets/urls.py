@@ -3,6 +3,14 @@ from .views import (
     create_ticket,
     scan_ticket,
     list_ticket_types,
+    bulk_ticket_types,
+    ticket_qr,
+    signed_ticket_qr,
+    event_scan_key,
+    gate_manifest,
+    sync_gate_scans,
+    scan_tickets_batch,
+    check_in_counts,
     create_ticket_type,
     update_ticket_type,
     delete_ticket_type,
@@ -11,11 +19,19 @@ from . import views
 
 urlpatterns = [
     path("", list_ticket_types),                      # GET /api/tickets/?event=1
+    path("bulk/", bulk_ticket_types),                 # GET /api/tickets/bulk/?events=1,2
+    path("qr/<uuid:ticket_code>.<str:fmt>", ticket_qr, name="ticket-qr"),  # GET /api/tickets/qr/<code>.png?size=300
+    path("qr/s/<str:payload>.<str:fmt>", signed_ticket_qr, name="ticket-qr-signed"),  # signed payload QR
     path("type/create/", create_ticket_type),         # POST /api/tickets/type/create/
     path("type/<int:ticket_type_id>/update/", update_ticket_type),  # PUT/PATCH
     path("type/<int:ticket_type_id>/delete/", delete_ticket_type),  # DELETE
 
     path("create/", create_ticket),                   # POST /api/tickets/create/
     path("scan/", scan_ticket),                       # POST /api/tickets/scan/
+    path("scan-key/", event_scan_key),                # GET /api/tickets/scan-key/?event=1
+    path("scan/batch/", scan_tickets_batch),          # POST /api/tickets/scan/batch/
+    path("scan/sync/", sync_gate_scans),              # POST /api/tickets/scan/sync/
+    path("manifest/", gate_manifest),                 # GET /api/tickets/manifest/?event=1
+    path("check-ins/", check_in_counts),              # GET /api/tickets/check-ins/?event=1
     path("my/", views.my_tickets),                    # GET /api/tickets/my/
 ]
\ No newline at end of file
@@ -1,18 +1,75 @@
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework import status
-from django.utils import timezone
-
+from django.db import transaction
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse
+from django.views.decorators.http import require_GET
+
+from events.cache import (
+    get_cached_response,
+    set_cached_response,
+    ticket_types_namespace,
+)
+from utils.conditional import catalogue_condition
+
+from .availability import remaining_expression, ticket_types_version
+from .checkin_stats import check_in_summary
+from .gate import (
+    MAX_BATCH_CHECK_IN,
+    MAX_SYNC_RECORDS,
+    RESULT_ADMITTED,
+    RESULT_ALREADY_USED,
+    RESULT_CANCELLED,
+    RESULT_INVALID,
+    RESULT_WRONG_EVENT,
+    build_manifest,
+    check_in_batch,
+    check_in_ticket,
+    identify,
+    sync_scans,
+)
+from .inventory import remaining_tickets, reserve_tickets
+from .issuance import issue_tickets
 from .models import Ticket, TicketType
+from .qr import (
+    InvalidQRRequest,
+    parse_size,
+    render_qr,
+    ticket_qr_payload,
+    ticket_qr_url,
+)
+from .shards import apply_shard_totals, shard_totals
+from .signing import (
+    MAC_SIZE,
+    VERSION as SIGNATURE_VERSION,
+    InvalidTicketSignature,
+    export_event_key,
+    verify_payload,
+)
 from .serializers import TicketTypeSerializer
 from events.models import Event
+from events.waiting_room import check_admission
 
 
 # ===============================
 # TICKET TYPES
 # ===============================
 
+def _ticket_types_version(request):
+    event_id = request.GET.get("event")
+
+    if not event_id or not str(event_id).isdigit():
+        return None, 0
+
+    return ticket_types_version(TicketType.objects.filter(event_id=event_id))
+
+
+@catalogue_condition(_ticket_types_version)
 @api_view(["GET"])
 def list_ticket_types(request):
     event_id = request.GET.get("event")
@@ -23,6 +80,20 @@ def list_ticket_types(request):
             status=status.HTTP_400_BAD_REQUEST
         )
 
+    # the namespace must match what the signals invalidate ("01" -> 1)
+    try:
+        event_id = int(event_id)
+    except ValueError:
+        return Response(
+            {"error": "event must be a number"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    namespace = ticket_types_namespace(event_id)
+    cached = get_cached_response(namespace, request)
+    if cached is not None:
+        return Response(cached, status=status.HTTP_200_OK)
+
     try:
         event = Event.objects.get(id=event_id)
     except Event.DoesNotExist:
@@ -31,7 +102,7 @@ def list_ticket_types(request):
             status=status.HTTP_404_NOT_FOUND
         )
 
-    ticket_types = TicketType.objects.filter(event=event)
+    ticket_types = apply_shard_totals(list(TicketType.objects.filter(event=event)))
 
     data = [
         {
@@ -40,14 +111,149 @@ def list_ticket_types(request):
             "price": str(t.price),
             "quantity_total": t.quantity_total,
             "quantity_sold": t.quantity_sold,
-            "available": max(t.quantity_total - t.quantity_sold, 0),
+            "available": t.available,
         }
         for t in ticket_types
     ]
 
+    # availability changes, so this only lives for the short TTL
+    set_cached_response(
+        namespace,
+        request,
+        data,
+        timeout=settings.CATALOGUE_AVAILABILITY_TTL
+    )
+
+    return Response(data, status=status.HTTP_200_OK)
+
+
+# ===============================
+# TICKET TYPES FOR SEVERAL EVENTS
+# ===============================
+# GET /api/tickets/bulk/?events=1,2,3
+MAX_BULK_EVENTS = 50
+
+
+def _bulk_event_ids(request):
+    """
+    (event ids in request order without duplicates, None) or
+    (None, error). The length is checked before anything else is done
+    with the list.
+    """
+    parts = [p.strip() for p in request.GET.get("events", "").split(",") if p.strip()]
+
+    if len(parts) > MAX_BULK_EVENTS:
+        return None, f"At most {MAX_BULK_EVENTS} events per request"
+
+    if not parts or not all(part.isdigit() for part in parts):
+        return None, "events parameter must be a comma separated list of ids"
+
+    return list(dict.fromkeys(int(part) for part in parts)), None
+
+
+def _bulk_ticket_types_version(request):
+    ids, error = _bulk_event_ids(request)
+
+    if error:
+        return None, 0
+
+    return ticket_types_version(TicketType.objects.filter(event_id__in=ids))
+
+
+@catalogue_condition(_bulk_ticket_types_version)
+@api_view(["GET"])
+def bulk_ticket_types(request):
+    event_ids, error = _bulk_event_ids(request)
+
+    if error:
+        return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+    rows = (
+        TicketType.objects
+        .filter(event_id__in=event_ids)
+        .annotate(available=remaining_expression())
+        .order_by("event_id", "id")
+        .values(
+            "id",
+            "event_id",
+            "name",
+            "price",
+            "quantity_total",
+            "quantity_sold",
+            "shard_count",
+            "available",
+        )
+    )
+
+    rows = list(rows)
+
+    # sharded types: live counters come from their shards
+    sharded = shard_totals([row["id"] for row in rows if row["shard_count"]])
+
+    for row in rows:
+        if row["id"] in sharded:
+            sold, held = sharded[row["id"]]
+            row["quantity_sold"] = sold
+            row["available"] = max(row["quantity_total"] - sold - held, 0)
+
+    data = {str(event_id): [] for event_id in event_ids}
+
+    for row in rows:
+        data[str(row["event_id"])].append({
+            "id": row["id"],
+            "name": row["name"],
+            "price": f"{row['price']:.2f}",
+            "quantity_total": row["quantity_total"],
+            "quantity_sold": row["quantity_sold"],
+            "available": row["available"],
+        })
+
     return Response(data, status=status.HTTP_200_OK)
 
 
+# ===============================
+# TICKET QR (ON DEMAND)
+# ===============================
+# GET /api/tickets/qr/<ticket_code>.png?size=300   (or .svg)
+# Plain Django view: the body is an image and DRF reserves ?format=.
+QR_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def _qr_response(request, data, fmt):
+    try:
+        size = parse_size(request.GET.get("size"))
+        content, content_type, key = render_qr(data, fmt, size)
+    except InvalidQRRequest as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    etag = f'"{key}"'
+
+    if etag in request.headers.get("If-None-Match", ""):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(content, content_type=content_type)
+
+    response["ETag"] = etag
+    response["Cache-Control"] = QR_CACHE_CONTROL
+    return response
+
+
+@require_GET
+def ticket_qr(request, ticket_code, fmt):
+    return _qr_response(request, str(ticket_code), fmt)
+
+
+@require_GET
+def signed_ticket_qr(request, payload, fmt):
+    # only genuine payloads get rendered
+    try:
+        verify_payload(payload)
+    except InvalidTicketSignature:
+        return JsonResponse({"error": "Invalid ticket"}, status=404)
+
+    return _qr_response(request, payload, fmt)
+
+
 # ===============================
 # CREATE TICKET TYPE (ORGANIZER)
 # ===============================
@@ -92,7 +298,7 @@ def update_ticket_type(request, ticket_type_id):
     serializer = TicketTypeSerializer(ticket_type, data=request.data, partial=True)
 
     if serializer.is_valid():
-        serializer.save()
+        apply_shard_totals([serializer.save()])
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -145,36 +351,37 @@ def create_ticket(request):
         )
 
     try:
-        ticket_type = TicketType.objects.get(id=ticket_type_id)
+        ticket_type = TicketType.objects.select_related("event").get(id=ticket_type_id)
     except TicketType.DoesNotExist:
         return Response(
             {"error": "Ticket type not found"},
             status=status.HTTP_404_NOT_FOUND
         )
 
-    available = ticket_type.quantity_total - ticket_type.quantity_sold
+    denied = check_admission(request, ticket_type.event_id)
+    if denied:
+        return denied
 
-    if quantity > available:
-        return Response(
-            {"error": f"Only {available} tickets remaining"},
-            status=status.HTTP_400_BAD_REQUEST
-        )
+    with transaction.atomic():
 
-    created_tickets = []
+        # claim stock first; rolled back if ticket creation fails
+        if not reserve_tickets(ticket_type.id, quantity):
+            available = remaining_tickets(ticket_type.id)
+            return Response(
+                {"error": f"Only {available} tickets remaining"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-    for _ in range(quantity):
-        ticket = Ticket.objects.create(
-            user=request.user,
-            ticket_type=ticket_type
-        )
+        tickets = issue_tickets(request.user, ticket_type, quantity)
 
-        created_tickets.append({
+    created_tickets = [
+        {
             "id": str(ticket.id),
             "ticket_code": str(ticket.ticket_code),
-        })
-
-    ticket_type.quantity_sold += quantity
-    ticket_type.save(update_fields=["quantity_sold"])
+            "qr_code": ticket_qr_url(request, ticket),
+        }
+        for ticket in tickets
+    ]
 
     return Response(
         {
@@ -192,76 +399,282 @@ def create_ticket(request):
 # ===============================
 # SCAN TICKET (ORGANIZER ONLY)
 # ===============================
+# Body: event_id plus either ticket_code or a signed payload (the QR
+# content when SIGNED_TICKET_CODES is on). Signed payloads are checked
+# before authentication, so forged or wrong-event scans are rejected
+# without touching the database.
+SCAN_ERRORS = {
+    RESULT_WRONG_EVENT: "Ticket does not belong to this event",
+    RESULT_CANCELLED: "Ticket refunded/cancelled",
+    RESULT_ALREADY_USED: "Ticket already used",
+}
+
+
+class ScanTicketAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def perform_authentication(self, request):
+        self.signed_ticket = None
+        payload = request.data.get("payload")
+
+        if payload:
+            event_id = request.data.get("event_id")
+            if not event_id:
+                raise ValidationError({"error": "event_id is required"})
+
+            try:
+                self.signed_ticket = verify_payload(payload, event_id=event_id)
+            except InvalidTicketSignature as e:
+                raise ValidationError({"error": str(e)})
+
+        super().perform_authentication(request)
+
+    def post(self, request):
+        ticket_code = request.data.get("ticket_code")
+        event_id = request.data.get("event_id")
+
+        if not (ticket_code or self.signed_ticket) or not event_id:
+            return Response(
+                {"error": "ticket_code and event_id are required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if not str(event_id).isdigit():
+            return Response(
+                {"error": "event_id must be a number"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if self.signed_ticket:
+            identity = ("id", self.signed_ticket.ticket_id)
+        else:
+            identity = identify(ticket_code, event_id)
+
+        if identity == RESULT_INVALID:
+            return Response(
+                {"error": "Invalid ticket"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        # 🔒 one conditional UPDATE: concurrent gates can't both admit
+        result, ticket = check_in_ticket(event_id, request.user.id, identity)
+
+        if ticket is None:
+            return Response(
+                {"error": "Invalid ticket"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        event = ticket.ticket_type.event
+
+        if result != RESULT_ADMITTED:
+            if event.organizer_id != request.user.id:
+                return Response(
+                    {"error": "You are not allowed to scan tickets for this event"},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+
+            return Response(
+                {"error": SCAN_ERRORS[result]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(
+            {
+                "message": "Ticket scanned successfully",
+                "ticket": {
+                    "ticket_code": str(ticket.ticket_code),
+                    "user_email": ticket.user.email,
+                    "event": event.title,
+                    "ticket_type": ticket.ticket_type.name,
+                    "used_at": ticket.used_at,
+                }
+            },
+            status=status.HTTP_200_OK
+        )
+
+
+scan_ticket = ScanTicketAPIView.as_view()
+
+
+# ===============================
+# BATCH SCAN (ORGANIZER ONLY)
+# ===============================
+# POST /api/tickets/scan/batch/
+# {"event_id": 1, "codes": [...]}  or  {"event_id": 1, "payloads": [...]}
+# Results per code: admitted, already_used, cancelled, wrong_event,
+# unknown (or invalid for malformed / forged values).
+
+def _organizer_event_id(request, event_id):
+    if not event_id or not str(event_id).isdigit():
+        return None
+    if not Event.objects.filter(id=event_id, organizer=request.user).exists():
+        return None
+    return int(event_id)
+
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
-def scan_ticket(request):
-    ticket_code = request.data.get("ticket_code")
-    event_id = request.data.get("event_id")
+def scan_tickets_batch(request):
+    event_id = _organizer_event_id(request, request.data.get("event_id"))
+
+    if event_id is None:
+        return Response(
+            {"error": "Event not found"},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    signed = "payloads" in request.data
+    values = request.data.get("payloads" if signed else "codes")
 
-    if not ticket_code or not event_id:
+    if not isinstance(values, list) or not values:
         return Response(
-            {"error": "ticket_code and event_id are required"},
+            {"error": "codes must be a non-empty list"},
             status=status.HTTP_400_BAD_REQUEST
         )
 
-    try:
-        ticket = Ticket.objects.select_related(
-            "ticket_type",
-            "ticket_type__event",
-            "user"
-        ).get(ticket_code=ticket_code)
-    except Ticket.DoesNotExist:
+    if len(values) > MAX_BATCH_CHECK_IN:
+        return Response(
+            {"error": f"At most {MAX_BATCH_CHECK_IN} codes per request"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    results = check_in_batch(event_id, values, signed=signed)
+
+    return Response(
+        {
+            "event_id": event_id,
+            "admitted": sum(1 for r in results if r["result"] == RESULT_ADMITTED),
+            "results": results,
+        },
+        status=status.HTTP_200_OK
+    )
+
+
+# ===============================
+# SCAN KEY (ORGANIZER ONLY)
+# ===============================
+# GET /api/tickets/scan-key/?event=1
+# Per-event key a gate app uses to check signed payloads offline.
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def event_scan_key(request):
+    event_id = request.GET.get("event")
+
+    if not event_id or not str(event_id).isdigit():
         return Response(
-            {"error": "Invalid ticket"},
+            {"error": "event parameter is required"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    if not Event.objects.filter(id=event_id, organizer=request.user).exists():
+        return Response(
+            {"error": "Event not found"},
             status=status.HTTP_404_NOT_FOUND
         )
 
-    event = ticket.ticket_type.event
+    return Response(
+        {
+            "event_id": int(event_id),
+            "algorithm": "HMAC-SHA256",
+            "version": SIGNATURE_VERSION,
+            "mac_bytes": MAC_SIZE,
+            "key": export_event_key(event_id),
+        },
+        status=status.HTTP_200_OK
+    )
+
+
+# ===============================
+# OFFLINE GATES (ORGANIZER ONLY)
+# ===============================
+# GET  /api/tickets/manifest/?event=1   binary manifest (see tickets.gate)
+# POST /api/tickets/scan/sync/          {"event_id": 1, "scans": [...]}
 
-    if event.organizer != request.user:
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def gate_manifest(request):
+    event_id = _organizer_event_id(request, request.GET.get("event"))
+
+    if event_id is None:
         return Response(
-            {"error": "You are not allowed to scan tickets for this event"},
-            status=status.HTTP_403_FORBIDDEN
+            {"error": "Event not found"},
+            status=status.HTTP_404_NOT_FOUND
         )
 
-    if str(event.id) != str(event_id):
+    body, version, count = build_manifest(event_id)
+    etag = f'"{version}"'
+
+    if etag in request.headers.get("If-None-Match", ""):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type="application/octet-stream")
+
+    response["ETag"] = etag
+    response["X-Manifest-Version"] = version
+    response["X-Manifest-Count"] = str(count)
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def sync_gate_scans(request):
+    event_id = _organizer_event_id(request, request.data.get("event_id"))
+    scans = request.data.get("scans")
+
+    if event_id is None:
         return Response(
-            {"error": "Ticket does not belong to this event"},
-            status=status.HTTP_400_BAD_REQUEST
+            {"error": "Event not found"},
+            status=status.HTTP_404_NOT_FOUND
         )
 
-    if ticket.is_cancelled:
+    if not isinstance(scans, list):
         return Response(
-            {"error": "Ticket refunded/cancelled"},
+            {"error": "scans must be a list"},
             status=status.HTTP_400_BAD_REQUEST
         )
 
-    if ticket.is_used:
+    if len(scans) > MAX_SYNC_RECORDS:
         return Response(
-            {"error": "Ticket already used"},
+            {"error": f"At most {MAX_SYNC_RECORDS} scans per request"},
             status=status.HTTP_400_BAD_REQUEST
         )
 
-    ticket.is_used = True
-    ticket.used_at = timezone.now()
-    ticket.save(update_fields=["is_used", "used_at"])
+    results = sync_scans(event_id, scans)
 
     return Response(
         {
-            "message": "Ticket scanned successfully",
-            "ticket": {
-                "ticket_code": str(ticket.ticket_code),
-                "user_email": ticket.user.email,
-                "event": event.title,
-                "ticket_type": ticket.ticket_type.name,
-                "used_at": ticket.used_at,
-            }
+            "event_id": event_id,
+            "admitted": sum(1 for r in results if r["result"] == RESULT_ADMITTED),
+            "results": results,
         },
         status=status.HTTP_200_OK
     )
 
 
+# ===============================
+# LIVE CHECK-IN COUNTS (ORGANIZER ONLY)
+# ===============================
+# GET /api/tickets/check-ins/?event=1
+# Reads the counters kept by tickets.checkin_stats - no COUNT over
+# tickets, so door staff can poll it.
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def check_in_counts(request):
+    event_id = _organizer_event_id(request, request.GET.get("event"))
+
+    if event_id is None:
+        return Response(
+            {"error": "Event not found"},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    return Response(check_in_summary(event_id), status=status.HTTP_200_OK)
+
+
 # ===============================
 # MY TICKETS
 # ===============================
@@ -280,6 +693,8 @@ def my_tickets(request):
         {
             "id": str(t.id),
             "ticket_code": str(t.ticket_code),
+            "qr_code": ticket_qr_url(request, t),
+            "qr_payload": ticket_qr_payload(t),
             "ticket_name": t.ticket_type.name,
             "price": str(t.ticket_type.price),
             "is_used": t.is_used,
@@ -0,0 +1,34 @@
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connection
+
+
+logger = logging.getLogger(__name__)
+
+
+def run_in_background(func, *args, **kwargs):
+    """
+    Run func in a daemon thread so the request can return right away.
+
+    Call it from transaction.on_commit() so the job only sees committed
+    rows and never runs for a rolled back request. With
+    RUN_BACKGROUND_TASKS_INLINE = True (tests, management commands) the
+    job runs synchronously instead.
+    """
+    if getattr(settings, "RUN_BACKGROUND_TASKS_INLINE", False):
+        return func(*args, **kwargs)
+
+    def runner():
+        try:
+            func(*args, **kwargs)
+        except Exception:
+            logger.exception("Background task %s failed", getattr(func, "__name__", func))
+        finally:
+            # the thread got its own DB connection; don't leak it
+            connection.close()
+
+    thread = threading.Thread(target=runner, daemon=True)
+    thread.start()
+    return thread
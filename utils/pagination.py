@@ -0,0 +1,113 @@
+import base64
+import json
+
+from django.db.models import Q
+
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def wants_pagination(params):
+    """
+    Pagination is opt-in so existing clients keep getting plain lists.
+    """
+    return "cursor" in params or "limit" in params
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise InvalidCursor("Invalid cursor")
+
+    if not isinstance(values, list) or len(values) != 2:
+        raise InvalidCursor("Invalid cursor")
+
+    return values
+
+
+def parse_limit(params, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    try:
+        limit = int(params.get("limit", default))
+    except (TypeError, ValueError):
+        raise InvalidCursor("limit must be a number")
+
+    return max(1, min(limit, maximum))
+
+
+class KeysetPaginator:
+    """
+    Cursor pagination on (field, id).
+
+    The cursor carries the last row's (field, id) so every page is an
+    index range scan instead of an OFFSET, and page N costs the same as
+    page 1.
+    """
+
+    def __init__(self, field, descending=True):
+        self.field = field
+        self.descending = descending
+
+    def ordering(self):
+        prefix = "-" if self.descending else ""
+        return [f"{prefix}{self.field}", f"{prefix}id"]
+
+    def _after(self, queryset, cursor):
+        value, pk = decode_cursor(cursor)
+
+        try:
+            value = queryset.model._meta.get_field(self.field).to_python(value)
+            pk = int(pk)
+        except Exception:
+            raise InvalidCursor("Invalid cursor")
+
+        op = "lt" if self.descending else "gt"
+
+        return queryset.filter(
+            Q(**{f"{self.field}__{op}": value})
+            | Q(**{self.field: value, f"id__{op}": pk})
+        )
+
+    def paginate(self, queryset, params):
+        """
+        Returns (rows, next_cursor). next_cursor is None on the last page.
+        """
+        limit = parse_limit(params)
+        queryset = queryset.order_by(*self.ordering())
+
+        cursor = params.get("cursor")
+        if cursor:
+            queryset = self._after(queryset, cursor)
+
+        rows = list(queryset[:limit + 1])
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        next_cursor = None
+        if has_more:
+            last = rows[-1]
+            value = getattr(last, self.field)
+            if hasattr(value, "isoformat"):
+                value = value.isoformat()
+            next_cursor = encode_cursor([value, last.pk])
+
+        return rows, next_cursor
+
+
+def page_payload(results, next_cursor):
+    return {
+        "results": results,
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None,
+    }
@@ -1,4 +1,108 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+logger = logging.getLogger(__name__)
+
+EXPO_PUSH_URL = "https://exp.host/--/api/v2/push/send"
+EXPO_RECEIPTS_URL = "https://exp.host/--/api/v2/push/getReceipts"
+
+# Expo limits: 100 messages per send request, 1000 ids per receipt request
+EXPO_CHUNK_SIZE = 100
+EXPO_RECEIPT_CHUNK_SIZE = 1000
+
+MAX_PARALLEL_REQUESTS = 6
+REQUEST_TIMEOUT = (5, 30)  # connect, read (seconds)
+
+# Expo asks to wait before fetching receipts and keeps them for 24h
+RECEIPT_DELAY = timedelta(minutes=15)
+RECEIPT_MAX_AGE = timedelta(hours=24)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class _PushRetry(Retry):
+    # status retries only when the answer carries Retry-After
+    RETRY_AFTER_STATUS_CODES = frozenset([429, 503])
+
+
+def _get_session():
+    """
+    One pooled keep-alive session per process.
+
+    A push POST is not idempotent: once Expo may have received it, a
+    retry can deliver the notification twice. So it is only retried
+    when the connection never opened, or on 429 / 503 with Retry-After
+    (Expo rejected it without sending). Read errors and other 5xx
+    answers fail the chunk.
+    """
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                retry = _PushRetry(
+                    total=4,
+                    connect=3,
+                    read=0,
+                    other=0,
+                    status=3,
+                    backoff_factor=0.5,
+                    status_forcelist=None,
+                    allowed_methods=frozenset(["POST"]),
+                    respect_retry_after_header=True,
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=MAX_PARALLEL_REQUESTS,
+                    max_retries=retry,
+                )
+
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.headers.update({
+                    "Accept": "application/json",
+                    "Accept-Encoding": "gzip, deflate",
+                    "Content-Type": "application/json",
+                })
+                _session = session
+
+    return _session
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _post_chunk(messages):
+    """
+    Returns one push ticket per message (same order). A failed request
+    turns into an error ticket for every message in the chunk.
+    """
+    try:
+        response = _get_session().post(
+            EXPO_PUSH_URL,
+            json=messages,
+            timeout=REQUEST_TIMEOUT,
+        )
+        tickets = response.json().get("data")
+    except Exception as e:
+        logger.warning("Expo push request failed: %s", e)
+        tickets = None
+
+    if not isinstance(tickets, list) or len(tickets) != len(messages):
+        return [{"status": "error", "message": "request failed"} for _ in messages]
+
+    return tickets
 
 
 def send_expo_push(tokens, title, body, data=None):
@@ -9,15 +113,21 @@ def send_expo_push(tokens, title, body, data=None):
     title: notification title
     body: notification message
     data: optional navigation data
+
+    Messages go out in chunks of 100, several chunks at a time over a
+    pooled session. Tokens Expo reports as DeviceNotRegistered are
+    removed right away; ticket ids are stored so check_push_receipts()
+    can prune tokens that fail later.
     """
 
+    # dedupe: the same device token can belong to several users
+    tokens = list(dict.fromkeys(t for t in tokens if t))
+
     if not tokens:
         return {"error": "No tokens provided"}
 
-    messages = []
-
-    for token in tokens:
-        messages.append({
+    messages = [
+        {
             "to": token,
             "sound": "default",
             "title": title,
@@ -25,19 +135,117 @@ def send_expo_push(tokens, title, body, data=None):
             "priority": "high",
             "channelId": "default",
             "data": data or {}
-        })
+        }
+        for token in tokens
+    ]
+
+    chunks = list(_chunks(messages, EXPO_CHUNK_SIZE))
+    workers = min(MAX_PARALLEL_REQUESTS, len(chunks))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_post_chunk, chunks))
+
+    tickets = [ticket for chunk in results for ticket in chunk]
+
+    receipts = []
+    dead_tokens = []
+    errors = 0
+
+    for token, ticket in zip(tokens, tickets):
+        if ticket.get("status") == "ok" and ticket.get("id"):
+            receipts.append((ticket["id"], token))
+            continue
+
+        errors += 1
+        details = ticket.get("details") or {}
+        if details.get("error") == "DeviceNotRegistered":
+            dead_tokens.append(token)
+
+    _record_delivery(receipts, dead_tokens)
+
+    return {
+        "data": tickets,
+        "sent": len(receipts),
+        "errors": errors,
+        "pruned": len(dead_tokens),
+    }
+
+
+def _record_delivery(receipts, dead_tokens):
+    from django.db import transaction
+    from accounts.models import PushReceipt, PushToken
 
     try:
+        # own savepoint: inside a caller's transaction a failed write
+        # would otherwise leave that transaction unusable
+        with transaction.atomic():
+            if receipts:
+                PushReceipt.objects.bulk_create(
+                    [PushReceipt(receipt_id=rid, token=token) for rid, token in receipts],
+                    batch_size=500,
+                    ignore_conflicts=True,
+                )
 
-        response = requests.post(
-            "https://exp.host/--/api/v2/push/send",
-            json=messages,
-            headers={
-                "Content-Type": "application/json"
-            }
-        )
+            if dead_tokens:
+                PushToken.objects.filter(token__in=dead_tokens).delete()
 
-        return response.json()
+    except Exception:
+        # bookkeeping must never fail the send itself
+        logger.exception("Could not record push receipts")
 
-    except Exception as e:
-        return {"error": str(e)}
\ No newline at end of file
+
+def check_push_receipts():
+    """
+    Fetch receipts for sent messages and remove tokens whose device is
+    no longer registered. Meant to run periodically (see the
+    check_push_receipts management command).
+    """
+    from django.utils import timezone
+    from accounts.models import PushReceipt, PushToken
+
+    now = timezone.now()
+
+    # Expo drops receipts after 24h; nothing left to learn from these
+    PushReceipt.objects.filter(created_at__lt=now - RECEIPT_MAX_AGE).delete()
+
+    pending = list(
+        PushReceipt.objects
+        .filter(created_at__lte=now - RECEIPT_DELAY)
+        .order_by("id")
+        .values_list("receipt_id", "token")
+    )
+
+    if not pending:
+        return {"checked": 0, "pruned": 0}
+
+    token_by_receipt = dict(pending)
+    done = []
+    dead_tokens = set()
+
+    for ids in _chunks(list(token_by_receipt), EXPO_RECEIPT_CHUNK_SIZE):
+        try:
+            response = _get_session().post(
+                EXPO_RECEIPTS_URL,
+                json={"ids": ids},
+                timeout=REQUEST_TIMEOUT,
+            )
+            found = response.json().get("data") or {}
+        except Exception as e:
+            logger.warning("Expo receipt request failed: %s", e)
+            continue
+
+        for receipt_id, receipt in found.items():
+            done.append(receipt_id)
+            details = receipt.get("details") or {}
+            if receipt.get("status") == "error" and details.get("error") == "DeviceNotRegistered":
+                dead_tokens.add(token_by_receipt.get(receipt_id))
+
+    dead_tokens.discard(None)
+
+    if dead_tokens:
+        PushToken.objects.filter(token__in=dead_tokens).delete()
+
+    for ids in _chunks(done, EXPO_RECEIPT_CHUNK_SIZE):
+        PushReceipt.objects.filter(receipt_id__in=ids).delete()
+
+    return {"checked": len(done), "pruned": len(dead_tokens)}